@@ -5,6 +5,12 @@ from dotenv import load_dotenv  # For loading environment variables
 from langchain.agents import initialize_agent, tool  # Core agent components
 from langchain_community.tools import TavilySearchResults  # Web search tool
 import datetime  # For time-related operations
+import os  # For locating the shared search cache
+import sys  # For importing modules from the repository root
+
+# search_cache.py is shared by the lessons and lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from search_cache import CachedSearchTool  # Persistent cache of search results
 
 # Load environment variables from .env file (typically contains API keys)
 load_dotenv()
@@ -18,8 +24,8 @@ llm = ChatOpenAI(model="gpt-4o", temperature=0.0)
 
 # Initialize the Tavily search tool with basic depth 
 # https://python.langchain.com/api_reference/community/tools/langchain_community.tools.tavily_search.tool.TavilySearchResults.html
-# This tool will be used for web searches
-search_tool = TavilySearchResults(search_depth="basic")
+# This tool will be used for web searches; repeated queries are answered from the shared search cache
+search_tool = CachedSearchTool(TavilySearchResults(search_depth="basic"))
 
 # Define a custom tool using the @tool decorator
 @tool
@@ -4,6 +4,7 @@ from dotenv import load_dotenv  # For loading environment variables
 from langchain_core.messages import BaseMessage, HumanMessage  # Message types for LLM interaction
 from langgraph.graph import END, MessageGraph  # Core components for building the graph
 from chains import generation_chain, reflection_chain  # Custom chain implementations
+from history import FULL, apply_history_policy, count_tokens  # History windowing
 
 # Load environment variables (API keys, etc.)
 load_dotenv()
@@ -12,6 +13,38 @@ load_dotenv()
 REFLECT = "reflect"  # Node for reflection operations
 GENERATE = "generate"  # Node for generation operations
 
+# Configure how much of the conversation is sent to the chains on each round
+# FULL sends everything (original behaviour); history.LAST_N ("last_n"), history.SUMMARY ("summary")
+# and history.TOKEN_BUDGET ("token_budget") keep prompts small
+HISTORY_POLICY = FULL
+HISTORY_LAST_N = 2  # Drafts kept by the LAST_N and SUMMARY policies (at least 1)
+HISTORY_MAX_TOKENS = 2000  # Token budget of the TOKEN_BUDGET policy
+
+# Per-round prompt sizes, so the savings of a history policy can be inspected
+# (batch_runner.py turns this off: a long batch would grow the log without bound)
+LOG_PROMPT_SIZES = True
+prompt_token_log = []
+
+def windowed_history(node, messages):
+    """
+    Apply the configured history policy and record the prompt size
+    Args:
+        node: Name of the node sending the prompt
+        messages: Full conversation state
+    Returns:
+        The messages to send to the chain
+    """
+    window = apply_history_policy(messages, HISTORY_POLICY, last_n=HISTORY_LAST_N, max_tokens=HISTORY_MAX_TOKENS)
+    if not LOG_PROMPT_SIZES:
+        return window
+    prompt_token_log.append({
+        "node": node,
+        "messages": len(window),
+        "prompt_tokens": count_tokens(window),
+        "full_history_tokens": count_tokens(messages),
+    })
+    return window
+
 # Initialize the message processing graph
 graph = MessageGraph()
 
@@ -24,7 +57,7 @@ def generate_node(state):
         Generated response from the LLM
     """
     return generation_chain.invoke({
-        "messages": state
+        "messages": windowed_history(GENERATE, state)
     })
 
 def reflect_node(messages):
@@ -36,7 +69,7 @@ def reflect_node(messages):
         List containing a single HumanMessage with reflection content
     """
     response = reflection_chain.invoke({
-        "messages": messages
+        "messages": windowed_history(REFLECT, messages)
     })
     return [HumanMessage(content=response.content)]
 
@@ -68,13 +101,18 @@ graph.add_edge(REFLECT, GENERATE)
 # Compile the graph into an executable application
 app = graph.compile()
 
-# Visualize the graph structure
-print(app.get_graph().draw_mermaid())  # Generate Mermaid diagram
-app.get_graph().print_ascii()  # Print ASCII representation
+if __name__ == "__main__":
+    # Visualize the graph structure
+    print(app.get_graph().draw_mermaid())  # Generate Mermaid diagram
+    app.get_graph().print_ascii()  # Print ASCII representation
 
-# Run the graph with an initial prompt
-response = app.invoke(HumanMessage(content="AI Agents taking over content creation"))
+    # Run the graph with an initial prompt
+    response = app.invoke(HumanMessage(content="AI Agents taking over content creation"))
 
-# Print the final response
-print(response)
+    # Print the final response
+    print(response)
 
+    # Print the prompt size of every round
+    for entry in prompt_token_log:
+        print(f"{entry['node']}: {entry['messages']} messages, {entry['prompt_tokens']} prompt tokens "
+              f"(full history: {entry['full_history_tokens']})")
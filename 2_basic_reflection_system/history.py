@@ -0,0 +1,107 @@
+# Import required libraries
+from functools import lru_cache  # Caches one tokenizer per model
+from typing import List, Optional, Sequence  # Type hints
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage  # Message types for LLM interaction
+
+# Names of the available history policies
+FULL = "full"  # Send the whole conversation (original behaviour)
+LAST_N = "last_n"  # Keep the request plus the last N drafts and their critiques
+SUMMARY = "summary"  # Like LAST_N, but older draft/critique pairs are replaced by a compact summary
+TOKEN_BUDGET = "token_budget"  # Drop the oldest rounds until the prompt fits a token budget
+
+# Load the tokenizer of a model once; None means it could not be loaded
+@lru_cache(maxsize=None)
+def _encoding_for(model: str):
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        return None
+
+def count_tokens(messages: Sequence[BaseMessage], model: str = "gpt-4o") -> int:
+    """
+    Count the tokens of a list of messages with a local tokenizer
+    Args:
+        messages: Messages to count
+        model: Model whose tokenizer should be used
+    Returns:
+        Number of tokens (estimated as characters / 4 if tiktoken or its encoding files are unavailable)
+    """
+    encoding = _encoding_for(model)
+    text = "\n".join(str(message.content) for message in messages)
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text))
+
+def _split_rounds(messages: Sequence[BaseMessage]):
+    """
+    Split the conversation into the initial request and rounds of messages
+    Args:
+        messages: Full conversation, starting with the user's request
+    Returns:
+        The request message and a list of rounds, each starting with a draft (AIMessage)
+    """
+    request, rounds = messages[0], []
+    for message in messages[1:]:
+        if isinstance(message, AIMessage) or not rounds:
+            rounds.append([message])
+        else:
+            rounds[-1].append(message)
+    return request, rounds
+
+def _summarize(rounds: List[List[BaseMessage]], max_chars: int) -> HumanMessage:
+    """
+    Build a compact, model-free summary of older draft/critique rounds
+    Args:
+        rounds: Rounds to summarize
+        max_chars: Maximum characters kept per draft and per critique
+    Returns:
+        A single HumanMessage describing the earlier rounds
+    """
+    lines = ["Summary of earlier drafts and critiques:"]
+    for number, round_messages in enumerate(rounds, start=1):
+        for message in round_messages:
+            kind = "Draft" if isinstance(message, AIMessage) else "Critique"
+            text = " ".join(str(message.content).split())
+            if len(text) > max_chars:
+                text = text[:max_chars].rstrip() + "..."
+            lines.append(f"- Round {number} {kind}: {text}")
+    return HumanMessage(content="\n".join(lines))
+
+def apply_history_policy(messages: Sequence[BaseMessage], policy: str = FULL, last_n: int = 2,
+                         max_tokens: Optional[int] = None, summary_chars: int = 200) -> List[BaseMessage]:
+    """
+    Select the part of the conversation that is sent to a chain
+    Args:
+        messages: Full conversation, starting with the user's request
+        policy: One of FULL, LAST_N, SUMMARY or TOKEN_BUDGET
+        last_n: Number of most recent drafts kept by LAST_N and SUMMARY (at least 1)
+        max_tokens: Token budget used by TOKEN_BUDGET
+        summary_chars: Characters kept per message in the SUMMARY policy
+    Returns:
+        The messages to send; the request and the latest round are always kept
+    """
+    if policy in (LAST_N, SUMMARY) and last_n < 1:
+        raise ValueError(f"The {policy} policy requires last_n >= 1, got {last_n}")
+    messages = list(messages)
+    if policy == FULL or len(messages) <= 2:
+        return messages
+
+    request, rounds = _split_rounds(messages)
+    if policy == LAST_N:
+        return [request] + [m for r in rounds[-last_n:] for m in r]
+    if policy == SUMMARY:
+        older, recent = rounds[:-last_n], rounds[-last_n:]
+        summary = [_summarize(older, summary_chars)] if older else []
+        return [request] + summary + [m for r in recent for m in r]
+    if policy == TOKEN_BUDGET:
+        if max_tokens is None:
+            raise ValueError("The token_budget policy requires max_tokens")
+        kept = rounds[-1:]
+        for round_messages in reversed(rounds[:-1]):  # Add older rounds while they fit the budget
+            candidate = [request] + round_messages + [m for r in kept for m in r]
+            if count_tokens(candidate) > max_tokens:
+                break
+            kept.insert(0, round_messages)
+        return [request] + [m for r in kept for m in r]
+    raise ValueError(f"Unknown history policy: {policy}")
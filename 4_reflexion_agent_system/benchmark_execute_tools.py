@@ -0,0 +1,108 @@
+# Benchmark for the execute_tools node using a local fake search tool
+# No network calls are made: every search simply sleeps for a fixed latency
+import asyncio
+import os
+import time
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import BaseTool
+
+# execute_tools creates a Tavily tool at import time, which requires an API key to be set
+# The benchmark never calls Tavily, so any placeholder value works
+os.environ.setdefault("TAVILY_API_KEY", "unused-by-benchmark")
+
+from execute_tools import execute_tools
+
+SEARCH_LATENCY = 0.5  # Seconds each fake search takes
+RUNS = 3  # Number of timed execute_tools calls per scenario
+
+# Define a fake search tool with injected latency
+class FakeSearchTool(BaseTool):
+    name: str = "fake_search"
+    description: str = "Returns canned search results after a fixed delay."
+    latency: float = SEARCH_LATENCY
+    calls: int = 0  # Number of searches actually executed
+
+    def _run(self, query: str):
+        self.calls += 1
+        time.sleep(self.latency)
+        return [{"url": "https://example.com", "content": f"Result for {query}"}]
+
+    async def _arun(self, query: str):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return [{"url": "https://example.com", "content": f"Result for {query}"}]
+
+# Function to build a conversation state whose last AI message carries the given tool calls
+def make_state(*query_lists):
+    """
+    Builds a test state with one AnswerQuestion tool call per list of queries.
+
+    Args:
+        *query_lists: One list of search queries per tool call.
+
+    Returns:
+        List of messages ending with an AIMessage holding the tool calls.
+    """
+    tool_calls = [
+        {
+            "name": "AnswerQuestion",
+            "args": {"answer": "", "search_queries": queries, "reflection": {"missing": "", "superfluous": ""}},
+            "id": f"call_{index}",
+        }
+        for index, queries in enumerate(query_lists)
+    ]
+    return [
+        HumanMessage(content="Write about how small business can leverage AI to grow"),
+        AIMessage(content="", tool_calls=tool_calls),
+    ]
+
+# Scenarios to benchmark: a single tool call, and two tool calls sharing queries
+SCENARIOS = {
+    "1 call x 3 queries": make_state(
+        ["AI tools for small business", "AI in small business marketing", "AI automation for small business"],
+    ),
+    "2 calls x 3 queries (2 duplicates)": make_state(
+        ["AI tools for small business", "AI in small business marketing", "AI automation for small business"],
+        ["ai tools for small business?", "AI in small  business marketing", "AI chatbots for customer support"],
+    ),
+}
+
+# Function to time execute_tools on a state
+def benchmark(state, **kwargs):
+    """
+    Times execute_tools on a state.
+
+    Args:
+        state: Conversation state passed to execute_tools.
+        **kwargs: Extra arguments passed to execute_tools.
+
+    Returns:
+        A tuple of (average seconds per call, searches executed per call).
+    """
+    search_tool = FakeSearchTool()
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        execute_tools(state, search_tool=search_tool, **kwargs)
+    elapsed = time.perf_counter() - start
+    return elapsed / RUNS, search_tool.calls / RUNS
+
+if __name__ == "__main__":
+    print(f"Fake search latency: {SEARCH_LATENCY}s, {RUNS} runs per scenario\n")
+    print(f"{'scenario':<38}{'mode':<14}{'seconds/call':>14}{'searches/call':>15}")
+    for name, state in SCENARIOS.items():
+        for mode, kwargs in [("sequential", {"concurrent": False}), ("concurrent", {"concurrent": True})]:
+            seconds, searches = benchmark(state, **kwargs)
+            print(f"{name:<38}{mode:<14}{seconds:>14.3f}{searches:>15.1f}")
+
+    # A revision step whose queries were already searched in the previous iteration
+    first_state = SCENARIOS["1 call x 3 queries"]
+    revision_state = first_state + execute_tools(first_state, search_tool=FakeSearchTool()) + [
+        AIMessage(content="", tool_calls=[{
+            "name": "ReviseAnswer",
+            "args": {"answer": "", "search_queries": ["AI tools for small business", "AI for small business bookkeeping"],
+                     "reflection": {"missing": "", "superfluous": ""}, "references": []},
+            "id": "call_revise",
+        }])
+    ]
+    seconds, searches = benchmark(revision_state)
+    print(f"{'revision reusing 1 of 2 queries':<38}{'concurrent':<14}{seconds:>14.3f}{searches:>15.1f}")
@@ -1,54 +1,173 @@
 # Import necessary libraries for handling messages and executing tools
+import asyncio
 import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 from langchain_core.messages import AIMessage, BaseMessage, ToolMessage, HumanMessage
 from langchain_community.tools import TavilySearchResults
+# search_cache.py is shared by the lessons and lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from search_cache import CachedSearchTool, normalize_query
 
 # Create the Tavily search tool
 # This tool is used to perform web searches and retrieve results
 # max_results specifies the maximum number of search results to return
-tavily_tool = TavilySearchResults(max_results=5)
+# The tool is wrapped in a persistent cache so repeated queries skip the network
+tavily_tool = CachedSearchTool(TavilySearchResults(max_results=5))
+
+# Settings for the concurrent search fan-out
+MAX_CONCURRENCY = 5  # Maximum number of searches in flight at the same time
+QUERY_TIMEOUT = 15.0  # Seconds to wait for a single search before giving up on it
+SEARCH_ERROR = "Search error: "  # Prefix of results for searches that failed or timed out
+
+# Function to collect the results of searches already executed in earlier iterations
+def previous_results(state: List[BaseMessage]) -> Dict[str, Any]:
+    """
+    Collects search results stored in earlier ToolMessages of the conversation.
+
+    Args:
+        state: List of messages representing the current conversation state.
+
+    Returns:
+        A dictionary mapping normalized queries to their search results.
+    """
+    known_results = {}
+    for message in state:
+        if not isinstance(message, ToolMessage):
+            continue
+        try:
+            query_results = json.loads(message.content)
+        except (TypeError, ValueError):
+            continue  # Not a message written by execute_tools
+        if isinstance(query_results, dict):
+            for query, result in query_results.items():
+                # Failed searches are not reused so that they get retried
+                if not (isinstance(result, str) and result.startswith(SEARCH_ERROR)):
+                    known_results[normalize_query(query)] = result
+    return known_results
+
+# Coroutine that runs all search queries at once with bounded concurrency
+async def search_all(queries: List[str], search_tool=None, max_concurrency: int = MAX_CONCURRENCY,
+                     query_timeout: float = QUERY_TIMEOUT) -> Dict[str, Any]:
+    """
+    Runs search queries concurrently.
+
+    Args:
+        queries: Unique search queries to execute.
+        search_tool: Tool used to run the searches (defaults to the Tavily tool).
+        max_concurrency: Maximum number of searches running at the same time.
+        query_timeout: Seconds to wait for a single search before giving up on it.
+
+    Returns:
+        A dictionary mapping each query to its search result (or an error description).
+    """
+    search_tool = search_tool or tavily_tool
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def search(query: str):
+        async with semaphore:  # Wait for a free slot before starting the search
+            try:
+                return await asyncio.wait_for(search_tool.ainvoke(query), timeout=query_timeout)
+            except asyncio.TimeoutError:
+                return f"{SEARCH_ERROR}timed out after {query_timeout} seconds"
+            except Exception as error:
+                return f"{SEARCH_ERROR}{error}"
+
+    results = await asyncio.gather(*(search(query) for query in queries))
+    return dict(zip(queries, results))
+
+# Function to run the search_all coroutine from synchronous code
+def run_search_all(queries: List[str], **kwargs) -> Dict[str, Any]:
+    """
+    Runs search_all from synchronous code, including from inside a running event loop (e.g. Jupyter).
+
+    Args:
+        queries: Unique search queries to execute.
+        **kwargs: Extra arguments passed to search_all.
+
+    Returns:
+        A dictionary mapping each query to its search result.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(search_all(queries, **kwargs))  # No loop running in this thread
+    # A loop is already running here, so run the searches on a helper thread with its own loop
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, search_all(queries, **kwargs)).result()
 
 # Function to execute search queries from AnswerQuestion tool calls
-def execute_tools(state: List[BaseMessage]) -> List[BaseMessage]:
+def execute_tools(state: List[BaseMessage], search_tool=None, concurrent: bool = True,
+                  max_concurrency: int = MAX_CONCURRENCY, query_timeout: float = QUERY_TIMEOUT) -> List[BaseMessage]:
     """
     Executes search queries extracted from tool calls in the AI message.
 
+    The queries of all tool calls are deduplicated (also against searches already
+    made in earlier iterations) and fanned out concurrently, then regrouped into
+    one ToolMessage per tool call in the original order.
+
     Args:
         state: List of messages representing the current conversation state.
+        search_tool: Tool used to run the searches (defaults to the Tavily tool).
+        concurrent: Run the searches concurrently (True) or one after another (False); failures and
+            timeouts become error results in both modes.
+        max_concurrency: Maximum number of searches running at the same time.
+        query_timeout: Seconds to wait for a single search before giving up on it.
 
     Returns:
         List of ToolMessage objects containing the search results.
     """
+    search_tool = search_tool or tavily_tool
+
     # Get the last AI message from the conversation state
     last_ai_message: AIMessage = state[-1]
     
     # Check if the AI message contains tool calls
     if not hasattr(last_ai_message, "tool_calls") or not last_ai_message.tool_calls:
         return []
-    
+
+    # Keep only the tool calls that carry search queries
+    search_calls = [
+        tool_call for tool_call in last_ai_message.tool_calls
+        if tool_call["name"] in ["AnswerQuestion", "ReviseAnswer"]
+    ]
+
+    # Reuse results of queries searched in earlier iterations
+    results = previous_results(state[:-1])
+
+    # Collect the unique queries that still have to be searched
+    pending = {}
+    for tool_call in search_calls:
+        for query in tool_call["args"].get("search_queries", []):
+            key = normalize_query(query)
+            if key not in results and key not in pending:
+                pending[key] = query
+
+    # Execute the pending searches, either all at once or one after another (one slot); both modes
+    # apply the per-query timeout and turn a failed search into an error result instead of raising
+    searched = run_search_all(list(pending.values()), search_tool=search_tool,
+                              max_concurrency=max_concurrency if concurrent else 1, query_timeout=query_timeout)
+    for key, query in pending.items():
+        results[key] = searched[query]
+
     # Initialize a list to store tool messages
     tool_messages = []
     
-    # Process each tool call in the AI message
-    for tool_call in last_ai_message.tool_calls:
-        if tool_call["name"] in ["AnswerQuestion", "ReviseAnswer"]:
-            call_id = tool_call["id"]  # Extract the tool call ID
-            search_queries = tool_call["args"].get("search_queries", [])  # Extract search queries
-            
-            # Execute each search query using the Tavily tool
-            query_results = {}
-            for query in search_queries:
-                result = tavily_tool.invoke(query)  # Perform the search
-                query_results[query] = result  # Store the results
-            
-            # Create a ToolMessage with the search results
-            tool_messages.append(
-                ToolMessage(
-                    content=json.dumps(query_results),  # Serialize results as JSON
-                    tool_call_id=call_id  # Associate the results with the tool call ID
-                )
+    # Create one ToolMessage per tool call, in the original order
+    for tool_call in search_calls:
+        call_id = tool_call["id"]  # Extract the tool call ID
+        search_queries = tool_call["args"].get("search_queries", [])  # Extract search queries
+        query_results = {query: results[normalize_query(query)] for query in search_queries}
+
+        # Create a ToolMessage with the search results
+        tool_messages.append(
+            ToolMessage(
+                content=json.dumps(query_results),  # Serialize results as JSON
+                tool_call_id=call_id  # Associate the results with the tool call ID
             )
+        )
     
     return tool_messages  # Return the list of ToolMessage objects
 
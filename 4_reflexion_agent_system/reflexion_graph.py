@@ -1,20 +1,97 @@
 # Import necessary libraries for building the graph and handling messages
-from typing import List
-from langchain_core.messages import BaseMessage, ToolMessage
-from langgraph.graph import END, MessageGraph
+import difflib
+import operator
+import os
+import sys
+from typing import Annotated, List, Optional, TypedDict
+from langchain_core.messages import BaseMessage
+from langgraph.graph import END, StateGraph, add_messages
 from chains import revisor_chain, first_responder_chain
 from execute_tools import execute_tools
+# search_cache.py is shared by the lessons and lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from search_cache import normalize_query
 
-# Initialize the message processing graph
-# This graph orchestrates the flow of the reflexion agent system
-graph = MessageGraph()
 MAX_ITERATIONS = 2  # Define the maximum number of iterations for the event loop
 
+# Optional early stop once the answer stops improving; both are off, so the loop runs MAX_ITERATIONS rounds
+CONVERGENCE_THRESHOLD: Optional[float] = None  # Stop when the revised answer is at least this similar to the previous one, e.g. 0.95 (None disables the check)
+STOP_ON_NO_NEW_QUERIES = False  # Stop when the revisor proposes no query that was not already searched (including no queries at all)
+
+# Define the state of the reflexion graph
+# Besides the messages, the loop bookkeeping is kept in explicit fields so it never has to be recomputed
+class ReflexionState(TypedDict):
+    messages: Annotated[List[BaseMessage], add_messages]  # The conversation, as in the original message graph
+    iterations: int  # Number of execute_tools rounds run so far
+    previous_answer: str  # Answer produced by the draft or the previous revision
+    searched_queries: Annotated[List[str], operator.add]  # Normalized queries already searched
+    stop_reason: Optional[str]  # Why the loop stopped early, if it did
+
+# Function to compare two answers
+def answer_similarity(previous: str, current: str) -> float:
+    """
+    Measures how similar two answers are, based on their edit distance.
+
+    An embedding-based cosine similarity can be swapped in here for a semantic comparison.
+
+    Args:
+        previous: The answer before the revision.
+        current: The revised answer.
+
+    Returns:
+        A similarity between 0.0 (completely different) and 1.0 (identical).
+    """
+    return difflib.SequenceMatcher(None, previous, current).ratio()
+
+# Node that generates the initial draft
+def draft_node(state: ReflexionState):
+    response = first_responder_chain.invoke({"messages": state["messages"]})
+    return {
+        "messages": [response],
+        "iterations": 0,
+        "previous_answer": response.tool_calls[0]["args"].get("answer", "") if response.tool_calls else "",
+        "stop_reason": None,
+    }
+
+# Node that executes the search queries of the last AI message
+def execute_tools_node(state: ReflexionState):
+    last_message = state["messages"][-1]
+    queries = [
+        normalize_query(query)
+        for tool_call in getattr(last_message, "tool_calls", [])
+        for query in tool_call["args"].get("search_queries", [])
+    ]
+    return {
+        "messages": execute_tools(state["messages"]),
+        "iterations": state["iterations"] + 1,
+        "searched_queries": queries,
+    }
+
+# Node that revises the answer and checks whether the loop has converged
+def revisor_node(state: ReflexionState):
+    response = revisor_chain.invoke({"messages": state["messages"]})
+    args = response.tool_calls[0]["args"] if response.tool_calls else {}
+    answer = args.get("answer", "")
+
+    stop_reason = None
+    if CONVERGENCE_THRESHOLD is not None and answer_similarity(state["previous_answer"], answer) >= CONVERGENCE_THRESHOLD:
+        stop_reason = "answer converged"
+    elif STOP_ON_NO_NEW_QUERIES:
+        searched = set(state["searched_queries"])
+        if all(normalize_query(query) in searched for query in args.get("search_queries", [])):
+            stop_reason = "no new search queries"
+
+    return {"messages": [response], "previous_answer": answer, "stop_reason": stop_reason}
+
+# Initialize the state graph
+# This graph orchestrates the flow of the reflexion agent system
+graph = StateGraph(ReflexionState)
+
 # Add nodes to the graph
 # Each node represents a step in the reflexion process
-graph.add_node("draft", first_responder_chain)  # Node for generating the initial draft
-graph.add_node("execute_tools", execute_tools)  # Node for executing search queries
-graph.add_node("revisor", revisor_chain)  # Node for revising the draft
+graph.add_node("draft", draft_node)  # Node for generating the initial draft
+graph.add_node("execute_tools", execute_tools_node)  # Node for executing search queries
+graph.add_node("revisor", revisor_node)  # Node for revising the draft
 
 # Define the edges between nodes
 # These edges represent the flow of data between steps
@@ -23,22 +100,35 @@ graph.add_edge("execute_tools", "revisor")  # Execute Tools -> Revisor
 
 # Define the event loop logic
 # This function determines whether to continue or end the process based on the number of iterations
-def event_loop(state: List[BaseMessage]) -> str:
+def event_loop(state: ReflexionState) -> str:
     """
     Event loop logic to control the flow of the graph.
 
     Args:
-        state: List of messages representing the current conversation state.
+        state: The current state of the reflexion graph.
 
     Returns:
         The next node to visit or END to terminate the process.
     """
-    count_tool_visits = sum(isinstance(item, ToolMessage) for item in state)  # Count tool messages
-    num_iterations = count_tool_visits  # Number of iterations is equal to tool visits
-    if num_iterations > MAX_ITERATIONS:  # Terminate if iterations exceed the maximum
+    if state["stop_reason"]:  # Terminate early if the revisor detected convergence
+        return END
+    if state["iterations"] > MAX_ITERATIONS:  # Terminate if iterations exceed the maximum
         return END
     return "execute_tools"  # Continue to the execute_tools node
 
+# Function to report how many rounds an early stop saved
+def rounds_saved(state: ReflexionState) -> int:
+    """
+    Counts the search + revision rounds skipped compared to running all iterations.
+
+    Args:
+        state: The final state of a reflexion run.
+
+    Returns:
+        The number of rounds saved by stopping early.
+    """
+    return MAX_ITERATIONS + 1 - state["iterations"]
+
 # Add conditional edges to the graph
 # The revisor node conditionally transitions to execute_tools or ends the process
 graph.add_conditional_edges("revisor", event_loop)
@@ -50,16 +140,18 @@ graph.set_entry_point("draft")
 # Compile the graph into an executable application
 app = graph.compile()
 
-# Visualize the graph structure
-# Generate a Mermaid diagram and print an ASCII representation
-print(app.get_graph().draw_mermaid())
+if __name__ == "__main__":
+    # Visualize the graph structure
+    # Generate a Mermaid diagram and print an ASCII representation
+    print(app.get_graph().draw_mermaid())
 
-# Run the graph with an initial prompt
-# This invokes the reflexion process with a user-provided question
-response = app.invoke(
-    "Write about how small business can leverage AI to grow"
-)
+    # Run the graph with an initial prompt
+    # This invokes the reflexion process with a user-provided question
+    response = app.invoke({
+        "messages": ["Write about how small business can leverage AI to grow"]
+    })
 
-# Print the final answer and the entire response
-print(response[-1].tool_calls[0]["args"]["answer"])  # Print the final answer
-print(response, "response")  # Print the entire response
\ No newline at end of file
+    # Print the final answer and the entire response
+    print(response["messages"][-1].tool_calls[0]["args"]["answer"])  # Print the final answer
+    print(f"Rounds run: {response['iterations']}, rounds saved: {rounds_saved(response)} ({response['stop_reason'] or 'max iterations reached'})")
+    print(response, "response")  # Print the entire response
@@ -0,0 +1,149 @@
+# Import necessary libraries
+import threading  # For guarding the shared buffers
+from array import array  # For compact numeric storage
+from collections.abc import Sequence  # Base class providing the read-only list interface
+from itertools import islice  # For iterating over the visible part of a buffer
+
+# Appends from different threads to the same buffer must not interleave
+_lock = threading.Lock()
+
+# Define an append-only log that shares one growing buffer between all of its versions
+# Each version is a (buffer, length) view, so appending never copies the existing items
+# and older versions (e.g. values captured by a checkpoint) keep seeing exactly their own items
+class AppendLog(Sequence):
+    __slots__ = ("_buffer", "_length")
+
+    def __init__(self, items=()):
+        self._buffer = self._new_buffer(items)
+        self._length = len(self._buffer)
+
+    def _new_buffer(self, items):
+        """
+        Create the storage for a new buffer.
+
+        Args:
+            items: The initial items.
+
+        Returns:
+            A list holding the items.
+        """
+        return list(items)
+
+    def _view(self, buffer, length):
+        # Create another version over a buffer without copying it
+        log = object.__new__(type(self))
+        log._buffer = buffer
+        log._length = length
+        return log
+
+    def appended(self, items) -> "AppendLog":
+        """
+        Return a new version of the log with the items appended.
+
+        This version is left unchanged. Appending to the newest version costs only the
+        new items; appending to an older version (a branch) copies its items once.
+
+        Args:
+            items: The items to append.
+
+        Returns:
+            The new version of the log.
+        """
+        with _lock:
+            if len(self._buffer) == self._length:  # This is the newest version: grow the buffer in place
+                buffer = self._buffer
+            else:  # A newer version already extended the buffer: branch off a copy
+                buffer = self._new_buffer(self._buffer[:self._length])
+            buffer.extend(items)
+            return self._view(buffer, len(buffer))
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._buffer[:self._length][index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("log index out of range")
+        return self._buffer[index]
+
+    def __iter__(self):
+        return islice(self._buffer, self._length)
+
+    def __eq__(self, other):
+        if isinstance(other, (Sequence, array)) and not isinstance(other, (str, bytes)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
+
+    # Checkpoint serializers store objects with an _asdict method as constructor keyword arguments,
+    # so a restored checkpoint gets back a log of the same type holding the same items
+    def _asdict(self):
+        return {"items": list(self)}
+
+# Define an append-only log of numbers stored in a compact array instead of a list of Python objects
+class NumericLog(AppendLog):
+    __slots__ = ("typecode",)
+
+    def __init__(self, items=(), typecode: str = "q"):
+        self.typecode = typecode  # "q" for 64-bit integers, "d" for floats
+        super().__init__(items)
+
+    def _new_buffer(self, items):
+        return array(self.typecode, items)
+
+    def _view(self, buffer, length):
+        log = super()._view(buffer, length)
+        log.typecode = self.typecode
+        return log
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._buffer[:self._length][index])
+        return super().__getitem__(index)
+
+    def _asdict(self):
+        return {"items": list(self), "typecode": self.typecode}
+
+# Reducer that appends updates to an AppendLog
+# Drop-in replacement for operator.concat / operator.add on list fields, e.g.
+#     history: Annotated[List[int], append_log]
+def append_log(current, update):
+    """
+    Append the update to the current log.
+
+    Args:
+        current: The current value of the channel (an AppendLog, or a plain list initially).
+        update: The list of new items returned by a node.
+
+    Returns:
+        The new version of the log.
+    """
+    if not isinstance(current, AppendLog):
+        current = AppendLog(current or ())
+    return current.appended(update)
+
+# Function to create a reducer that appends updates to a NumericLog with the given typecode
+def numeric_log(typecode: str = "q"):
+    """
+    Create a reducer for an array-backed numeric log.
+
+    Args:
+        typecode: The array typecode of the items ("q" for integers, "d" for floats).
+
+    Returns:
+        A reducer usable as e.g. Annotated[List[int], numeric_log("q")].
+    """
+    def reducer(current, update):
+        if not isinstance(current, NumericLog) or current.typecode != typecode:
+            current = NumericLog(current or (), typecode=typecode)
+        return current.appended(update)
+    return reducer
+
+# Ready-made numeric reducers
+int_log = numeric_log("q")
+float_log = numeric_log("d")
@@ -0,0 +1,200 @@
+# Graph-engine overhead benchmark suite built on the increment graphs of this lesson
+#
+# The nodes are pure Python and do almost no work, so the measurements isolate the cost of the
+# LangGraph runtime itself: per-superstep latency, memory allocated while running and peak RSS.
+#
+# Usage:
+#   python benchmark_engine.py                                   # default matrix, results in benchmark_engine.json
+#   python benchmark_engine.py --steps 1000 --widths 1 20 --reducers add append_log --checkpointers none sqlite
+#   python benchmark_engine.py --baseline old.json               # also compare against a previous run
+import argparse  # For the command-line interface
+import json  # For the machine-readable results
+import operator  # For the built-in reducers
+import os  # For temporary files
+import platform  # For recording the environment
+import sqlite3  # For the SQLite checkpointer
+import statistics  # For latency percentiles
+import subprocess  # For running each configuration in a fresh process
+import sys  # For re-invoking this script
+import tempfile  # For the SQLite database file
+import time  # For measuring latency
+import tracemalloc  # For measuring allocations
+from typing import Annotated, TypedDict  # For defining structured state types
+from importlib.metadata import version  # For recording the langgraph version under test
+from langgraph.checkpoint.memory import MemorySaver  # In-memory checkpointer
+from langgraph.checkpoint.sqlite import SqliteSaver  # SQLite checkpointer
+from langgraph.graph import END, StateGraph  # For creating and managing state graphs
+from append_log import append_log  # Append-efficient list reducer
+
+# Reducers used for the extra state channels
+REDUCERS = {
+    "overwrite": None,  # Plain channel, the last value wins
+    "add": operator.add,  # Integer sum, as for `sum` in 2_complex_state.py
+    "concat": operator.concat,  # List concatenation, as for `history` in 2_complex_state.py
+    "append_log": append_log,  # Append-efficient list log
+}
+CHECKPOINTERS = ["none", "memory", "sqlite"]
+
+# Function to build an increment graph with a configurable number of channels
+def build_graph(steps: int, width: int, reducer: str, checkpointer):
+    """
+    Build the increment graph with `width` channels: `count` plus `width - 1` extra channels.
+
+    Args:
+        steps: Number of increments before stopping.
+        width: Total number of state channels.
+        reducer: Name of the reducer used for the extra channels (see REDUCERS).
+        checkpointer: Checkpointer to compile the graph with, or None.
+
+    Returns:
+        The compiled graph and its initial state.
+    """
+    is_list = reducer in ("concat", "append_log")
+    field_type = list if is_list else int
+    if REDUCERS[reducer] is not None:
+        field_type = Annotated[field_type, REDUCERS[reducer]]
+    fields = {"count": int, **{f"channel_{i}": field_type for i in range(1, width)}}
+    BenchmarkState = TypedDict("BenchmarkState", fields)
+
+    def increment(state):
+        new_count = state["count"] + 1
+        update = [new_count] if is_list else new_count
+        return {"count": new_count, **{f"channel_{i}": update for i in range(1, width)}}
+
+    def should_continue(state):
+        return "continue" if state["count"] < steps else "stop"
+
+    graph = StateGraph(BenchmarkState)
+    graph.add_node("increment", increment)
+    graph.set_entry_point("increment")
+    graph.add_conditional_edges("increment", should_continue, {"continue": "increment", "stop": END})
+    initial_state = {"count": 0, **{f"channel_{i}": [] if is_list else 0 for i in range(1, width)}}
+    return graph.compile(checkpointer=checkpointer), initial_state
+
+# Function to create a fresh checkpointer
+def make_checkpointer(name: str, directory: str):
+    if name == "memory":
+        return MemorySaver()
+    if name == "sqlite":
+        connection = sqlite3.connect(os.path.join(directory, "checkpoint.sqlite"), check_same_thread=False)
+        return SqliteSaver(connection)
+    return None
+
+# Function to measure one configuration (run in its own process so peak RSS is not shared)
+def measure(steps: int, width: int, reducer: str, checkpointer: str) -> dict:
+    """
+    Run one configuration twice: once for latency and once under tracemalloc for allocations.
+
+    Args:
+        steps: Number of supersteps.
+        width: Number of state channels.
+        reducer: Name of the reducer of the extra channels.
+        checkpointer: "none", "memory" or "sqlite".
+
+    Returns:
+        A dictionary of measurements.
+    """
+    result = {"steps": steps, "width": width, "reducer": reducer, "checkpointer": checkpointer}
+    with tempfile.TemporaryDirectory() as directory:
+        # Timed run: stream the updates so every superstep can be timed individually
+        app, initial_state = build_graph(steps, width, reducer, make_checkpointer(checkpointer, directory))
+        config = {"recursion_limit": steps + 10, "configurable": {"thread_id": "timed"}}
+        step_latencies = []
+        start = last = time.perf_counter()
+        for _ in app.stream(initial_state, config, stream_mode="updates"):
+            now = time.perf_counter()
+            step_latencies.append(now - last)
+            last = now
+        total = time.perf_counter() - start
+
+        # Traced run: the same work under tracemalloc, which slows it down too much to time
+        app, initial_state = build_graph(steps, width, reducer, make_checkpointer(checkpointer, directory))
+        config["configurable"]["thread_id"] = "traced"
+        tracemalloc.start()
+        app.invoke(initial_state, config)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    quantiles = statistics.quantiles(step_latencies, n=100) if len(step_latencies) > 1 else step_latencies * 99
+    result.update({
+        "total_seconds": total,
+        "mean_step_us": total / steps * 1e6,
+        "p50_step_us": quantiles[49] * 1e6,
+        "p95_step_us": quantiles[94] * 1e6,
+        "p99_step_us": quantiles[98] * 1e6,
+        "traced_peak_bytes": peak,
+        "traced_retained_bytes": retained,
+        "peak_rss_bytes": peak_rss(),
+    })
+    return result
+
+# Function to read the peak resident set size of this process
+def peak_rss() -> int:
+    try:
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024  # macOS reports bytes, Linux kilobytes
+    except ImportError:  # Windows
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+
+# Function to print a comparison against a previous results file
+def compare(results: list, baseline_path: str):
+    with open(baseline_path) as file:
+        baseline = {
+            (r["steps"], r["width"], r["reducer"], r["checkpointer"]): r for r in json.load(file)["results"]
+        }
+    print(f"\nComparison with {baseline_path} (mean step latency, new / old):")
+    for r in results:
+        old = baseline.get((r["steps"], r["width"], r["reducer"], r["checkpointer"]))
+        if old:
+            ratio = r["mean_step_us"] / old["mean_step_us"]
+            flag = "  <-- slower" if ratio > 1.1 else ""
+            print(f"  steps={r['steps']:<6} width={r['width']:<4} {r['reducer']:<11} {r['checkpointer']:<7} {ratio:6.2f}x{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure LangGraph runtime overhead on the increment graph.")
+    parser.add_argument("--steps", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--widths", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--reducers", nargs="+", choices=sorted(REDUCERS), default=list(REDUCERS))
+    parser.add_argument("--checkpointers", nargs="+", choices=CHECKPOINTERS, default=CHECKPOINTERS)
+    parser.add_argument("--output", default="benchmark_engine.json")
+    parser.add_argument("--baseline", help="Previous results file to compare against")
+    parser.add_argument("--single", help=argparse.SUPPRESS)  # Internal: measure one JSON-encoded configuration
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(measure(**json.loads(args.single))))
+        return
+
+    results = []
+    print(f"{'steps':>6} {'width':>5}  {'reducer':<11}{'checkpointer':<13}{'mean us':>9}{'p95 us':>9}{'traced MiB':>11}{'RSS MiB':>9}")
+    for steps in args.steps:
+        for width in args.widths:
+            for reducer in args.reducers:
+                for checkpointer in args.checkpointers:
+                    configuration = {"steps": steps, "width": width, "reducer": reducer, "checkpointer": checkpointer}
+                    output = subprocess.run(
+                        [sys.executable, __file__, "--single", json.dumps(configuration)],
+                        capture_output=True, text=True, check=True,
+                    ).stdout
+                    r = json.loads(output.strip().splitlines()[-1])
+                    results.append(r)
+                    print(f"{steps:>6} {width:>5}  {reducer:<11}{checkpointer:<13}{r['mean_step_us']:>9.1f}"
+                          f"{r['p95_step_us']:>9.1f}{r['traced_peak_bytes'] / 2**20:>11.2f}{r['peak_rss_bytes'] / 2**20:>9.1f}")
+
+    with open(args.output, "w") as file:
+        json.dump({
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "langgraph": version("langgraph"),
+            "results": results,
+        }, file, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+if __name__ == "__main__":
+    main()
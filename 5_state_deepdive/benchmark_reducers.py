@@ -0,0 +1,105 @@
+# Benchmark of list reducers on the increment graph from 2_complex_state.py
+#
+# Usage:
+#   python benchmark_reducers.py            # 10,000 and 100,000 steps
+#   python benchmark_reducers.py 1000 5000  # custom step counts
+import operator  # For the operator.concat baseline
+import sys  # For reading the step counts from the command line
+import time  # For measuring wall-clock time
+import tracemalloc  # For measuring peak memory
+from typing import TypedDict, List, Annotated  # For defining structured state types and annotations
+from langgraph.graph import END, StateGraph  # For creating and managing state graphs
+from append_log import append_log, int_log  # The append-efficient reducers
+
+# Reducers to compare on the history field
+REDUCERS = {
+    "operator.concat": operator.concat,
+    "append_log": append_log,
+    "int_log": int_log,
+}
+
+# Function to build the increment graph with a given history reducer and step count
+def build_graph(reducer, steps: int):
+    """
+    Build the increment graph of 2_complex_state.py with a configurable reducer.
+
+    Args:
+        reducer: The reducer used for the history field.
+        steps: The number of increments to run before stopping.
+
+    Returns:
+        The compiled graph.
+    """
+    class BenchmarkState(TypedDict):
+        count: int
+        sum: Annotated[int, operator.add]
+        history: Annotated[List[int], reducer]
+
+    def increment(state: BenchmarkState) -> BenchmarkState:
+        new_count = state["count"] + 1
+        return {"count": new_count, "sum": new_count, "history": [new_count]}
+
+    def should_continue(state):
+        return "continue" if state["count"] < steps else "stop"
+
+    graph = StateGraph(BenchmarkState)
+    graph.add_node("increment", increment)
+    graph.set_entry_point("increment")
+    graph.add_conditional_edges("increment", should_continue, {"continue": "increment", "stop": END})
+    return graph.compile()
+
+# Function to run the graph once and measure it
+def run_graph(reducer, steps: int) -> float:
+    """
+    Run the increment graph end to end.
+
+    Args:
+        reducer: The reducer used for the history field.
+        steps: The number of increments to run.
+
+    Returns:
+        The wall-clock seconds of the run.
+    """
+    app = build_graph(reducer, steps)
+    start = time.perf_counter()
+    result = app.invoke({"count": 0, "sum": 0, "history": []}, {"recursion_limit": steps + 10})
+    elapsed = time.perf_counter() - start
+    assert len(result["history"]) == steps and result["history"][-1] == steps
+    return elapsed
+
+# Function to apply the reducer alone, the way the graph does on every step
+def run_reducer(reducer, steps: int):
+    """
+    Apply the reducer once per step without the graph, isolating its cost.
+
+    Args:
+        reducer: The reducer to measure.
+        steps: The number of updates to apply.
+
+    Returns:
+        A tuple of (seconds, peak MiB allocated while reducing).
+    """
+    start = time.perf_counter()
+    history = []
+    for count in range(1, steps + 1):
+        history = reducer(history, [count])
+    elapsed = time.perf_counter() - start
+
+    # Measure memory in a second pass, since tracing slows the loop down
+    tracemalloc.start()
+    history = []
+    for count in range(1, steps + 1):
+        history = reducer(history, [count])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+if __name__ == "__main__":
+    step_counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'steps':>8}  {'reducer':<16}{'graph s':>10}{'graph us/step':>15}{'reducer s':>11}{'reducer peak MiB':>18}")
+    for steps in step_counts:
+        for name, reducer in REDUCERS.items():
+            graph_seconds = run_graph(reducer, steps)
+            reducer_seconds, peak = run_reducer(reducer, steps)
+            print(f"{steps:>8}  {name:<16}{graph_seconds:>10.2f}{graph_seconds / steps * 1e6:>15.1f}"
+                  f"{reducer_seconds:>11.3f}{peak:>18.2f}")
@@ -1,40 +1,131 @@
-# Import necessary libraries for creating a ReAct agent
-from langchain_openai import ChatOpenAI  # OpenAI's chat model interface
-from langchain.agents import tool, create_react_agent  # Tools for creating ReAct agents
+# The ReAct agent runnable is built lazily: importing this module only loads the standard library.
+# The LLM, the tools, the prompt and the runnable are constructed on first use, and the prompt is
+# read from the local prompt registry, so starting a worker makes no network round trip.
+# Call warm_up() to construct everything eagerly, e.g. before a worker starts serving.
 import datetime  # For working with date and time
-from langchain_community.tools import TavilySearchResults  # Web search tool
-from langchain import hub  # For pulling pre-defined prompts from LangChain hub
+import os
+import sys
+from collections import deque  # Bounded log of prompt sizes
+from functools import lru_cache  # For building each component only once
+
+from prompt_registry import load_prompt  # Local, version-pinned copy of LangChain hub prompts
+from scratchpad import IncrementalScratchpad, count_tokens  # Incremental agent_scratchpad rendering
+
+# search_cache.py is shared by the lessons and lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Name of the ReAct prompt on the LangChain hub
+REACT_PROMPT = "hwchase17/react"
+
+# Token budget of the agent scratchpad; older observations are truncated past it (None keeps everything)
+SCRATCHPAD_MAX_TOKENS = None
+
+# Let the model propose several independent actions in one step (run concurrently by act_node),
+# instead of one action per reason/act round trip
+MULTI_ACTION = False
+
+# Size of the prompts sent to the LLM, one entry per reasoning step (the most recent PROMPT_LOG_SIZE)
+PROMPT_LOG_SIZE = 1000
+prompt_size_log = deque(maxlen=PROMPT_LOG_SIZE)
+
 
 # Initialize the OpenAI language model with GPT-4
-llm = ChatOpenAI(model="gpt-4")
+@lru_cache(maxsize=None)
+def get_llm():
+    from langchain_openai import ChatOpenAI  # OpenAI's chat model interface
+    return ChatOpenAI(model="gpt-4")
+
+
+# Define the tools: a custom tool to get the current system time, and
+# the Tavily search tool, which performs basic-depth web searches
+@lru_cache(maxsize=None)
+def get_tools():
+    from langchain_core.tools import tool  # Decorator for defining tools
+    from langchain_community.tools import TavilySearchResults  # Web search tool
+    from search_cache import CachedSearchTool  # Persistent cache of search results
 
-# Define a custom tool to get the current system time
-@tool
-def get_system_time(format: str = "%Y-%m-%d %H:%M:%S"):
-    """
-    Returns the current date and time in the specified format.
+    @tool
+    def get_system_time(format: str = "%Y-%m-%d %H:%M:%S"):
+        """
+        Returns the current date and time in the specified format.
 
-    Args:
-        format: A string specifying the desired date-time format.
+        Args:
+            format: A string specifying the desired date-time format.
 
-    Returns:
-        A string representing the current date and time in the specified format.
-    """
-    current_time = datetime.datetime.now()  # Get the current timestamp
-    formatted_time = current_time.strftime(format)  # Format the timestamp
-    return formatted_time
+        Returns:
+            A string representing the current date and time in the specified format.
+        """
+        current_time = datetime.datetime.now()  # Get the current timestamp
+        formatted_time = current_time.strftime(format)  # Format the timestamp
+        return formatted_time
 
-# Initialize the Tavily search tool for web searches
-# This tool performs basic-depth web searches
-search_tool = TavilySearchResults(search_depth="basic")
+    # Repeated queries are answered from the shared search cache
+    search_tool = CachedSearchTool(TavilySearchResults(search_depth="basic"))
 
-# Pull the ReAct prompt template from the LangChain hub
-# This template defines the reasoning and acting behavior of the agent
-react_prompt = hub.pull("hwchase17/react")
+    # Combine all tools into a list for the ReAct agent
+    return [get_system_time, search_tool]
 
-# Combine all tools into a list for the ReAct agent
-tools = [get_system_time, search_tool]
 
 # Create a ReAct agent runnable
-# This agent uses the tools, LLM, and prompt template to perform reasoning and acting
-react_agent_runnable = create_react_agent(tools=tools, llm=llm, prompt=react_prompt)
\ No newline at end of file
+# This agent uses the tools, LLM, and prompt template to perform reasoning and acting.
+# The ReAct prompt template is loaded from the local prompt registry (pulled from the hub only once).
+# It is assembled like langchain's create_react_agent, except that the agent_scratchpad is rendered
+# incrementally (only new steps are formatted) and the size of every prompt is recorded.
+# With MULTI_ACTION, the prompt allows several actions per step and the parser returns them as a list.
+@lru_cache(maxsize=None)
+def get_react_agent_runnable():
+    from langchain.agents.output_parsers import ReActSingleInputOutputParser  # Parses Action / Final Answer
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.runnables import RunnableLambda
+    from langchain_core.tools import render_text_description
+
+    tools = get_tools()
+    scratchpad = IncrementalScratchpad(max_tokens=SCRATCHPAD_MAX_TOKENS)
+    react_prompt = load_prompt(REACT_PROMPT)
+    output_parser = ReActSingleInputOutputParser()
+    if MULTI_ACTION:
+        from multi_action_parser import MULTI_ACTION_INSTRUCTIONS, ReActMultiActionOutputParser
+        react_prompt = PromptTemplate.from_template(
+            react_prompt.template.replace("Begin!", MULTI_ACTION_INSTRUCTIONS + "Begin!")
+        )
+        output_parser = ReActMultiActionOutputParser()
+    react_prompt = react_prompt.partial(
+        tools=render_text_description(tools),
+        tool_names=", ".join(tool.name for tool in tools),
+    )
+
+    # Renders the scratchpad, fills the prompt and records its size; the render statistics stay
+    # local to the call, so concurrent runs sharing the scratchpad cache never mix them up
+    def build_prompt(inputs, config):
+        agent_scratchpad, stats = scratchpad.render_with_stats(inputs["intermediate_steps"])
+        prompt_value = react_prompt.invoke({**inputs, "agent_scratchpad": agent_scratchpad}, config)
+        prompt_size_log.append({**stats, "prompt_tokens": count_tokens(prompt_value.to_string())})
+        return prompt_value
+
+    return (
+        RunnableLambda(build_prompt)
+        | get_llm().bind(stop=["\nObservation"])
+        | output_parser
+    )
+
+
+# Construct every component now instead of on first use
+def warm_up():
+    get_react_agent_runnable()
+
+
+# Keep `from agent_reason_runnable import react_agent_runnable, tools` working:
+# the names are resolved (and built) the first time they are accessed
+def __getattr__(name):
+    if name == "react_agent_runnable":
+        return get_react_agent_runnable()
+    if name == "tools":
+        return get_tools()
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Running this file builds the runnable once, which also caches the prompt locally
+if __name__ == "__main__":
+    warm_up()
@@ -0,0 +1,43 @@
+import re
+from typing import List, Union
+
+from langchain.agents.agent import AgentOutputParser
+from langchain.agents.output_parsers import ReActSingleInputOutputParser
+from langchain_core.agents import AgentAction, AgentFinish
+
+# Added to the ReAct prompt before "Begin!", so the model knows it may propose several actions at once
+MULTI_ACTION_INSTRUCTIONS = (
+    "When several independent actions are needed (for example two unrelated searches), you may write "
+    "several Action / Action Input pairs one after the other before the Observation. They run at the "
+    "same time, and their observations follow in the same order.\n\n"
+)
+
+# One Action / Action Input pair; the input runs until the next "Action:" line or the end of the text
+ACTION_PAIR = re.compile(
+    r"Action\s*\d*\s*:[\s]*(.*?)[\s]*Action\s*\d*\s*Input\s*\d*\s*:[\s]*(.*?)(?=\n\s*Action\s*\d*\s*:|\Z)",
+    re.DOTALL,
+)
+
+
+# The ReActMultiActionOutputParser parses a ReAct completion like ReActSingleInputOutputParser, but
+# a completion with several Action / Action Input pairs becomes a list of AgentActions, which
+# act_node runs concurrently. The first action's log holds the thought, and each action's log holds
+# only its own pair, so the scratchpad renders every pair once, followed by its observation.
+# Anything else (a final answer, a single action, malformed output) is handled by the single parser.
+class ReActMultiActionOutputParser(AgentOutputParser):
+    def parse(self, text: str) -> Union[AgentAction, List[AgentAction], AgentFinish]:
+        pairs = list(ACTION_PAIR.finditer(text))
+        if len(pairs) < 2 or "Final Answer:" in text:
+            return ReActSingleInputOutputParser().parse(text)
+        actions = []
+        start = 0
+        for index, pair in enumerate(pairs):
+            end = len(text) if index == len(pairs) - 1 else pair.end()
+            tool_input = pair.group(2).strip().strip('"')
+            actions.append(AgentAction(pair.group(1).strip(), tool_input, text[start:end]))
+            start = end
+        return actions
+
+    @property
+    def _type(self) -> str:
+        return "react-multi-action"
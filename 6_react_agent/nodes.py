@@ -1,43 +1,33 @@
+from functools import lru_cache
+
 from dotenv import load_dotenv
 
-from agent_reason_runnable import react_agent_runnable, tools
+from agent_reason_runnable import get_react_agent_runnable, get_tools
 from react_state import AgentState
+from tool_registry import ToolRegistry
 
 load_dotenv()
 
 # The reason_node function is responsible for invoking the React agent's reasoning process.
 # It takes the current state of the agent as input, calls the react_agent_runnable with this state,
 # and returns the outcome of the agent's reasoning.
+# The runnable is built on the first call, not when this module is imported.
 def reason_node(state: AgentState):
-    agent_outcome = react_agent_runnable.invoke(state)
+    agent_outcome = get_react_agent_runnable().invoke(state)
     return {"agent_outcome": agent_outcome}
 
 
-# The act_node function executes the action determined by the React agent.
-# It extracts the agent's action from the state, identifies the corresponding tool,
-# and invokes the tool with the provided input. The function returns the intermediate steps
-# including the agent's action and the tool's output.
+# The tool registry is built once, on first use: it indexes the tools by name and validates
+# tool inputs against each tool's argument schema before running them.
+@lru_cache(maxsize=None)
+def get_tool_registry():
+    return ToolRegistry(get_tools())
+
+
+# The act_node function executes the action(s) determined by the React agent.
+# The agent outcome can be a single AgentAction or a list of independent AgentActions;
+# the actions are run concurrently through the tool registry, each with its own timeout.
+# The function returns the intermediate steps, one (action, output) pair per action,
+# in the same order as the actions.
 def act_node(state: AgentState):
-    agent_action = state["agent_outcome"]
-    
-    # Extract tool name and input from AgentAction
-    tool_name = agent_action.tool
-    tool_input = agent_action.tool_input
-    
-    # Find the matching tool function
-    tool_function = None
-    for tool in tools:
-        if tool.name == tool_name:
-            tool_function = tool
-            break
-    
-    # Execute the tool with the input
-    if tool_function:
-        if isinstance(tool_input, dict):
-            output = tool_function.invoke(**tool_input)
-        else:
-            output = tool_function.invoke(tool_input)
-    else:
-        output = f"Tool '{tool_name}' not found"
-    
-    return {"intermediate_steps": [(agent_action, str(output))]}
\ No newline at end of file
+    return {"intermediate_steps": get_tool_registry().run_actions(state["agent_outcome"])}
@@ -0,0 +1,70 @@
+# Import-time profile of the ReAct agent entry points
+# Each entry point is imported in a fresh interpreter with `python -X importtime`, and the
+# per-module cost is aggregated by top-level package, so slow cold starts can be traced to
+# the modules responsible.
+#
+# Usage:
+#   python profile_imports.py                 # all entry points, top 15 packages each
+#   python profile_imports.py nodes --top 30  # a single entry point
+#   python profile_imports.py --warm-up       # also time building the runnable (no network if the prompt is cached)
+import argparse
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ENTRY_POINTS = ["agent_reason_runnable", "nodes", "react_graph"]
+
+
+# Imports a module in a fresh interpreter and returns (wall seconds, {module: (self us, cumulative us)})
+def profile(module: str, statement: str = None):
+    statement = statement or f"import {module}"
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"`{statement}` failed:\n{completed.stderr[-2000:]}")
+
+    modules = {}
+    for line in completed.stderr.splitlines():
+        # Lines look like: "import time:       411 |     898302 | langchain_core.tools"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return wall, modules
+
+
+# Prints the slowest top-level packages of one profile
+def report(title: str, wall: float, modules: dict, top: int):
+    packages = defaultdict(int)
+    for name, (self_us, _) in modules.items():
+        packages[name.split(".")[0]] += self_us  # Self time summed per top-level package
+    total_us = sum(packages.values())
+
+    print(f"\n== {title}: {wall:.2f}s wall, {total_us / 1e6:.2f}s in imports, {len(modules)} modules")
+    print(f"{'package':<32}{'self ms':>10}{'share':>8}")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<32}{self_us / 1000:>10.1f}{self_us / total_us:>8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the import cost of the ReAct agent entry points.")
+    parser.add_argument("entry_points", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--top", type=int, default=15, help="Number of packages to show per entry point")
+    parser.add_argument("--warm-up", action="store_true", help="Also profile building the runnable")
+    args = parser.parse_args()
+
+    for module in args.entry_points:
+        report(f"import {module}", *profile(module), args.top)
+
+    if args.warm_up:
+        statement = "import agent_reason_runnable; agent_reason_runnable.warm_up()"
+        report("warm_up()", *profile("agent_reason_runnable", statement), args.top)
+
+
+if __name__ == "__main__":
+    main()
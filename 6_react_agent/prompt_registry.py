@@ -0,0 +1,54 @@
+# Local prompt registry for LangChain hub prompts
+# Prompts are looked up in the `prompts/` folder next to this file first, so a vendored or
+# previously pulled prompt is loaded from disk without any network round trip.
+# Only on a miss is the prompt pulled from the hub, and it is then saved for the next start.
+import json
+import os
+import warnings
+
+# Folder holding the vendored and cached prompts
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+
+# Pinned hub commits, e.g. {"hwchase17/react": "<commit hash>"}
+# A pinned prompt is cached under its own file, so changing the pin pulls that exact version once.
+PROMPT_VERSIONS = {}
+
+# When set, a missing prompt raises instead of being pulled from the hub
+OFFLINE = os.getenv("PROMPTS_OFFLINE", "0") == "1"
+
+
+# Returns the file a prompt (and optional commit) is cached in
+def prompt_path(name: str, commit: str = None) -> str:
+    file_name = name.replace("/", "__") + (f"@{commit}" if commit else "") + ".json"
+    return os.path.join(PROMPTS_DIR, file_name)
+
+
+# Loads a prompt by hub name, from disk when available, otherwise from the hub (then caches it).
+# The commit defaults to the pin in PROMPT_VERSIONS; without a pin, the first version cached is used.
+def load_prompt(name: str, commit: str = None, offline: bool = None):
+    from langchain_core.load import dumpd, load
+
+    commit = commit or PROMPT_VERSIONS.get(name)
+    offline = OFFLINE if offline is None else offline
+    path = prompt_path(name, commit)
+
+    if os.path.exists(path):
+        with open(path) as file:
+            with warnings.catch_warnings():
+                warnings.filterwarnings("ignore", message="The function `load` is in beta")
+                return load(json.load(file)["prompt"])
+
+    if offline:
+        raise RuntimeError(f"Prompt '{name}' is not available in {PROMPTS_DIR} and offline mode is enabled")
+
+    from langchain import hub  # Imported only when a prompt really has to be pulled
+    prompt = hub.pull(f"{name}:{commit}" if commit else name)
+
+    os.makedirs(PROMPTS_DIR, exist_ok=True)
+    with open(path, "w") as file:
+        json.dump({
+            "name": name,
+            "commit": (prompt.metadata or {}).get("lc_hub_commit_hash", commit),
+            "prompt": dumpd(prompt),
+        }, file, indent=2)
+    return prompt
@@ -5,6 +5,7 @@ load_dotenv()
 from langchain_core.agents import AgentFinish, AgentAction
 from langgraph.graph import END, StateGraph
 
+from agent_reason_runnable import prompt_size_log
 from nodes import reason_node, act_node
 from react_state import AgentState
 
@@ -40,15 +41,20 @@ graph.add_edge(ACT_NODE, REASON_NODE)
 # Compile the graph into an application
 app = graph.compile()
 
-# Invoke the application with an initial input
-result = app.invoke(
-    {
-        "input": "How many days ago was the latest SpaceX launch?", 
-        "agent_outcome": None, 
-        "intermediate_steps": []
-    }
-)
-
-# Print the final result of the agent's reasoning
-print(result["agent_outcome"].return_values["output"], "final result")
-
+if __name__ == "__main__":
+    # Invoke the application with an initial input
+    result = app.invoke(
+        {
+            "input": "How many days ago was the latest SpaceX launch?", 
+            "agent_outcome": None, 
+            "intermediate_steps": []
+        }
+    )
+
+    # Print the final result of the agent's reasoning
+    print(result["agent_outcome"].return_values["output"], "final result")
+
+    # Print the size of the prompt sent at every reasoning step
+    for step, entry in enumerate(prompt_size_log, start=1):
+        print(f"step {step}: {entry['prompt_tokens']} prompt tokens, {entry['scratchpad_tokens']} scratchpad tokens, "
+              f"{entry['new_steps']} new step(s) rendered, {entry['truncated']} observation(s) truncated")
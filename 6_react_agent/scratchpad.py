@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from langchain_core.agents import AgentAction
+
+OBSERVATION_PREFIX = "Observation: "
+LLM_PREFIX = "Thought: "
+TRUNCATED_OBSERVATION = "[observation truncated to save tokens]"
+
+
+# Counts tokens with tiktoken, or estimates them as characters / 4 when the encoding is unavailable
+_encoding = None
+_encoding_loaded = False
+
+
+def count_tokens(text: str) -> int:
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")  # The GPT-4 encoding
+        except Exception:
+            _encoding = None
+    return len(_encoding.encode(text)) if _encoding is not None else len(text) // 4
+
+
+# Renders one (action, observation) pair exactly like langchain's format_log_to_str
+def render_step(action: AgentAction, observation: str) -> str:
+    return f"{action.log}\n{OBSERVATION_PREFIX}{observation}\n{LLM_PREFIX}"
+
+
+# Holds the rendered steps of one agent run
+class _RunCache:
+    def __init__(self):
+        self.last_step = None  # The last step rendered, used to check that the run only grew
+        self.chunks: List[str] = []  # Rendered text of every step
+        self.tokens: List[int] = []  # Token count of every rendered step
+        self.text = ""  # The full scratchpad without truncation
+        self.total_tokens = 0  # Token count of the full scratchpad
+
+
+# The IncrementalScratchpad renders the agent_scratchpad of a ReAct prompt incrementally.
+# Every step is formatted (and its tokens counted) once: on the next call only the new
+# (action, observation) pairs are rendered and appended to the cached prefix.
+# Runs are told apart by their first step, and the caches of the most recent runs are kept.
+#
+# With max_tokens set, the oldest observations are replaced by a short placeholder until
+# the scratchpad fits the budget; the actions (and so the agent's reasoning) are kept.
+class IncrementalScratchpad:
+    def __init__(self, max_tokens: Optional[int] = None, max_runs: int = 128):
+        self.max_tokens = max_tokens
+        self.max_runs = max_runs
+        self._runs: "OrderedDict[int, _RunCache]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cache_for(self, steps: List[Tuple[AgentAction, str]]) -> _RunCache:
+        key = id(steps[0][0])
+        with self._lock:
+            cache = self._runs.get(key)
+            # Start over if this is a new run or the steps are not an extension of the cached ones
+            if cache is None or len(cache.chunks) > len(steps) or (
+                cache.chunks and steps[len(cache.chunks) - 1] is not cache.last_step
+            ):
+                cache = _RunCache()
+            self._runs[key] = cache
+            self._runs.move_to_end(key)
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+            return cache
+
+    def render(self, steps: List[Tuple[AgentAction, str]]) -> str:
+        return self.render_with_stats(steps)[0]
+
+    # Returns the scratchpad and statistics about this render: the steps, newly rendered steps,
+    # scratchpad tokens and truncated observations (per call, so concurrent runs don't mix them)
+    def render_with_stats(self, steps: List[Tuple[AgentAction, str]]) -> Tuple[str, dict]:
+        if not steps:
+            return "", {"steps": 0, "new_steps": 0, "scratchpad_tokens": 0, "truncated": 0}
+
+        cache = self._cache_for(steps)
+        new_steps = steps[len(cache.chunks):]
+        for action, observation in new_steps:
+            chunk = render_step(action, observation)
+            cache.chunks.append(chunk)
+            cache.tokens.append(count_tokens(chunk))
+            cache.total_tokens += cache.tokens[-1]
+        if new_steps:
+            cache.text += "".join(cache.chunks[-len(new_steps):])
+            cache.last_step = steps[-1]
+
+        text, total, truncated = cache.text, cache.total_tokens, 0
+        if self.max_tokens is not None and total > self.max_tokens:
+            text, total, truncated = self._truncate(steps, cache)
+
+        return text, {
+            "steps": len(steps),
+            "new_steps": len(new_steps),
+            "scratchpad_tokens": total,
+            "truncated": truncated,
+        }
+
+    # Replaces the oldest observations by a placeholder until the budget is met
+    # (the latest step is always kept whole)
+    def _truncate(self, steps, cache: _RunCache):
+        chunks, tokens = list(cache.chunks), list(cache.tokens)
+        total, truncated = cache.total_tokens, 0
+        for index in range(len(steps) - 1):
+            if total <= self.max_tokens:
+                break
+            chunk = render_step(steps[index][0], TRUNCATED_OBSERVATION)
+            chunk_tokens = count_tokens(chunk)
+            total += chunk_tokens - tokens[index]
+            chunks[index], tokens[index] = chunk, chunk_tokens
+            truncated += 1
+        return "".join(chunks), total, truncated
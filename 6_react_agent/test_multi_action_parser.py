@@ -0,0 +1,43 @@
+import time
+
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.tools import tool
+
+from multi_action_parser import ReActMultiActionOutputParser
+from tool_registry import ToolRegistry
+
+TWO_ACTIONS = (
+    " I need two independent searches.\n"
+    "Action: search\nAction Input: \"latest SpaceX launch\"\n"
+    "Action: search\nAction Input: today's date"
+)
+
+
+@tool
+def search(query: str) -> str:
+    """Slow fake search."""
+    time.sleep(0.3)
+    return f"results for {query}"
+
+
+def test_several_pairs_become_a_list_of_actions():
+    actions = ReActMultiActionOutputParser().parse(TWO_ACTIONS)
+    assert [(action.tool, action.tool_input) for action in actions] == [
+        ("search", "latest SpaceX launch"), ("search", "today's date"),
+    ]
+    assert "".join(action.log for action in actions) == TWO_ACTIONS
+
+
+def test_single_action_and_final_answer_parse_as_before():
+    parser = ReActMultiActionOutputParser()
+    assert isinstance(parser.parse(" Thinking.\nAction: search\nAction Input: x"), AgentAction)
+    assert isinstance(parser.parse(" I know.\nFinal Answer: 42"), AgentFinish)
+
+
+# The parsed actions run concurrently in the tool registry, the way act_node runs them
+def test_parsed_actions_run_concurrently():
+    registry = ToolRegistry([search], max_workers=2)
+    start = time.monotonic()
+    steps = registry.run_actions(ReActMultiActionOutputParser().parse(TWO_ACTIONS))
+    assert [output for _, output in steps] == ["results for latest SpaceX launch", "results for today's date"]
+    assert time.monotonic() - start < 0.55
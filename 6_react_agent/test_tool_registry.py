@@ -0,0 +1,48 @@
+import time
+
+from langchain_core.agents import AgentAction
+from langchain_core.tools import tool
+
+from tool_registry import ToolRegistry
+
+
+@tool
+def nap(seconds: float) -> str:
+    """Sleeps for the given number of seconds."""
+    time.sleep(seconds)
+    return f"slept {seconds}"
+
+
+@tool
+def hang(seconds: float) -> str:
+    """Sleeps far past its timeout."""
+    time.sleep(seconds)
+    return "woke up"
+
+
+def action(name: str, seconds: float) -> AgentAction:
+    return AgentAction(tool=name, tool_input={"seconds": seconds}, log="")
+
+
+# More actions than workers: the queued ones wait for a worker without using up their timeout
+def test_timeout_starts_when_the_tool_runs():
+    registry = ToolRegistry([nap], default_timeout=0.5, max_workers=2)
+    steps = registry.run([action("nap", 0.3) for _ in range(6)])
+    assert [output for _, output in steps] == ["slept 0.3"] * 6
+
+
+# A tool that times out leaves its worker free for the next queued action
+def test_timed_out_tool_frees_its_worker():
+    registry = ToolRegistry([nap, hang], timeouts={"hang": 0.2}, default_timeout=1.0, max_workers=1)
+    start = time.monotonic()
+    steps = registry.run([action("hang", 5), action("nap", 0.1)])
+    assert steps[0][1] == "Tool 'hang' timed out after 0.2 seconds"
+    assert steps[1][1] == "slept 0.1"
+    assert time.monotonic() - start < 1.0
+
+
+def test_invalid_and_failing_actions_become_messages():
+    registry = ToolRegistry([nap], max_workers=1)
+    steps = registry.run([action("missing", 0), AgentAction(tool="nap", tool_input={"seconds": "x"}, log="")])
+    assert steps[0][1] == "Tool 'missing' not found"
+    assert steps[1][1].startswith("Invalid input for tool 'nap'")
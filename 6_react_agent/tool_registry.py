@@ -0,0 +1,78 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
+
+from langchain_core.agents import AgentAction
+from langchain_core.tools import BaseTool
+from pydantic import ValidationError
+
+# Default settings for executing tools
+DEFAULT_TIMEOUT = 30.0  # Seconds a tool may run before its result is replaced by a timeout message
+MAX_WORKERS = 4  # Maximum number of tools running at the same time
+
+
+# The ToolRegistry is built once from the agent's tools. It indexes the tools by name,
+# validates the agent's tool input against each tool's argument schema before running it,
+# and executes several actions concurrently, at most max_workers at a time across all runs, with
+# per-tool timeouts counted from when the tool starts (not while it waits for a free worker).
+class ToolRegistry:
+    def __init__(self, tools: List[BaseTool], timeouts: Optional[Dict[str, float]] = None,
+                 default_timeout: float = DEFAULT_TIMEOUT, max_workers: int = MAX_WORKERS):
+        self.tools = {tool.name: tool for tool in tools}
+        self.schemas = {tool.name: tool.get_input_schema() for tool in tools}
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+
+    # Returns an error message if the action cannot be run, or None if it is valid.
+    # ReAct agents pass a plain string for single-argument tools, which is mapped to the tool's only field.
+    def validate(self, action: AgentAction) -> Optional[str]:
+        if action.tool not in self.tools:
+            return f"Tool '{action.tool}' not found"
+        schema = self.schemas[action.tool]
+        tool_input = action.tool_input
+        if isinstance(tool_input, str):
+            fields = list(schema.model_fields)
+            if len(fields) != 1:
+                return f"Tool '{action.tool}' expects arguments {fields}, got a plain string"
+            tool_input = {fields[0]: tool_input}
+        try:
+            schema.model_validate(tool_input)
+        except ValidationError as error:
+            return f"Invalid input for tool '{action.tool}': {error}"
+        return None
+
+    # Runs a list of actions concurrently and returns (action, output) pairs in the order of the actions.
+    # A tool that fails or exceeds its timeout produces an error message as its output instead of raising.
+    def run(self, actions: List[AgentAction]) -> List[tuple[AgentAction, str]]:
+        # The context keeps callbacks and tracing of the run
+        futures = [self.executor.submit(contextvars.copy_context().run, self._run_one, action) for action in actions]
+        return [(action, future.result()) for action, future in zip(actions, futures)]
+
+    # Runs in a pool worker, so the timeout starts with the tool, not while the action is queued.
+    # The tool itself runs on a daemon thread: when it times out, the worker leaves it behind and is
+    # free for the next queued action
+    def _run_one(self, action: AgentAction) -> str:
+        error = self.validate(action)
+        if error is not None:
+            return error
+        timeout = self.timeouts.get(action.tool, self.default_timeout)
+        output = []
+
+        def call():
+            try:
+                output.append(self.tools[action.tool].invoke(action.tool_input))
+            except Exception as error:
+                output.append(f"Tool '{action.tool}' failed: {error}")
+
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(call,), name="tool", daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if not output:
+            return f"Tool '{action.tool}' timed out after {timeout} seconds"
+        return str(output[0])
+
+    # Convenience wrapper accepting either a single action or a list of actions
+    def run_actions(self, actions: Union[AgentAction, List[AgentAction]]) -> List[tuple[AgentAction, str]]:
+        return self.run(actions if isinstance(actions, list) else [actions])
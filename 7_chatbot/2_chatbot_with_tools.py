@@ -1,21 +1,32 @@
+import os
+import sys
 from typing import TypedDict, Annotated
 from langgraph.graph import add_messages, StateGraph, END
 from langchain_groq import ChatGroq
 from langchain_core.messages import AIMessage, HumanMessage
 from dotenv import load_dotenv
 from langchain_community.tools.tavily_search import TavilySearchResults
-from langgraph.prebuilt import ToolNode
+from parallel_tool_node import ParallelToolNode
+
+# search_cache.py is shared by the lessons and lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from search_cache import CachedSearchTool
 
 # Import necessary libraries for creating a chatbot with tools
 # Add comments here to explain the integration of tools in the chatbot system
 
 load_dotenv()
 
+# Tool calls of one answer run concurrently, at most MAX_PARALLEL_TOOLS at a time. A call running
+# longer than its timeout (seconds, per tool name) is answered with a timeout message instead.
+MAX_PARALLEL_TOOLS = 4
+TOOL_TIMEOUTS = {"tavily_search_results_json": 10}
+
 class BasicChatBot(TypedDict):
     messages: Annotated[list, add_messages]
 
-# Initialize the search tool with a maximum of 2 results
-search_tool = TavilySearchResults(max_results=2)
+# Initialize the search tool with a maximum of 2 results; repeated queries are answered from the shared search cache
+search_tool = CachedSearchTool(TavilySearchResults(max_results=2))
 # List of tools to be used by the chatbot
 tools = [search_tool]
 
@@ -42,8 +53,9 @@ def tools_router(state: BasicChatBot):
         return END
     
 
-# Create a tool node for managing tools in the graph
-tool_node = ToolNode(tools=tools)
+# Create a tool node for managing tools in the graph, with bounded parallelism and timeouts.
+# It records the latency of every tool call in tool_node.stats.
+tool_node = ParallelToolNode(tools=tools, max_parallel=MAX_PARALLEL_TOOLS, timeouts=TOOL_TIMEOUTS)
 
 # Initialize the state graph for the chatbot
 graph = StateGraph(BasicChatBot)
@@ -67,6 +79,8 @@ while True:
     user_input = input("User: ")
     # Exit the loop if the user types 'exit' or 'end'
     if(user_input in ["exit", "end"]):
+        # Show which tools took the most time
+        print(tool_node.stats.report())
         break
     else: 
         # Invoke the compiled app with the user input
@@ -0,0 +1,71 @@
+# Micro-benchmark of merging messages into a long conversation
+# Measures the cost of appending one message to a thread that already holds 100, 1k and 10k
+# messages, as happens on every step of a long chat:
+#
+#   add_messages   - the reducer of `Annotated[list, add_messages]`, which rebuilds the list
+#   indexed step   - IndexedMessages as in a graph step: the current list was handed to the
+#                    nodes and the checkpointer, so it is copied once before the append
+#   indexed append - IndexedMessages appending with nothing handed out (several updates per step)
+#
+# Usage:
+#   python benchmark_add_messages.py
+#   python benchmark_add_messages.py --sizes 100 1000 10000 100000 --appends 500
+import argparse
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import add_messages
+
+from indexed_messages import IndexedMessages
+
+
+def make_history(size: int) -> list:
+    return [
+        (HumanMessage if index % 2 == 0 else AIMessage)(content=f"message {index}", id=f"history-{index}")
+        for index in range(size)
+    ]
+
+
+def new_messages(appends: int) -> list:
+    return [AIMessage(content=f"reply {index}", id=f"new-{index}") for index in range(appends)]
+
+
+# Microseconds per append of the add_messages reducer
+def time_add_messages(history: list, appends: int) -> float:
+    messages = history
+    updates = new_messages(appends)
+    start = time.perf_counter()
+    for update in updates:
+        messages = add_messages(messages, [update])
+    return (time.perf_counter() - start) / appends * 1e6
+
+
+# Microseconds per append of the IndexedMessages channel, handing the list out before each one or not
+def time_indexed(history: list, appends: int, handed_out: bool) -> float:
+    channel = IndexedMessages().from_checkpoint(history)
+    updates = new_messages(appends)
+    start = time.perf_counter()
+    for update in updates:
+        if handed_out:
+            channel.checkpoint()
+        channel.update([[update]])
+    return (time.perf_counter() - start) / appends * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-append cost of add_messages and IndexedMessages.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--appends", type=int, default=200, help="Appends timed per size")
+    args = parser.parse_args()
+
+    print(f"{'messages':>10}{'add_messages us':>17}{'indexed step us':>17}{'indexed append us':>19}{'speedup':>9}")
+    for size in args.sizes:
+        history = make_history(size)
+        reducer = time_add_messages(history, args.appends)
+        step = time_indexed(history, args.appends, handed_out=True)
+        append = time_indexed(history, args.appends, handed_out=False)
+        print(f"{size:>10}{reducer:>17.1f}{step:>17.1f}{append:>19.1f}{reducer / step:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
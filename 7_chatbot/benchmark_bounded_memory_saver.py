@@ -0,0 +1,104 @@
+# Benchmark of the memory footprint of the in-memory checkpointers
+# Runs the chatbot graph (with a fake model) for many thread_ids, one message per thread per round,
+# in a shuffled order, and reports for every checkpointer the serialized bytes and threads left in
+# memory, the threads spilled to disk, the evictions and reloads, and the turn latency.
+#
+# Checkpointers:
+#   memory    - MemorySaver: every checkpoint of every thread stays in memory
+#   bounded   - BoundedMemorySaver with --max-threads threads and --max-mb MB in memory
+#   keep-last - the same, keeping only the last --keep-last checkpoints of every thread
+#
+# Usage:
+#   python benchmark_bounded_memory_saver.py
+#   python benchmark_bounded_memory_saver.py --threads 5000 --rounds 3 --max-threads 500 --keep-last 4
+import argparse
+import random
+import time
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from benchmark_checkpointer import build_graph, percentile
+from bounded_memory_saver import BoundedMemorySaver
+
+CHECKPOINTERS = ["memory", "bounded", "keep-last"]
+
+
+def make_saver(name: str, args):
+    if name == "memory":
+        return MemorySaver()
+    return BoundedMemorySaver(
+        max_threads=args.max_threads,
+        max_bytes=int(args.max_mb * 1024 * 1024),
+        keep_last=args.keep_last if name == "keep-last" else None,
+    )
+
+
+# Bytes of the serialized checkpoints, metadata and writes held in memory by a MemorySaver
+def memory_bytes(saver: MemorySaver) -> int:
+    total = 0
+    for namespaces in saver.storage.values():
+        for checkpoints in namespaces.values():
+            for (_, checkpoint), (_, metadata), _ in checkpoints.values():
+                total += len(checkpoint) + len(metadata)
+    for writes in saver.writes.values():
+        for _, _, (_, value), _ in writes.values():
+            total += len(value)
+    return total
+
+
+def run(name: str, args) -> dict:
+    saver = make_saver(name, args)
+    app = build_graph(saver, think=0)
+    order = list(range(args.threads))
+    rng = random.Random(0)
+    latencies = []
+    start = time.perf_counter()
+    for round_ in range(args.rounds):
+        rng.shuffle(order)
+        for thread_id in order:
+            config = {"configurable": {"thread_id": thread_id}}
+            turn_start = time.perf_counter()
+            app.invoke({"messages": [HumanMessage(content=f"message {round_} of thread {thread_id}")]}, config=config)
+            latencies.append(time.perf_counter() - turn_start)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "bytes_in_memory": memory_bytes(saver),
+        "threads_in_memory": len(saver.storage),
+        "threads_on_disk": 0,
+        "evictions": 0,
+        "reloads": 0,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "total_s": elapsed,
+    }
+    if isinstance(saver, BoundedMemorySaver):
+        footprint = saver.footprint()
+        result.update({key: footprint[key] for key in ("threads_on_disk", "evictions", "reloads")})
+        saver.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the memory footprint of the in-memory checkpointers.")
+    parser.add_argument("--threads", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--max-threads", type=int, default=200)
+    parser.add_argument("--max-mb", type=float, default=64)
+    parser.add_argument("--keep-last", type=int, default=4)
+    parser.add_argument("--checkpointers", nargs="+", choices=CHECKPOINTERS, default=CHECKPOINTERS)
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads x {args.rounds} messages, at most {args.max_threads} threads in memory")
+    print(f"{'checkpointer':<14}{'memory KB':>11}{'in memory':>11}{'on disk':>9}{'evictions':>11}"
+          f"{'reloads':>9}{'p50 ms':>8}{'p99 ms':>8}{'run s':>8}")
+    for name in args.checkpointers:
+        result = run(name, args)
+        print(f"{name:<14}{result['bytes_in_memory'] / 1024:>11.1f}{result['threads_in_memory']:>11}"
+              f"{result['threads_on_disk']:>9}{result['evictions']:>11}{result['reloads']:>9}"
+              f"{result['p50_ms']:>8.2f}{result['p99_ms']:>8.2f}{result['total_s']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# Benchmark of the checkpoint encodings for long conversations
+# Runs the chatbot graph (with a fake model) for threads of 10, 100 and 1000 turns and reports,
+# for every encoding, the bytes stored, the time spent saving checkpoints (encoding and
+# serialization), and the time to read the latest state back, cold (empty delta cache, as after
+# a restart) and warm (as on every following turn).
+#
+# Encodings:
+#   full            - the current setup: every checkpoint stores the whole message list
+#   compressed      - full checkpoints, compressed (zstd, or zlib without the zstandard package)
+#   delta           - DeltaCheckpointSaver: appended messages only, a full snapshot every 20 checkpoints
+#   delta+compressed
+#
+# Usage:
+#   python benchmark_checkpoint_encoding.py
+#   python benchmark_checkpoint_encoding.py --turns 10 100 --snapshot-every 50
+import argparse
+import time
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.messages import HumanMessage
+
+from benchmark_checkpointer import build_graph
+from delta_checkpoint import SNAPSHOT_EVERY, CompressedSerializer, DeltaCheckpointSaver
+
+ENCODINGS = ["full", "compressed", "delta", "delta+compressed"]
+
+# A typical user message; the fake model echoes it back, so each turn adds ~2x this text
+USER_MESSAGE = "Can you explain how checkpointing works in LangGraph and why it matters for long chats? "
+
+
+# Measures the time spent in put() of the wrapped saver (reads are delegated untimed)
+class TimedSaver(BaseCheckpointSaver):
+    def __init__(self, saver: BaseCheckpointSaver):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.put_seconds = 0.0
+        self.puts = 0
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        start = time.perf_counter()
+        try:
+            return self.saver.put(config, checkpoint, metadata, new_versions)
+        finally:
+            self.put_seconds += time.perf_counter() - start
+            self.puts += 1
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        self.saver.put_writes(config, writes, task_id, task_path)
+
+    def get_tuple(self, config):
+        return self.saver.get_tuple(config)
+
+    def list(self, config, **kwargs):
+        return self.saver.list(config, **kwargs)
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+
+# Builds the in-memory store and the saver the graph uses for one encoding
+def make_saver(encoding: str, snapshot_every: int):
+    storage = MemorySaver(serde=CompressedSerializer() if "compressed" in encoding else None)
+    saver = DeltaCheckpointSaver(storage, snapshot_every=snapshot_every) if "delta" in encoding else storage
+    return storage, saver
+
+
+# Bytes of every checkpoint (and metadata) blob held by a MemorySaver
+def stored_bytes(storage: MemorySaver) -> int:
+    total = 0
+    for namespaces in storage.storage.values():
+        for checkpoints in namespaces.values():
+            for (_, checkpoint), (_, metadata), _ in checkpoints.values():
+                total += len(checkpoint) + len(metadata)
+    return total
+
+
+def run(encoding: str, turns: int, snapshot_every: int) -> dict:
+    storage, saver = make_saver(encoding, snapshot_every)
+    timed = TimedSaver(saver)
+    app = build_graph(timed, think=0)
+    config = {"configurable": {"thread_id": "bench"}}
+    start = time.perf_counter()
+    for turn in range(turns):
+        app.invoke({"messages": [HumanMessage(content=f"{USER_MESSAGE}({turn})")]}, config=config)
+    elapsed = time.perf_counter() - start
+
+    # Read the latest state: cold with a fresh wrapper on the same store, then warm
+    reader = DeltaCheckpointSaver(storage, snapshot_every=snapshot_every) if "delta" in encoding else storage
+    start = time.perf_counter()
+    latest = reader.get_tuple(config)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    reader.get_tuple(config)
+    warm = time.perf_counter() - start
+    assert len(latest.checkpoint["channel_values"]["messages"]) == 2 * turns
+
+    return {
+        "bytes": stored_bytes(storage),
+        "put_ms": timed.put_seconds * 1000,
+        "put_us_avg": timed.put_seconds / timed.puts * 1e6,
+        "read_cold_ms": cold * 1000,
+        "read_warm_ms": warm * 1000,
+        "total_s": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare checkpoint encodings on long conversations.")
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--encodings", nargs="+", choices=ENCODINGS, default=ENCODINGS)
+    parser.add_argument("--snapshot-every", type=int, default=SNAPSHOT_EVERY)
+    args = parser.parse_args()
+
+    for turns in args.turns:
+        print(f"\n== {turns} turns")
+        print(f"{'encoding':<18}{'stored KB':>11}{'put total ms':>14}{'put avg us':>12}"
+              f"{'read cold ms':>14}{'read warm ms':>14}{'run s':>8}")
+        for encoding in args.encodings:
+            result = run(encoding, turns, args.snapshot_every)
+            print(f"{encoding:<18}{result['bytes'] / 1024:>11.1f}{result['put_ms']:>14.1f}{result['put_us_avg']:>12.0f}"
+                  f"{result['read_cold_ms']:>14.2f}{result['read_warm_ms']:>14.2f}{result['total_s']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
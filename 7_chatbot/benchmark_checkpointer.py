@@ -0,0 +1,147 @@
+# Load test of the SQLite checkpointers
+# Simulates N chat sessions (one thread_id each) talking to the graph of
+# 4_chat_with_sqlite_checkpointer.py at the same time. The LLM is replaced by a fake model
+# (with an optional think time), so the measurements show the cost of checkpointing.
+#
+# Savers compared:
+#   sqlite      - the current setup: SqliteSaver on one shared connection (sessions on threads)
+#   fast        - FastSqliteSaver: WAL, reader pool, single writer with group commit (threads)
+#   aio-sqlite  - langgraph's AsyncSqliteSaver (sessions as asyncio tasks)
+#   fast-async  - FastSqliteSaver through its async methods (asyncio tasks)
+#
+# Usage:
+#   python benchmark_checkpointer.py                         # 32 sessions x 20 turns, every saver
+#   python benchmark_checkpointer.py --sessions 128 --turns 10 --think 0.01 --savers sqlite fast
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.graph import END, StateGraph, add_messages
+
+from fast_sqlite_saver import FastSqliteSaver
+
+SAVERS = ["sqlite", "fast", "aio-sqlite", "fast-async"]
+
+
+class BasicChatState(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+# The graph of 4_chat_with_sqlite_checkpointer.py with a fake model that echoes the user
+# (an async node for the asyncio sessions, so the think time does not take an executor thread)
+def build_graph(checkpointer, think: float, use_async: bool = False):
+    def chatbot(state: BasicChatState):
+        if think:
+            time.sleep(think)
+        return {"messages": [AIMessage(content="You said: " + state["messages"][-1].content)]}
+
+    async def achatbot(state: BasicChatState):
+        if think:
+            await asyncio.sleep(think)
+        return {"messages": [AIMessage(content="You said: " + state["messages"][-1].content)]}
+
+    graph = StateGraph(BasicChatState)
+    graph.add_node("chatbot", achatbot if use_async else chatbot)
+    graph.add_edge("chatbot", END)
+    graph.set_entry_point("chatbot")
+    return graph.compile(checkpointer=checkpointer)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# Runs every session on its own thread; returns the latency of every turn
+def run_threads(app, sessions: int, turns: int):
+    def session(thread_id):
+        config = {"configurable": {"thread_id": thread_id}}
+        latencies = []
+        for turn in range(turns):
+            start = time.perf_counter()
+            app.invoke({"messages": [HumanMessage(content=f"message {turn}")]}, config=config)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        return [latency for latencies in executor.map(session, range(sessions)) for latency in latencies]
+
+
+# Runs every session as an asyncio task; returns the latency of every turn
+async def run_tasks(app, sessions: int, turns: int):
+    async def session(thread_id):
+        config = {"configurable": {"thread_id": thread_id}}
+        latencies = []
+        for turn in range(turns):
+            start = time.perf_counter()
+            await app.ainvoke({"messages": [HumanMessage(content=f"message {turn}")]}, config=config)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    results = await asyncio.gather(*(session(thread_id) for thread_id in range(sessions)))
+    return [latency for latencies in results for latency in latencies]
+
+
+# Runs the load test for one saver on a fresh database; returns (latencies, rows written, seconds)
+def run_saver(name: str, path: str, sessions: int, turns: int, think: float):
+    start = time.perf_counter()
+    if name == "sqlite":
+        conn = sqlite3.connect(path, check_same_thread=False)
+        latencies = run_threads(build_graph(SqliteSaver(conn), think), sessions, turns)
+        elapsed = time.perf_counter() - start
+        conn.close()
+    elif name == "fast":
+        with FastSqliteSaver.from_conn_string(path) as saver:
+            latencies = run_threads(build_graph(saver, think), sessions, turns)
+            elapsed = time.perf_counter() - start
+    elif name == "aio-sqlite":
+        async def main():
+            async with AsyncSqliteSaver.from_conn_string(path) as saver:
+                return await run_tasks(build_graph(saver, think, use_async=True), sessions, turns)
+        latencies = asyncio.run(main())
+        elapsed = time.perf_counter() - start
+    elif name == "fast-async":
+        with FastSqliteSaver.from_conn_string(path) as saver:
+            latencies = asyncio.run(run_tasks(build_graph(saver, think, use_async=True), sessions, turns))
+            elapsed = time.perf_counter() - start
+    else:
+        raise ValueError(f"Unknown saver '{name}'")
+
+    # Checkpoint writes = rows stored in the checkpoints and writes tables
+    with sqlite3.connect(path) as conn:
+        rows = sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("checkpoints", "writes"))
+    return latencies, rows, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the SQLite checkpointers with concurrent chat sessions.")
+    parser.add_argument("--sessions", type=int, default=32, help="Number of concurrent thread_ids")
+    parser.add_argument("--turns", type=int, default=20, help="Turns per session")
+    parser.add_argument("--think", type=float, default=0.0, help="Seconds the fake model takes per answer")
+    parser.add_argument("--savers", nargs="+", choices=SAVERS, default=SAVERS)
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions x {args.turns} turns, think time {args.think * 1000:.0f} ms")
+    print(f"{'saver':<12}{'turns/s':>10}{'writes/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'speedup':>8}")
+    baseline = None
+    for name in args.savers:
+        with tempfile.TemporaryDirectory() as directory:
+            latencies, rows, elapsed = run_saver(name, os.path.join(directory, "checkpoint.sqlite"),
+                                                 args.sessions, args.turns, args.think)
+        writes_per_second = rows / elapsed
+        baseline = baseline or writes_per_second
+        print(f"{name:<12}{len(latencies) / elapsed:>10.1f}{writes_per_second:>11.1f}"
+              f"{percentile(latencies, 0.5) * 1000:>9.1f}{percentile(latencies, 0.99) * 1000:>9.1f}"
+              f"{writes_per_second / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# Benchmark of the rolling-summary memory on long threads
+# Runs one long conversation through the chatbot graph of 4_chat_with_sqlite_checkpointer.py and
+# reports, per turn, the prompt tokens sent to the model, the latency seen by the user and the
+# size of the thread's latest checkpoint. The model is a fake whose latency grows with the prompt
+# (a fixed overhead plus a prefill cost per token), and tokens are estimated as characters / 4.
+#
+# Policies:
+#   full               - the current setup: the whole history on every turn
+#   summary            - SummaryMemory, refreshed inside the graph run
+#   summary-background - SummaryMemory, refreshed on a worker thread after the answer is returned
+#   summary-archive    - background refresh, summarized messages moved out of the checkpoint
+#
+# Usage:
+#   python benchmark_summary_memory.py
+#   python benchmark_summary_memory.py --turns 200 --keep-last 6 --summarize-every 4 --think 0.05
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, StateGraph
+
+from summary_memory import KEEP_LAST_TURNS, SUMMARIZE_EVERY, SqliteMessageArchive, SummaryMemory, SummaryState
+
+POLICIES = ["full", "summary", "summary-background", "summary-archive"]
+
+# A typical user message and answer; each turn adds ~120 tokens to the history
+USER_MESSAGE = "I am planning a trip to {city} in spring. What should I see there and how many days do I need?"
+ANSWER = ("For {city} I would plan three to four days. Start with the old town and the main museums, "
+          "keep a day for a walking tour of the neighbourhoods and the markets, and leave an evening "
+          "for the river or the waterfront. Book the popular sights in advance in spring.")
+CITIES = ["Lisbon", "Porto", "Seville", "Vienna", "Prague", "Krakow", "Ghent", "Bologna", "Lyon", "Edinburgh"]
+
+
+def count_tokens(messages: List[BaseMessage]) -> int:
+    return sum(len(message.content) for message in messages) // 4
+
+
+# Fake model: latency = overhead + prefill per prompt token; summaries stay about 150 words
+class PromptCostChatModel(BaseChatModel):
+    overhead: float = 0.02  # Seconds per call
+    prefill: float = 0.00002  # Seconds per prompt token (50k tokens/s)
+
+    @property
+    def _llm_type(self) -> str:
+        return "prompt-cost"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None,
+                  **kwargs) -> ChatResult:
+        tokens = count_tokens(messages)
+        time.sleep(self.overhead + self.prefill * tokens)
+        prompt = messages[-1].content
+        if prompt.startswith("You maintain the memory"):
+            cities = [city for city in CITIES if city in prompt]
+            content = " ".join(f"The user is planning a spring trip to {city} and got a 3-4 day plan." for city in cities)
+            content = " ".join(content.split()[:150])
+        else:
+            city = next((city for city in CITIES if city in prompt), "the city")
+            content = ANSWER.format(city=city)
+        message = AIMessage(content=content, usage_metadata={
+            "input_tokens": tokens, "output_tokens": len(content) // 4, "total_tokens": tokens + len(content) // 4,
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def build_app(policy: str, llm, saver, memory: Optional[SummaryMemory]):
+    def chatbot(state: SummaryState):
+        prompt = state["messages"] if memory is None else memory.prompt(state)
+        return {"messages": [llm.invoke(prompt)]}
+
+    graph = StateGraph(SummaryState)
+    graph.add_node("chatbot", chatbot)
+    graph.set_entry_point("chatbot")
+    if memory is None:
+        graph.add_edge("chatbot", END)
+    else:
+        graph.add_node("summarize", memory.summarize)
+        graph.add_conditional_edges("chatbot", memory.route, ["summarize", END])
+        graph.add_edge("summarize", END)
+    return graph.compile(checkpointer=saver)
+
+
+def run(policy: str, turns: int, keep_last: int, summarize_every: int, think: float) -> List[dict]:
+    llm = PromptCostChatModel()
+    saver = MemorySaver()
+    memory = None
+    if policy != "full":
+        archive = None
+        if policy == "summary-archive":
+            archive = SqliteMessageArchive(os.path.join(tempfile.mkdtemp(), "archive.sqlite"))
+        memory = SummaryMemory(llm, keep_last=keep_last, summarize_every=summarize_every,
+                               background=policy != "summary", archive=archive)
+    app = build_app(policy, llm, saver, memory)
+    config = {"configurable": {"thread_id": policy}}
+
+    rows = []
+    for turn in range(turns):
+        message = HumanMessage(content=USER_MESSAGE.format(city=CITIES[turn % len(CITIES)]) + f" ({turn})")
+        start = time.perf_counter()
+        if memory is not None and memory.background:
+            memory.wait(policy)  # Only waits if the user answers before the refresh is done
+        result = app.invoke({"messages": [message]}, config=config)
+        latency = time.perf_counter() - start
+        if memory is not None and memory.background:
+            memory.refresh_in_background(app, config)
+        checkpoint = saver.get_tuple(config).checkpoint
+        rows.append({
+            "prompt_tokens": result["messages"][-1].usage_metadata["input_tokens"],
+            "latency_ms": latency * 1000,
+            "checkpoint_kb": len(saver.serde.dumps_typed(checkpoint)[1]) / 1024,
+        })
+        time.sleep(think)  # The user reads the answer and types the next message
+    if memory is not None and memory.background:
+        memory.wait(policy)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens and latency per turn with and without summary memory.")
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--keep-last", type=int, default=KEEP_LAST_TURNS)
+    parser.add_argument("--summarize-every", type=int, default=SUMMARIZE_EVERY)
+    parser.add_argument("--think", type=float, default=0.05, help="Seconds between an answer and the next message")
+    parser.add_argument("--policies", nargs="+", choices=POLICIES, default=POLICIES)
+    args = parser.parse_args()
+
+    marks = [turn for turn in (10, 25, 50, 100, 200, 500, 1000) if turn <= args.turns]
+    for policy in args.policies:
+        rows = run(policy, args.turns, args.keep_last, args.summarize_every, args.think)
+        latencies = sorted(row["latency_ms"] for row in rows)
+        print(f"\n== {policy}: mean {statistics.mean(row['prompt_tokens'] for row in rows):.0f} prompt tokens/turn, "
+              f"latency p50 {latencies[len(latencies) // 2]:.1f} ms, p99 {latencies[int(0.99 * (len(latencies) - 1))]:.1f} ms")
+        print(f"{'turn':>6}{'prompt tokens':>15}{'latency ms':>12}{'checkpoint KB':>15}")
+        for turn in marks:
+            row = rows[turn - 1]
+            print(f"{turn:>6}{row['prompt_tokens']:>15}{row['latency_ms']:>12.1f}{row['checkpoint_kb']:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
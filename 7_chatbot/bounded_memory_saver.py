@@ -0,0 +1,233 @@
+# Memory-bounded in-memory checkpointer
+# MemorySaver keeps every checkpoint of every thread for the life of the process, so a server
+# handling many thread_ids grows without bound. The BoundedMemorySaver is a MemorySaver that:
+# - keeps at most `max_threads` threads and `max_bytes` of serialized checkpoints in memory,
+#   evicting the least recently used threads to one pickle file per thread in `spill_dir`
+# - reloads an evicted thread transparently the next time it is read or written
+# - optionally keeps only the last `keep_last` checkpoints of every thread (and their writes)
+# - reports its footprint and counters with footprint()
+#
+# Without a spill_dir, evicted threads go to a temporary directory owned by the saver, removed by
+# close(), or when the saver is garbage collected or the interpreter exits.
+#
+# Sizes are the bytes of the serialized checkpoints, metadata and pending writes, which is what
+# grows with the conversations (the Python objects holding them add a small constant per entry).
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.memory import MemorySaver
+
+# Default budget
+MAX_THREADS = 1000  # Threads kept in memory
+MAX_BYTES = 256 * 1024 * 1024  # Serialized checkpoint bytes kept in memory
+
+
+class BoundedMemorySaver(MemorySaver):
+    def __init__(
+        self,
+        *,
+        max_threads: Optional[int] = MAX_THREADS,
+        max_bytes: Optional[int] = MAX_BYTES,
+        keep_last: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(**kwargs)
+        # The latest checkpoint needs its parent's writes (pending sends), so keep at least two
+        if keep_last is not None and keep_last < 2:
+            raise ValueError("keep_last must be at least 2")
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.keep_last = keep_last
+        if spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="checkpoints-")
+            self._cleanup = weakref.finalize(self, shutil.rmtree, self.spill_dir, ignore_errors=True)
+        else:
+            self.spill_dir = spill_dir
+            self._cleanup = None  # A directory given by the caller is left in place
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._resident: "OrderedDict[Any, int]" = OrderedDict()  # thread_id -> bytes, least recently used first
+        self._spilled: Dict[Any, str] = {}  # thread_id -> file holding its checkpoints
+        self._bytes = 0  # Total bytes of the threads in memory
+        self.stats = {"evictions": 0, "reloads": 0, "bytes_spilled": 0, "checkpoints_dropped": 0}
+
+    # Removes the temporary spill directory and the threads evicted to it
+    def close(self) -> None:
+        if self._cleanup is not None:
+            with self._lock:
+                self._cleanup()
+                self._spilled.clear()
+
+    # ----- Footprint -----
+
+    def footprint(self) -> dict:
+        with self._lock:
+            return {
+                "threads_in_memory": len(self._resident),
+                "threads_on_disk": len(self._spilled),
+                "bytes_in_memory": self._bytes,
+                **self.stats,
+            }
+
+    def _thread_bytes(self, thread_id) -> int:
+        total = 0
+        for checkpoint_ns, checkpoints in self.storage.get(thread_id, {}).items():
+            for checkpoint_id, ((_, checkpoint), (_, metadata), _) in checkpoints.items():
+                total += len(checkpoint) + len(metadata)
+                for _, _, (_, value), _ in self.writes.get((thread_id, checkpoint_ns, checkpoint_id), {}).values():
+                    total += len(value)
+        return total
+
+    # ----- LRU bookkeeping -----
+
+    # Marks a thread as the most recently used, reloading it from disk if it was evicted
+    def _touch(self, thread_id) -> None:
+        if thread_id in self._spilled:
+            self._reload(thread_id)
+        if thread_id not in self._resident:
+            self._resident[thread_id] = 0
+        self._resident.move_to_end(thread_id)
+
+    # Updates the size of a thread after a write, applies retention and evicts other threads if needed
+    def _account(self, thread_id) -> None:
+        if self.keep_last is not None:
+            self._retain(thread_id)
+        self._resize(thread_id)
+        self._enforce_budget(keep=thread_id)
+
+    def _resize(self, thread_id) -> None:
+        size = self._thread_bytes(thread_id)
+        self._bytes += size - self._resident[thread_id]
+        self._resident[thread_id] = size
+
+    def _over_budget(self) -> bool:
+        if self.max_threads is not None and len(self._resident) > self.max_threads:
+            return True
+        return self.max_bytes is not None and self._bytes > self.max_bytes
+
+    def _enforce_budget(self, keep) -> None:
+        while self._over_budget():
+            victim = next((thread_id for thread_id in self._resident if thread_id != keep), None)
+            if victim is None:
+                return  # Only the active thread is left; it is never evicted
+            self._evict(victim)
+
+    # Drops all but the last keep_last checkpoints of every namespace of a thread
+    def _retain(self, thread_id) -> None:
+        for checkpoint_ns, checkpoints in self.storage.get(thread_id, {}).items():
+            if len(checkpoints) <= self.keep_last:
+                continue
+            for checkpoint_id in sorted(checkpoints)[:-self.keep_last]:  # Checkpoint ids sort by time
+                del checkpoints[checkpoint_id]
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+                self.stats["checkpoints_dropped"] += 1
+
+    # ----- Disk spill -----
+
+    def _spill_path(self, thread_id) -> str:
+        digest = hashlib.sha1(repr(thread_id).encode()).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.pkl")
+
+    # Moves a thread's checkpoints and writes to its file and out of memory
+    def _evict(self, thread_id) -> None:
+        size = self._resident.pop(thread_id)
+        self._bytes -= size
+        namespaces = self.storage.pop(thread_id, {})
+        if not any(namespaces.values()):
+            return  # Nothing was ever saved for this thread (e.g. a read of an unknown thread)
+        writes = {}
+        for checkpoint_ns, checkpoints in namespaces.items():
+            for checkpoint_id in checkpoints:
+                key = (thread_id, checkpoint_ns, checkpoint_id)
+                if key in self.writes:
+                    writes[key] = self.writes.pop(key)
+        path = self._spill_path(thread_id)
+        with open(path, "wb") as file:
+            pickle.dump({"thread_id": thread_id, "storage": dict(namespaces), "writes": writes}, file)
+        self._spilled[thread_id] = path
+        self.stats["evictions"] += 1
+        self.stats["bytes_spilled"] += size
+
+    def _reload(self, thread_id) -> None:
+        path = self._spilled.pop(thread_id)
+        with open(path, "rb") as file:
+            saved = pickle.load(file)
+        self.storage[thread_id].update(saved["storage"])
+        self.writes.update(saved["writes"])
+        os.remove(path)
+        self._resident[thread_id] = 0
+        self._resize(thread_id)
+        self.stats["reloads"] += 1
+
+    # ----- Checkpointer API (the async methods of MemorySaver call these) -----
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self._touch(thread_id)
+            checkpoint_tuple = super().get_tuple(config)
+            self._enforce_budget(keep=thread_id)  # A reload may have pushed the total over budget
+            return checkpoint_tuple
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if config is not None:
+            thread_ids = [config["configurable"]["thread_id"]]
+        else:
+            with self._lock:
+                thread_ids = [*self._resident, *self._spilled]  # Evicted threads are listed too
+        for thread_id in thread_ids:
+            if limit is not None and limit <= 0:
+                return
+            thread_config = config or {"configurable": {"thread_id": thread_id}}
+            with self._lock:
+                self._touch(thread_id)
+                checkpoints = list(super().list(thread_config, filter=filter, before=before, limit=limit))
+                self._enforce_budget(keep=thread_id)
+            if limit is not None:
+                limit -= len(checkpoints)
+            yield from checkpoints
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self._touch(thread_id)
+            saved_config = super().put(config, checkpoint, metadata, new_versions)
+            self._account(thread_id)
+            return saved_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self._touch(thread_id)
+            super().put_writes(config, writes, task_id, task_path)
+            self._account(thread_id)
@@ -0,0 +1,423 @@
+# Concurrent multi-session chat server
+# Serves the chatbot graph of this folder to many users at once, instead of one blocking input()
+# loop per process. It only uses the standard library (asyncio): HTTP with Server-Sent Events.
+#
+#   POST /chat/<session_id>   body {"message": "..."}   -> text/event-stream
+#       event: token   data: {"content": "..."}         one event per streamed token
+#       event: done    data: {"content": "<answer>", "thread_id": "..."}
+#       event: error   data: {"error": "..."}
+#   GET  /health                                        -> {"status": "ok"}
+#   GET  /stats                                         -> counters, current load and tool latencies
+#
+# - Every session is one thread_id of the checkpointer, so each conversation keeps its history
+# - The messages of one session run one at a time (a lock per thread_id), so two messages sent
+#   together never race on the same checkpoint
+# - Backpressure: at most `max_active` graph runs at once and `max_pending` waiting for a slot,
+#   beyond which the server answers 503 with Retry-After; a session may have `max_queued_per_session`
+#   messages in flight (429 beyond). Tokens are pulled from astream only as fast as the client reads.
+#
+# Usage:
+#   python chat_server.py serve --port 8000                       # ChatGroq, in-memory checkpointer
+#   python chat_server.py serve --model fake --checkpointer sqlite
+#   python chat_server.py load --sessions 200 --concurrency 50    # in-process server, fake model
+#   python chat_server.py load --url http://127.0.0.1:8000 --sessions 50
+#   curl -N -X POST localhost:8000/chat/alice -d '{"message": "Hi!"}'
+import argparse
+import asyncio
+import json
+import time
+import weakref
+from collections import Counter
+from typing import Annotated, AsyncIterator, List, Optional, TypedDict
+from urllib.parse import urlparse
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.graph import END, StateGraph
+
+from indexed_messages import IndexedMessages
+
+# Default server settings
+MAX_ACTIVE = 64  # Graph runs at the same time
+MAX_PENDING = 256  # Requests waiting for a free slot before new ones are rejected
+MAX_QUEUED_PER_SESSION = 4  # Messages of one session in flight before new ones are rejected
+WRITE_TIMEOUT = 30.0  # Seconds a client may stall reading before it is disconnected
+MAX_BODY = 64 * 1024  # Largest request body accepted
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 429: "Too Many Requests", 503: "Service Unavailable"}
+
+
+# A fake chat model for local testing: it answers "You said: <message>", streaming one word per token
+class EchoChatModel(BaseChatModel):
+    first_token_delay: float = 0.05  # Seconds before the first token (the model's "thinking")
+    token_delay: float = 0.01  # Seconds between tokens
+
+    @property
+    def _llm_type(self) -> str:
+        return "echo"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        return "You said: " + str(messages[-1].content)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.first_token_delay)
+        for index, word in enumerate(self._reply(messages).split(" ")):
+            if index:
+                await asyncio.sleep(self.token_delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if index == 0 else " " + word))
+
+    # The tools graph binds tools; the echo model never calls them
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class BasicChatState(TypedDict):
+    messages: Annotated[list, IndexedMessages]
+
+
+# Builds the chatbot graph of 1_basic_chatbot.py ("basic") or 2_chatbot_with_tools.py ("tools").
+# The node awaits the model, so a slow answer never blocks the event loop.
+def build_app(llm: BaseChatModel, checkpointer, graph: str = "basic", tool_stats=None):
+    model = llm
+    builder = StateGraph(BasicChatState)
+    if graph == "tools":
+        from langchain_community.tools.tavily_search import TavilySearchResults
+        from langgraph.prebuilt import tools_condition
+        from parallel_tool_node import ParallelToolNode
+
+        tools = [TavilySearchResults(max_results=2)]
+        model = llm.bind_tools(tools=tools)
+        builder.add_node("tool_node", ParallelToolNode(tools=tools, stats=tool_stats))
+        builder.add_conditional_edges("chatbot", tools_condition, {"tools": "tool_node", END: END})
+        builder.add_edge("tool_node", "chatbot")
+    else:
+        builder.add_edge("chatbot", END)
+
+    async def chatbot(state: BasicChatState):
+        return {"messages": [await model.ainvoke(state["messages"])]}
+
+    builder.add_node("chatbot", chatbot)
+    builder.set_entry_point("chatbot")
+    return builder.compile(checkpointer=checkpointer)
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[dict] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+# Reads one HTTP request: returns (method, path, headers, body)
+async def read_request(reader: asyncio.StreamReader):
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise HttpError(400, "Request headers too large")
+    request_line, *header_lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, path, _ = request_line.split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+    headers = {}
+    for line in header_lines:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(400, "Invalid Content-Length")
+    if length > MAX_BODY:
+        raise HttpError(413, f"Request body larger than {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+def response_head(status: int, content_type: str, headers: Optional[dict] = None, length: Optional[int] = None) -> bytes:
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}", f"Content-Type: {content_type}", "Connection: close"]
+    if length is not None:
+        lines.append(f"Content-Length: {length}")
+    if content_type == "text/event-stream":
+        lines.append("Cache-Control: no-cache")
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+
+class ChatServer:
+    def __init__(self, app, graph: str = "basic", max_active: int = MAX_ACTIVE, max_pending: int = MAX_PENDING,
+                 max_queued_per_session: int = MAX_QUEUED_PER_SESSION, write_timeout: float = WRITE_TIMEOUT,
+                 tool_stats=None):
+        self.app = app
+        self.graph = graph
+        self.tool_stats = tool_stats  # Per-tool latency histograms of the tools graph, shown in /stats
+        self.max_pending = max_pending
+        self.max_queued_per_session = max_queued_per_session
+        self.write_timeout = write_timeout
+        self._slots = asyncio.Semaphore(max_active)
+        self._pending = 0  # Requests waiting for a slot
+        self._active = 0  # Graph runs in progress
+        self._queued = Counter()  # thread_id -> messages in flight
+        self._thread_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.stats = Counter()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port, backlog=1024)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, _, body = await read_request(reader)
+            self.stats["requests"] += 1
+            if path == "/health":
+                await self._send_json(writer, 200, {"status": "ok"})
+            elif path == "/stats":
+                await self._send_json(writer, 200, self.snapshot())
+            elif path.startswith("/chat/"):
+                if method != "POST":
+                    raise HttpError(405, "Use POST")
+                session_id = path[len("/chat/"):].strip("/")
+                try:
+                    message = json.loads(body or b"{}")["message"]
+                except (ValueError, KeyError, TypeError):
+                    raise HttpError(400, 'Body must be JSON like {"message": "..."}')
+                if not session_id or not isinstance(message, str):
+                    raise HttpError(400, "A session id and a text message are required")
+                await self.chat(session_id, message, writer)
+            else:
+                raise HttpError(404, f"No route for {path}")
+        except HttpError as error:
+            self.stats["rejected" if error.status in (429, 503) else "bad_requests"] += 1
+            await self._send_json(writer, error.status, {"error": str(error)}, error.headers)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.TimeoutError):
+            self.stats["disconnects"] += 1
+        finally:
+            writer.close()
+
+    def snapshot(self) -> dict:
+        snapshot = {**self.stats, "active": self._active, "pending": self._pending, "sessions_busy": len(self._queued)}
+        if self.tool_stats is not None:
+            snapshot["tools"] = self.tool_stats.snapshot()
+        return snapshot
+
+    # Runs one message of a session: admission control, then the per-thread lock, then a slot
+    async def chat(self, session_id: str, message: str, writer: asyncio.StreamWriter) -> None:
+        thread_id = f"{self.graph}:{session_id}"
+        if self._queued[thread_id] >= self.max_queued_per_session:
+            raise HttpError(429, "Too many messages in flight for this session", {"Retry-After": "1"})
+        if self._pending >= self.max_pending:
+            raise HttpError(503, "Server busy", {"Retry-After": "1"})
+
+        writer.write(response_head(200, "text/event-stream"))
+        self._queued[thread_id] += 1
+        lock = self._thread_locks.setdefault(thread_id, asyncio.Lock())
+        try:
+            async with lock:  # One run per thread_id at a time
+                self._pending += 1
+                try:
+                    await self._slots.acquire()
+                finally:
+                    self._pending -= 1
+                self._active += 1
+                try:
+                    await self._run(thread_id, message, writer)
+                finally:
+                    self._active -= 1
+                    self._slots.release()
+        finally:
+            self._queued[thread_id] -= 1
+            if not self._queued[thread_id]:
+                del self._queued[thread_id]
+
+    # Streams the tokens of the chatbot node to the client as they are generated
+    async def _run(self, thread_id: str, message: str, writer: asyncio.StreamWriter) -> None:
+        config = {"configurable": {"thread_id": thread_id}}
+        answer = []
+        try:
+            async for chunk, metadata in self.app.astream(
+                {"messages": [HumanMessage(content=message)]}, config, stream_mode="messages"
+            ):
+                if metadata.get("langgraph_node") != "chatbot" or not isinstance(chunk, AIMessage) or not chunk.content:
+                    continue
+                answer.append(chunk.content)
+                self.stats["tokens"] += 1
+                await self._send_event(writer, "token", {"content": chunk.content})
+        except (ConnectionError, asyncio.TimeoutError):
+            raise  # The client is gone: stop the run
+        except Exception as error:
+            self.stats["errors"] += 1
+            await self._send_event(writer, "error", {"error": str(error)})
+            return
+        self.stats["completed"] += 1
+        await self._send_event(writer, "done", {"content": "".join(answer), "thread_id": thread_id})
+
+    # Writing waits for the client to drain its buffer: a slow reader slows down its own stream only
+    async def _send_event(self, writer: asyncio.StreamWriter, event: str, data: dict) -> None:
+        writer.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+        await asyncio.wait_for(writer.drain(), self.write_timeout)
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, data: dict, headers: Optional[dict] = None) -> None:
+        body = json.dumps(data).encode()
+        writer.write(response_head(status, "application/json", headers, len(body)) + body)
+        try:
+            await asyncio.wait_for(writer.drain(), self.write_timeout)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+
+
+# ----- Load generator -----
+
+# Sends one message and reads the event stream: returns (status, seconds to first token, seconds in total)
+async def send_message(host: str, port: int, session_id: str, message: str):
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        body = json.dumps({"message": message}).encode()
+        writer.write(
+            f"POST /chat/{session_id} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass  # Skip the headers
+        first_token, event = None, None
+        async for line in reader:
+            line = line.decode().rstrip("\n")
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+                if event == "token" and first_token is None:
+                    first_token = time.perf_counter() - start
+                elif event == "error":
+                    status = 500
+        return status, first_token, time.perf_counter() - start
+    finally:
+        writer.close()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else float("nan")
+
+
+# Simulates `sessions` users, `concurrency` of them active at once, each sending `turns` messages
+async def run_load(host: str, port: int, sessions: int, concurrency: int, turns: int) -> dict:
+    gate = asyncio.Semaphore(concurrency)
+    first_tokens, latencies, statuses = [], [], Counter()
+
+    async def user(index: int):
+        async with gate:
+            for turn in range(turns):
+                try:
+                    status, first_token, latency = await send_message(host, port, f"user-{index}", f"message {turn} from user {index}")
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    statuses["connection error"] += 1
+                    continue
+                statuses[status] += 1
+                if status == 200:
+                    latencies.append(latency)
+                    if first_token is not None:
+                        first_tokens.append(first_token)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(index) for index in range(sessions)))
+    elapsed = time.perf_counter() - start
+    return {
+        "sessions_per_s": sessions / elapsed,
+        "messages_per_s": sum(statuses.values()) / elapsed,
+        "ttft_p50_ms": percentile(first_tokens, 0.5) * 1000,
+        "ttft_p95_ms": percentile(first_tokens, 0.95) * 1000,
+        "ttft_p99_ms": percentile(first_tokens, 0.99) * 1000,
+        "latency_p50_ms": percentile(latencies, 0.5) * 1000,
+        "latency_p99_ms": percentile(latencies, 0.99) * 1000,
+        "statuses": dict(statuses),
+        "seconds": elapsed,
+    }
+
+
+# ----- Entry points -----
+
+def make_llm(name: str) -> BaseChatModel:
+    if name == "fake":
+        return EchoChatModel()
+    from dotenv import load_dotenv
+    from langchain_groq import ChatGroq
+
+    load_dotenv()
+    return ChatGroq(model="llama-3.1-8b-instant")
+
+
+def make_checkpointer(name: str):
+    if name == "sqlite":
+        from fast_sqlite_saver import FastSqliteSaver
+        return FastSqliteSaver("checkpoint.sqlite")
+    from bounded_memory_saver import BoundedMemorySaver
+    return BoundedMemorySaver()
+
+
+def make_server(args) -> ChatServer:
+    tool_stats = None
+    if args.graph == "tools":
+        from parallel_tool_node import ToolLatencyStats
+        tool_stats = ToolLatencyStats()
+    app = build_app(make_llm(args.model), make_checkpointer(args.checkpointer), args.graph, tool_stats)
+    return ChatServer(app, graph=args.graph, max_active=args.max_active, max_pending=args.max_pending,
+                      tool_stats=tool_stats)
+
+
+async def serve(args) -> None:
+    server = await make_server(args).start(args.host, args.port)
+    print(f"Serving the '{args.graph}' chatbot on http://{args.host}:{args.port} (model: {args.model})")
+    async with server:
+        await server.serve_forever()
+
+
+async def load(args) -> None:
+    server = None
+    if args.url:
+        url = urlparse(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        # No URL: start a server with the fake model in this process
+        args.model = "fake"
+        server = await make_server(args).start("127.0.0.1", 0)
+        host, port = "127.0.0.1", server.sockets[0].getsockname()[1]
+    try:
+        result = await run_load(host, port, args.sessions, args.concurrency, args.turns)
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+    print(f"{args.sessions} sessions x {args.turns} messages, {args.concurrency} concurrent, in {result['seconds']:.2f}s")
+    print(f"sessions/s: {result['sessions_per_s']:.1f}   messages/s: {result['messages_per_s']:.1f}")
+    print(f"time to first token: p50 {result['ttft_p50_ms']:.1f} ms, p95 {result['ttft_p95_ms']:.1f} ms, p99 {result['ttft_p99_ms']:.1f} ms")
+    print(f"message latency: p50 {result['latency_p50_ms']:.1f} ms, p99 {result['latency_p99_ms']:.1f} ms")
+    print(f"responses: {result['statuses']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the chatbot to many sessions over HTTP + SSE, or load test it.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("serve", "load"):
+        command = commands.add_parser(name)
+        command.add_argument("--graph", choices=["basic", "tools"], default="basic")
+        command.add_argument("--checkpointer", choices=["memory", "sqlite"], default="memory")
+        command.add_argument("--max-active", type=int, default=MAX_ACTIVE)
+        command.add_argument("--max-pending", type=int, default=MAX_PENDING)
+    commands.choices["serve"].add_argument("--host", default="127.0.0.1")
+    commands.choices["serve"].add_argument("--port", type=int, default=8000)
+    commands.choices["serve"].add_argument("--model", choices=["groq", "fake"], default="groq")
+    commands.choices["load"].add_argument("--url", help="Server to load test (default: an in-process server with the fake model)")
+    commands.choices["load"].add_argument("--sessions", type=int, default=200)
+    commands.choices["load"].add_argument("--concurrency", type=int, default=50)
+    commands.choices["load"].add_argument("--turns", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(serve(args) if args.command == "serve" else load(args))
+
+
+if __name__ == "__main__":
+    main()
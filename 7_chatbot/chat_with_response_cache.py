@@ -0,0 +1,55 @@
+# Basic chatbot with the response cache in front of the model
+# Every question starts a new conversation (as in 1_basic_chatbot.py), which is the FAQ-style
+# traffic the cache is made for: a repeated question, or with CACHE_MODE = "semantic" a rephrased
+# one, is answered from "response_cache.sqlite" without calling the model.
+from typing import TypedDict, Annotated
+from langgraph.graph import add_messages, StateGraph, END
+from langchain_groq import ChatGroq
+from langchain_core.messages import HumanMessage
+from dotenv import load_dotenv
+from response_cache import ResponseCache
+
+# Load environment variables from a .env file
+load_dotenv()
+
+# "exact" reuses answers to the same question (ignoring case and whitespace),
+# "semantic" also reuses the answer of a similar earlier question
+CACHE_MODE = "semantic"
+
+# Initialize the response cache and the ChatGroq model behind it
+cache = ResponseCache(mode=CACHE_MODE)
+llm = ChatGroq(model="llama-3.1-8b-instant", cache=cache)
+
+# Define the structure of the chat state using TypedDict
+class BasicChatState(TypedDict):
+    messages: Annotated[list, add_messages]
+
+# Define the chatbot function that answers the current messages
+def chatbot(state: BasicChatState):
+    return {
+        "messages": [llm.invoke(state["messages"])]
+    }
+
+# Create the graph: a single chatbot node
+graph = StateGraph(BasicChatState)
+graph.add_node("chatbot", chatbot)
+graph.set_entry_point("chatbot")
+graph.add_edge("chatbot", END)
+app = graph.compile()
+
+# Main loop for interacting with the user
+while True:
+    user_input = input("User: ")
+    if(user_input in ["exit", "end"]):
+        break
+    else:
+        # A hit is any lookup that did not add a miss
+        misses = cache.misses
+        result = app.invoke({
+            "messages": [HumanMessage(content=user_input)]
+        })
+        source = "model" if cache.misses > misses else "cache"
+        print(f"AI ({source}): " + result["messages"][-1].content)
+
+# Print the cache statistics of the session
+print(cache.stats())
@@ -0,0 +1,76 @@
+# Chatbot with rolling-summary memory for long threads
+# Instead of the whole history, the model gets a running summary plus the last KEEP_LAST_TURNS
+# turns, so prompts stay short however old the thread is (see benchmark_summary_memory.py).
+# The summary is refreshed every SUMMARIZE_EVERY turns, in the background after the answer is
+# printed. With ARCHIVE_SUMMARIZED, summarized messages move from the checkpoints to "archive.sqlite".
+from langgraph.graph import StateGraph, END
+from langchain_groq import ChatGroq
+from langchain_core.messages import HumanMessage
+from dotenv import load_dotenv
+from langgraph.checkpoint.memory import MemorySaver
+from summary_memory import SqliteMessageArchive, SummaryMemory, SummaryState
+
+load_dotenv()
+
+# Settings of the summary memory
+KEEP_LAST_TURNS = 4
+SUMMARIZE_EVERY = 4
+ARCHIVE_SUMMARIZED = False
+
+# Initialize the MemorySaver for in-memory checkpointing
+memory = MemorySaver()
+
+# Set up the language model
+llm = ChatGroq(model="llama-3.1-8b-instant")
+
+# The memory policy, writing its summaries with the same model
+summary_memory = SummaryMemory(
+    llm,
+    keep_last=KEEP_LAST_TURNS,
+    summarize_every=SUMMARIZE_EVERY,
+    background=True,
+    archive=SqliteMessageArchive("archive.sqlite") if ARCHIVE_SUMMARIZED else None,
+)
+
+# The model gets the summary and the latest turns, not the whole history
+def chatbot(state: SummaryState):
+    return {
+       "messages": [llm.invoke(summary_memory.prompt(state))]
+    }
+
+# Create a state graph for managing chatbot states
+graph = StateGraph(SummaryState)
+graph.add_node("chatbot", chatbot)
+graph.add_edge("chatbot", END)
+
+# The "summarize" node folds older turns into the summary. It is run in the background after
+# each answer, through refresh_in_background(), which records its update as this node's.
+graph.add_node("summarize", summary_memory.summarize)
+graph.add_edge("summarize", END)
+
+graph.set_entry_point("chatbot")
+
+# Compile the graph into an application with the memory checkpointer
+app = graph.compile(checkpointer=memory)
+
+config = {"configurable": {
+    "thread_id": 1
+}}
+
+# Main loop for user interaction
+while True:
+    user_input = input("User: ")
+    if(user_input in ["exit", "end"]):
+        break
+    else:
+        # Wait for the summary refresh of the previous turn, if it is still running
+        summary_memory.wait(config["configurable"]["thread_id"])
+
+        result = app.invoke({
+            "messages": [HumanMessage(content=user_input)]
+        }, config=config)
+
+        print("AI: " + result["messages"][-1].content)
+
+        # Refresh the summary while the user reads the answer
+        summary_memory.refresh_in_background(app, config)
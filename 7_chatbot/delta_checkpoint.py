@@ -0,0 +1,336 @@
+# Compact checkpoints for message-heavy state
+# Every checkpoint of BasicChatState holds the whole `messages` list, so a thread of N turns
+# stores (and serializes) O(N^2) messages. Two independent pieces reduce that:
+#
+# - DeltaCheckpointSaver wraps any checkpointer (MemorySaver, SqliteSaver, FastSqliteSaver, ...)
+#   and stores list channels as a delta against the parent checkpoint: the length of the common
+#   prefix and the messages appended or changed after it. Every `snapshot_every` checkpoints the
+#   full list is stored again, so rebuilding a state never walks a long chain. Decoded lists are
+#   kept in a small LRU cache, so reading the latest state (what every invoke does) is a cache hit.
+#
+# - CompressedSerializer wraps the serializer (msgpack by default) and compresses every blob
+#   larger than `min_size` with zstd, or zlib when the zstandard package is not installed.
+#
+# Usage:
+#   memory = DeltaCheckpointSaver(SqliteSaver(conn, serde=CompressedSerializer()))
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always available
+    zstandard = None
+
+# Default settings
+SNAPSHOT_EVERY = 20  # A full copy of the list is stored every N checkpoints of a thread
+CACHE_SIZE = 1024  # Number of decoded lists kept in memory
+MIN_COMPRESS_SIZE = 256  # Blobs smaller than this are stored uncompressed
+
+# Marks a channel value stored as a delta: {DELTA_KEY: base checkpoint id, "keep": n, "append": [...]}
+DELTA_KEY = "__delta_of__"
+
+
+def is_delta(value: Any) -> bool:
+    return isinstance(value, dict) and DELTA_KEY in value
+
+
+# Length of the common prefix of two message lists (same object, or equal messages)
+def common_prefix(old: list, new: list) -> int:
+    length = min(len(old), len(new))
+    for index in range(length):
+        if old[index] is not new[index] and old[index] != new[index]:
+            return index
+    return length
+
+
+class DeltaCheckpointSaver(BaseCheckpointSaver):
+    def __init__(
+        self,
+        saver: BaseCheckpointSaver,
+        channels: Sequence[str] = ("messages",),
+        snapshot_every: int = SNAPSHOT_EVERY,
+        cache_size: int = CACHE_SIZE,
+    ) -> None:
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.channels = set(channels)
+        self.snapshot_every = snapshot_every
+        self.cache_size = cache_size
+        # (thread_id, checkpoint_ns, checkpoint_id, channel) -> (decoded list, deltas since the last snapshot)
+        self._cache: "OrderedDict[tuple, Tuple[list, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"snapshots": 0, "deltas": 0, "cache_hits": 0, "fetches": 0}
+
+    @property
+    def config_specs(self):
+        return self.saver.config_specs
+
+    # ----- Cache of decoded lists -----
+
+    def _cached(self, key: tuple) -> Optional[Tuple[list, int]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+            return entry
+
+    def _remember(self, key: tuple, value: list, depth: int) -> None:
+        with self._lock:
+            self._cache[key] = (value, depth)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # ----- Encoding -----
+
+    # Replaces the list channels of a checkpoint by deltas against the parent checkpoint
+    # (a full snapshot when the parent is unknown or the chain reached snapshot_every)
+    def _encode(self, config: RunnableConfig, checkpoint: Checkpoint) -> Checkpoint:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        values = dict(checkpoint["channel_values"])
+
+        for channel in self.channels:
+            value = values.get(channel)
+            if not isinstance(value, list):
+                continue
+            parent = self._cached((thread_id, checkpoint_ns, parent_id, channel)) if parent_id else None
+            depth = 0
+            if parent is not None and parent[1] + 1 < self.snapshot_every:
+                keep = common_prefix(parent[0], value)
+                values[channel] = {DELTA_KEY: parent_id, "keep": keep, "append": value[keep:]}
+                depth = parent[1] + 1
+                self.stats["deltas"] += 1
+            else:
+                self.stats["snapshots"] += 1
+            self._remember((thread_id, checkpoint_ns, checkpoint["id"], channel), list(value), depth)
+        return {**checkpoint, "channel_values": values}
+
+    # ----- Decoding -----
+
+    # Applies a chain of deltas (newest first) on top of a base list, caching every list rebuilt on the way
+    @staticmethod
+    def _apply(chain: list, base: list, depth: int, remember) -> list:
+        for key, delta in reversed(chain):
+            base = base[:delta["keep"]] + delta["append"]
+            depth += 1
+            remember(key, base, depth)
+        return base
+
+    # Walks back from a delta to the closest cached or full value, then rebuilds the list
+    def _resolve(self, key: tuple, delta: dict) -> list:
+        thread_id, checkpoint_ns, _, channel = key
+        chain = [(key, delta)]
+        while True:
+            base_key = (thread_id, checkpoint_ns, chain[-1][1][DELTA_KEY], channel)
+            cached = self._cached(base_key)
+            if cached is not None:
+                return self._apply(chain, *cached, self._remember)
+            self.stats["fetches"] += 1
+            parent = self.saver.get_tuple(self._config(base_key))
+            value = self._base_value(parent, base_key)
+            if not is_delta(value):
+                self._remember(base_key, value, 0)
+                return self._apply(chain, value, 0, self._remember)
+            chain.append((base_key, value))
+
+    async def _aresolve(self, key: tuple, delta: dict) -> list:
+        thread_id, checkpoint_ns, _, channel = key
+        chain = [(key, delta)]
+        while True:
+            base_key = (thread_id, checkpoint_ns, chain[-1][1][DELTA_KEY], channel)
+            cached = self._cached(base_key)
+            if cached is not None:
+                return self._apply(chain, *cached, self._remember)
+            self.stats["fetches"] += 1
+            parent = await self.saver.aget_tuple(self._config(base_key))
+            value = self._base_value(parent, base_key)
+            if not is_delta(value):
+                self._remember(base_key, value, 0)
+                return self._apply(chain, value, 0, self._remember)
+            chain.append((base_key, value))
+
+    @staticmethod
+    def _config(key: tuple) -> RunnableConfig:
+        thread_id, checkpoint_ns, checkpoint_id, _ = key
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}}
+
+    @staticmethod
+    def _base_value(parent: Optional[CheckpointTuple], key: tuple) -> Any:
+        if parent is None:
+            raise KeyError(f"Checkpoint {key[2]} of thread {key[0]} is missing: cannot rebuild channel '{key[3]}'")
+        return parent.checkpoint["channel_values"].get(key[3])
+
+    # Splits the channels of a stored checkpoint into plain values and deltas to resolve
+    def _split(self, checkpoint_tuple: CheckpointTuple):
+        configurable = checkpoint_tuple.config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = checkpoint_tuple.checkpoint["id"]
+        values = dict(checkpoint_tuple.checkpoint["channel_values"])
+        deltas = {}
+        for channel, value in values.items():
+            key = (thread_id, checkpoint_ns, checkpoint_id, channel)
+            if is_delta(value):
+                deltas[channel] = (key, value)
+            elif channel in self.channels and isinstance(value, list):
+                self._remember(key, list(value), 0)  # A snapshot the next put can build on
+        return values, deltas
+
+    @staticmethod
+    def _with_values(checkpoint_tuple: CheckpointTuple, values: dict) -> CheckpointTuple:
+        return checkpoint_tuple._replace(checkpoint={**checkpoint_tuple.checkpoint, "channel_values": values})
+
+    def _decode(self, checkpoint_tuple: Optional[CheckpointTuple]) -> Optional[CheckpointTuple]:
+        if checkpoint_tuple is None:
+            return None
+        values, deltas = self._split(checkpoint_tuple)
+        for channel, (key, delta) in deltas.items():
+            cached = self._cached(key)
+            values[channel] = list(cached[0] if cached is not None else self._resolve(key, delta))
+        return self._with_values(checkpoint_tuple, values)
+
+    async def _adecode(self, checkpoint_tuple: Optional[CheckpointTuple]) -> Optional[CheckpointTuple]:
+        if checkpoint_tuple is None:
+            return None
+        values, deltas = self._split(checkpoint_tuple)
+        for channel, (key, delta) in deltas.items():
+            cached = self._cached(key)
+            values[channel] = list(cached[0] if cached is not None else await self._aresolve(key, delta))
+        return self._with_values(checkpoint_tuple, values)
+
+    # ----- Checkpointer API -----
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self._decode(self.saver.get_tuple(config))
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        # Read the whole listing first: decoding may fetch parents, and savers like SqliteSaver
+        # hold their lock while a listing is being iterated
+        checkpoint_tuples = list(self.saver.list(config, filter=filter, before=before, limit=limit))
+        for checkpoint_tuple in checkpoint_tuples:
+            yield self._decode(checkpoint_tuple)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.saver.put(config, self._encode(config, checkpoint), metadata, new_versions)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.saver.put_writes(config, writes, task_id, task_path)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await self._adecode(await self.saver.aget_tuple(config))
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        checkpoint_tuples = [item async for item in self.saver.alist(config, filter=filter, before=before, limit=limit)]
+        for checkpoint_tuple in checkpoint_tuples:
+            yield await self._adecode(checkpoint_tuple)
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await self.saver.aput(config, self._encode(config, checkpoint), metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await self.saver.aput_writes(config, writes, task_id, task_path)
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+
+# Serializer compressing the blobs of another serializer (JsonPlusSerializer, i.e. msgpack, by default).
+# The codec is recorded in the type ("msgpack+zstd"), so compressed and plain blobs can be mixed and
+# checkpoints written before compression was enabled stay readable.
+class CompressedSerializer(SerializerProtocol):
+    def __init__(self, serde: Optional[SerializerProtocol] = None, codec: Optional[str] = None,
+                 level: int = 3, min_size: int = MIN_COMPRESS_SIZE):
+        self.serde = serde or JsonPlusSerializer()
+        self.codec = codec or ("zstd" if zstandard is not None else "zlib")
+        if self.codec == "zstd" and zstandard is None:
+            raise ImportError("The zstd codec needs the zstandard package: pip install zstandard")
+        self.level = level
+        self.min_size = min_size
+        self._local = threading.local()  # zstd (de)compressors are not thread safe
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == "zlib":
+            return zlib.compress(data, self.level)
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return self._local.compressor.compress(data)
+
+    def _decompress(self, codec: str, data: bytes) -> bytes:
+        if codec == "zlib":
+            return zlib.decompress(data)
+        if not hasattr(self._local, "decompressor"):
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local.decompressor.decompress(data)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if len(data) < self.min_size:
+            return type_, data
+        return f"{type_}+{self.codec}", self._compress(data)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        type_, _, codec = type_.partition("+")
+        if codec:
+            payload = self._decompress(codec, payload)
+        return self.serde.loads_typed((type_, payload))
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.serde.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.serde.loads(data)
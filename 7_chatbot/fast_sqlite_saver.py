@@ -0,0 +1,319 @@
+# High-throughput SQLite checkpointer for serving many chat sessions at once
+# The stock SqliteSaver shares one connection behind one lock, so every read waits for every
+# write and every checkpoint pays its own synchronous commit. The FastSqliteSaver instead:
+# - opens the database in WAL mode with synchronous=NORMAL, so readers never block the writer
+#   and commits do not wait for an fsync (a power loss can drop the latest commits, but the
+#   database is never corrupted)
+# - serves reads (get_tuple / list) from a pool of reader connections
+# - funnels every write through a single writer thread, which group-commits all the checkpoint
+#   writes arriving within a short time window (or up to a batch size) in one transaction
+# - implements the async methods as well, without blocking the event loop
+#
+# put() and put_writes() return once their batch is committed, so a checkpoint can always be
+# read back right after it was saved, exactly like with the SqliteSaver.
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+# Default settings of the saver
+READERS = 4  # Number of pooled reader connections
+BATCH_WINDOW = 0.002  # Seconds the writer waits for more writes before committing a batch
+BATCH_SIZE = 64  # Maximum number of writes committed in one transaction
+BUSY_TIMEOUT_MS = 5000  # How long a connection waits for a lock held by another process
+
+# The statements of SqliteSaver.put and SqliteSaver.put_writes
+INSERT_CHECKPOINT = (
+    "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+REPLACE_WRITES = (
+    "INSERT OR REPLACE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+IGNORE_WRITES = REPLACE_WRITES.replace("INSERT OR REPLACE", "INSERT OR IGNORE")
+
+
+# Opens a connection in autocommit mode (transactions are started explicitly) with WAL journaling
+def connect(path: str, read_only: bool = False) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    if read_only:
+        conn.execute("PRAGMA query_only=1")
+    else:
+        conn.execute("PRAGMA journal_mode=WAL")  # Persistent: readers opened later use it too
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class FastSqliteSaver(SqliteSaver):
+    def __init__(
+        self,
+        path: str,
+        *,
+        serde: Optional[SerializerProtocol] = None,
+        readers: int = READERS,
+        batch_window: float = BATCH_WINDOW,
+        batch_size: int = BATCH_SIZE,
+    ) -> None:
+        if path == ":memory:" or path.startswith("file::memory:"):
+            raise ValueError("FastSqliteSaver needs a database file: every connection to ':memory:' is a separate database")
+        self._local = threading.local()  # The reader connection borrowed by the current thread
+        super().__init__(connect(path), serde=serde)
+        self.path = path
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self.stats = {"writes": 0, "commits": 0}  # Writes committed and transactions used for them
+        self.setup()  # Create the tables on the writer connection before any reader opens
+
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        for _ in range(readers):
+            self._readers.put(connect(path, read_only=True))
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer_thread = threading.Thread(target=self._write_loop, name="checkpoint-writer", daemon=True)
+        self._writer_thread.start()
+        self._closed = False
+
+    @classmethod
+    @contextmanager
+    def from_conn_string(cls, conn_string: str, **kwargs) -> Iterator["FastSqliteSaver"]:
+        saver = cls(conn_string, **kwargs)
+        try:
+            yield saver
+        finally:
+            saver.close()
+
+    # Stops the writer thread (after it committed every queued write) and closes all connections
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer_thread.join()
+        self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+    # Inside a read, self.conn is the reader connection borrowed by this thread, so the queries
+    # of SqliteSaver.get_tuple and SqliteSaver.list run on it; otherwise it is the writer connection
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return getattr(self._local, "conn", None) or self._writer
+
+    @conn.setter
+    def conn(self, value: sqlite3.Connection) -> None:
+        self._writer = value
+
+    # Borrows a reader connection from the pool for the current thread (nested reads reuse it)
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+        conn = self._readers.get()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._readers.put(conn)
+
+    # Reads only: writes never use a cursor, they are queued for the writer thread
+    @contextmanager
+    def cursor(self, transaction: bool = True) -> Iterator[sqlite3.Cursor]:
+        with self._reader() as conn:
+            cur = conn.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+
+    # SqliteSaver.list is a generator; the checkpoints are read on one reader connection
+    # at once so it goes back to the pool even if the caller stops iterating early
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        with self._reader():
+            checkpoints = list(super().list(config, filter=filter, before=before, limit=limit))
+        yield from checkpoints
+
+    # ----- Group commit -----
+
+    # Queues a statement for the writer thread; the future completes once it is committed
+    def _submit(self, query: str, rows: list) -> Future:
+        if self._closed:
+            raise RuntimeError("FastSqliteSaver is closed")
+        future = Future()
+        self._queue.put((query, rows, future))
+        return future
+
+    # The writer thread: takes the first queued write, collects more until the batch window
+    # elapses or the batch is full, and commits them all in a single transaction
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # Stop once this batch is committed
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+    def _commit(self, batch: list) -> None:
+        try:
+            self._execute(batch)
+        except Exception:
+            # One bad write must not fail the others: retry them one transaction each
+            for item in batch:
+                try:
+                    self._execute([item])
+                except Exception as error:
+                    item[2].set_exception(error)
+                else:
+                    item[2].set_result(None)
+        else:
+            for _, _, future in batch:
+                future.set_result(None)
+
+    def _execute(self, batch: list) -> None:
+        self._writer.execute("BEGIN IMMEDIATE")
+        try:
+            for query, rows, _ in batch:
+                self._writer.executemany(query, rows)
+            self._writer.execute("COMMIT")
+        except BaseException:
+            self._writer.execute("ROLLBACK")
+            raise
+        self.stats["writes"] += len(batch)
+        self.stats["commits"] += 1
+
+    # ----- Serialization (same rows as SqliteSaver.put / put_writes) -----
+
+    def _checkpoint_row(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata) -> tuple:
+        type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+        serialized_metadata = self.jsonplus_serde.dumps(get_checkpoint_metadata(config, metadata))
+        return (
+            str(config["configurable"]["thread_id"]),
+            config["configurable"]["checkpoint_ns"],
+            checkpoint["id"],
+            config["configurable"].get("checkpoint_id"),
+            type_,
+            serialized_checkpoint,
+            serialized_metadata,
+        )
+
+    def _write_rows(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str) -> Tuple[str, list]:
+        query = REPLACE_WRITES if all(w[0] in WRITES_IDX_MAP for w in writes) else IGNORE_WRITES
+        rows = [
+            (
+                str(config["configurable"]["thread_id"]),
+                str(config["configurable"]["checkpoint_ns"]),
+                str(config["configurable"]["checkpoint_id"]),
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        return query, rows
+
+    @staticmethod
+    def _saved_config(config: RunnableConfig, checkpoint: Checkpoint) -> RunnableConfig:
+        return {
+            "configurable": {
+                "thread_id": config["configurable"]["thread_id"],
+                "checkpoint_ns": config["configurable"]["checkpoint_ns"],
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    # ----- Sync API -----
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        self._submit(INSERT_CHECKPOINT, [self._checkpoint_row(config, checkpoint, metadata)]).result()
+        return self._saved_config(config, checkpoint)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self._submit(*self._write_rows(config, writes, task_id)).result()
+
+    # ----- Async API: reads run on the default executor, writes await the writer thread -----
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        checkpoints = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        await asyncio.wrap_future(self._submit(INSERT_CHECKPOINT, [self._checkpoint_row(config, checkpoint, metadata)]))
+        return self._saved_config(config, checkpoint)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.wrap_future(self._submit(*self._write_rows(config, writes, task_id)))
@@ -0,0 +1,104 @@
+# Id-indexed message channel for long conversations
+# `messages: Annotated[list, add_messages]` rebuilds the whole message list on every update:
+# add_messages converts every existing message, copies the list, rebuilds an id -> position map
+# and filters the result, so each step of a thread with n messages costs O(n) Python work.
+#
+# IndexedMessages is a drop-in replacement with the same merge semantics:
+#
+#   class State(TypedDict):
+#       messages: Annotated[list, IndexedMessages]
+#
+# - it keeps an id -> position map next to the list, built once when a run starts
+# - new messages are appended and messages with a known id are replaced in place, in O(1),
+#   touching only the messages of the update
+# - RemoveMessage deletes by id (one compaction per update that removes messages), and
+#   removing an unknown id raises ValueError, as with add_messages
+# - the list handed out to nodes, streams and checkpoints is never modified afterwards:
+#   it is copied once (a C-level copy of the pointers) before the next update changes it
+import uuid
+from typing import Optional, Sequence
+
+from langchain_core.messages import AnyMessage, BaseMessageChunk, RemoveMessage, convert_to_messages, message_chunk_to_message
+from langgraph.channels.base import BaseChannel
+from typing_extensions import Self
+
+
+# Converts an update (a message, a list of messages, tuples, dicts or chunks) to messages with ids
+def coerce_messages(messages) -> list:
+    if not isinstance(messages, list):
+        messages = [messages]
+    messages = [message_chunk_to_message(message) if isinstance(message, BaseMessageChunk) else message
+                for message in convert_to_messages(messages)]
+    for message in messages:
+        if message.id is None:
+            message.id = str(uuid.uuid4())
+    return messages
+
+
+class IndexedMessages(BaseChannel[list, list, list]):
+    __slots__ = ("value", "index", "shared")
+
+    def __init__(self, typ=list, key: str = "") -> None:
+        super().__init__(typ, key)
+        self.value: list = []
+        self.index: dict = {}  # message id -> position in self.value
+        self.shared = False  # True once self.value was handed out; it is then copied before a change
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, IndexedMessages)
+
+    @property
+    def ValueType(self):
+        return list[AnyMessage]
+
+    @property
+    def UpdateType(self):
+        return list[AnyMessage]
+
+    def from_checkpoint(self, checkpoint: Optional[list]) -> Self:
+        channel = self.__class__(self.typ, self.key)
+        if checkpoint is not None:
+            channel.value = coerce_messages(checkpoint)  # A new list: the checkpoint's own is never changed
+            channel.index = {message.id: position for position, message in enumerate(channel.value)}
+        return channel
+
+    def get(self) -> list:
+        self.shared = True
+        return self.value
+
+    def checkpoint(self) -> list:
+        return self.get()
+
+    def is_available(self) -> bool:
+        return True  # Starts as an empty list, like add_messages
+
+    def update(self, values: Sequence) -> bool:
+        if not values:
+            return False
+        if self.shared:
+            self.value = self.value.copy()
+            self.shared = False
+        for value in values:
+            self._merge(coerce_messages(value))
+        return True
+
+    # Merges one update, with the semantics of add_messages(self.value, messages)
+    def _merge(self, messages: list) -> None:
+        value, index = self.value, self.index
+        to_remove = set()
+        for message in messages:
+            position = index.get(message.id)
+            if position is not None:
+                if isinstance(message, RemoveMessage):
+                    to_remove.add(message.id)
+                else:
+                    to_remove.discard(message.id)
+                    value[position] = message
+            else:
+                if isinstance(message, RemoveMessage):
+                    raise ValueError(f"Attempting to delete a message with an ID that doesn't exist ('{message.id}')")
+                index[message.id] = len(value)
+                value.append(message)
+        if to_remove:
+            self.value = [message for message in value if message.id not in to_remove]
+            self.index = {message.id: position for position, message in enumerate(self.value)}
@@ -0,0 +1,187 @@
+# Parallel tool node with per-tool timeouts and latency histograms
+# ParallelToolNode is a drop-in replacement for langgraph's ToolNode:
+#
+#   tool_node = ParallelToolNode(tools=tools, max_parallel=4, timeouts={"tavily_search_results_json": 8})
+#
+# - the tool calls of one AI message run concurrently, at most `max_parallel` at a time
+# - every call has a timeout (per tool name, or `default_timeout`), counted from the moment the call
+#   starts; a call that runs over is answered with an error ToolMessage saying it timed out, so a
+#   slow search degrades the answer instead of stalling the whole turn
+# - the latency of every call is recorded per tool in a ToolLatencyStats (histogram buckets,
+#   percentiles, timeouts and errors), shared between nodes and readable with stats.snapshot()
+#
+# In the async graph (ainvoke / astream) a timed-out call is cancelled. A sync tool cannot be
+# interrupted: its thread is abandoned and finishes in the background, and its result is dropped.
+import asyncio
+import bisect
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import get_config_list
+from langgraph.prebuilt import ToolNode
+from langgraph.store.base import BaseStore
+
+# Defaults
+MAX_PARALLEL = 4  # Tool calls of one turn running at the same time
+DEFAULT_TIMEOUT = 15.0  # Seconds before a tool call is answered with a timeout message
+BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)  # Histogram bucket upper bounds
+RECENT_SAMPLES = 1000  # Latencies kept per tool for the percentiles
+
+
+class ToolLatencyStats:
+    def __init__(self, buckets_ms: Sequence[float] = BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._lock = threading.Lock()
+        self._tools: Dict[str, dict] = {}
+
+    def record(self, tool: str, seconds: float, outcome: str = "ok") -> None:
+        milliseconds = seconds * 1000
+        with self._lock:
+            entry = self._tools.get(tool)
+            if entry is None:
+                entry = self._tools[tool] = {
+                    "calls": 0, "timeouts": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "buckets": [0] * (len(self.buckets_ms) + 1), "recent": deque(maxlen=RECENT_SAMPLES),
+                }
+            entry["calls"] += 1
+            if outcome == "timeout":
+                entry["timeouts"] += 1
+            elif outcome == "error":
+                entry["errors"] += 1
+            entry["total_ms"] += milliseconds
+            entry["max_ms"] = max(entry["max_ms"], milliseconds)
+            entry["buckets"][bisect.bisect_left(self.buckets_ms, milliseconds)] += 1
+            entry["recent"].append(milliseconds)
+
+    # Per tool: calls, timeouts, errors, mean/p50/p95/max latency and the histogram ("<=100ms": count)
+    def snapshot(self) -> dict:
+        with self._lock:
+            result = {}
+            for tool, entry in self._tools.items():
+                recent = sorted(entry["recent"])
+                labels = [f"<={bound:g}ms" for bound in self.buckets_ms] + [f">{self.buckets_ms[-1]:g}ms"]
+                result[tool] = {
+                    "calls": entry["calls"],
+                    "timeouts": entry["timeouts"],
+                    "errors": entry["errors"],
+                    "mean_ms": entry["total_ms"] / entry["calls"],
+                    "p50_ms": recent[len(recent) // 2],
+                    "p95_ms": recent[min(len(recent) - 1, int(0.95 * len(recent)))],
+                    "max_ms": entry["max_ms"],
+                    "histogram": {label: count for label, count in zip(labels, entry["buckets"]) if count},
+                }
+            return result
+
+    def report(self) -> str:
+        lines = [f"{'tool':<32}{'calls':>7}{'timeouts':>10}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}"]
+        for tool, entry in sorted(self.snapshot().items(), key=lambda item: -item[1]["mean_ms"] * item[1]["calls"]):
+            lines.append(f"{tool:<32}{entry['calls']:>7}{entry['timeouts']:>10}{entry['errors']:>8}"
+                         f"{entry['p50_ms']:>9.0f}{entry['p95_ms']:>9.0f}{entry['max_ms']:>9.0f}")
+        return "\n".join(lines)
+
+
+def timeout_message(call: dict, timeout: float) -> ToolMessage:
+    return ToolMessage(
+        content=f"Error: the tool '{call['name']}' timed out after {timeout:g}s. Answer without it or ask to try again.",
+        name=call["name"],
+        tool_call_id=call["id"],
+        status="error",
+    )
+
+
+def outcome_of(output: Any) -> str:
+    if isinstance(output, BaseException) or (isinstance(output, ToolMessage) and output.status == "error"):
+        return "error"
+    return "ok"
+
+
+class ParallelToolNode(ToolNode):
+    def __init__(
+        self,
+        tools: Sequence[Any],
+        *,
+        max_parallel: int = MAX_PARALLEL,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: Optional[float] = DEFAULT_TIMEOUT,
+        stats: Optional[ToolLatencyStats] = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(tools, **kwargs)
+        if max_parallel < 1:
+            raise ValueError("max_parallel must be at least 1")
+        self.max_parallel = max_parallel
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+        self.stats = stats or ToolLatencyStats()
+
+    def timeout_for(self, name: str) -> Optional[float]:
+        return self.timeouts.get(name, self.default_timeout)
+
+    # ----- Sync: a pool of max_parallel workers, each waiting on its call with a timeout -----
+
+    def _func(self, input, config: RunnableConfig, *, store: Optional[BaseStore]) -> Any:
+        tool_calls, input_type = self._parse_input(input, store)
+        if not tool_calls:
+            return self._combine_tool_outputs([], input_type)
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            futures = [
+                # The context keeps callbacks and tracing of the run
+                executor.submit(contextvars.copy_context().run, self._run_with_timeout, call, input_type, call_config)
+                for call, call_config in zip(tool_calls, get_config_list(config, len(tool_calls)))
+            ]
+            outputs = [future.result() for future in futures]
+
+        for output in outputs:
+            if isinstance(output, BaseException):
+                raise output
+        return self._combine_tool_outputs(outputs, input_type)
+
+    # Runs in a pool worker, so the timeout starts with the call, not while it is queued. The call
+    # itself runs on a daemon thread: when it times out, the worker leaves it behind and is free
+    # for the next queued call
+    def _run_with_timeout(self, call: dict, input_type: str, config: RunnableConfig) -> Any:
+        timeout = self.timeout_for(call["name"])
+        result = []
+
+        def run():
+            try:
+                result.append(self._run_one(call, input_type, config))
+            except BaseException as error:  # Re-raised in the node, like ToolNode does
+                result.append(error)
+
+        start = time.monotonic()
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(run,), daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if not result:
+            self.stats.record(call["name"], time.monotonic() - start, "timeout")
+            return timeout_message(call, timeout)
+        self.stats.record(call["name"], time.monotonic() - start, outcome_of(result[0]))
+        return result[0]
+
+    # ----- Async: a task per call, an asyncio semaphore and asyncio.wait_for -----
+
+    async def _afunc(self, input, config: RunnableConfig, *, store: Optional[BaseStore]) -> Any:
+        tool_calls, input_type = self._parse_input(input, store)
+        slots = asyncio.Semaphore(self.max_parallel)
+
+        async def run(call):
+            async with slots:
+                timeout = self.timeout_for(call["name"])
+                start = time.monotonic()
+                try:
+                    output = await asyncio.wait_for(self._arun_one(call, input_type, config), timeout)
+                except asyncio.TimeoutError:
+                    self.stats.record(call["name"], time.monotonic() - start, "timeout")
+                    return timeout_message(call, timeout)
+                self.stats.record(call["name"], time.monotonic() - start, outcome_of(output))
+                return output
+
+        outputs = await asyncio.gather(*(run(call) for call in tool_calls))
+        return self._combine_tool_outputs(list(outputs), input_type)
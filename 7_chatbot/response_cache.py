@@ -0,0 +1,269 @@
+# Response cache in front of the chat model
+# Plugs into LangChain's cache hook, so a chatbot only changes how its model is created:
+#
+#   llm = ChatGroq(model="llama-3.1-8b-instant", cache=ResponseCache(mode="semantic"))
+#
+# On a hit the model is not called at all. Two modes:
+# - "exact": the key is the normalized conversation (role and content of every message, with
+#   case and whitespace folded and message ids ignored) plus the model and its parameters
+# - "semantic": an exact lookup first, then a nearest-neighbour search over the embeddings of
+#   the last user message, among the answers given under the same system prompt and model
+#   parameters. A cached answer is used when the cosine similarity reaches `threshold`.
+#   By default it only applies to a conversation's first user message (FAQ-style traffic),
+#   where the last message carries the whole question.
+#
+# Entries live in a SQLite file (WAL, shared by processes), expire after `ttl` seconds and the
+# least recently used ones are evicted above `max_entries`. stats() reports the hit rate.
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import warnings
+import zlib
+from typing import List, Optional, Sequence
+
+import numpy as np
+from langchain_core.caches import BaseCache
+from langchain_core.embeddings import Embeddings
+from langchain_core.load import dumps, loads
+
+# Default cache settings
+CACHE_PATH = "response_cache.sqlite"  # SQLite file holding the cached answers
+CACHE_TTL = 24 * 60 * 60  # Seconds a cached answer stays valid (one day)
+CACHE_MAX_ENTRIES = 10_000  # Least recently used answers are evicted above this size
+SIMILARITY_THRESHOLD = 0.9  # Cosine similarity needed for a semantic hit
+SEMANTIC_MAX_USER_TURNS = 1  # Semantic lookups only for conversations with at most this many user messages
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+# Turns the serialized messages LangChain passes to the cache into (role, normalized content) pairs.
+# Message ids are left out: they differ for every message, even when the text is the same.
+def normalize_messages(prompt: str) -> List[list]:
+    messages = []
+    for message in json.loads(prompt):
+        kwargs = message.get("kwargs", {})
+        content = kwargs.get("content", "")
+        entry = [kwargs.get("type", ""), normalize_text(content) if isinstance(content, str) else content]
+        if kwargs.get("tool_calls"):
+            entry.append([[call.get("name"), call.get("args")] for call in kwargs["tool_calls"]])
+        messages.append(entry)
+    return messages
+
+
+def digest(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+# Offline embeddings for semantic mode: hashed character trigrams of the normalized text.
+# They catch rephrasings, typos and word-order changes without any API call; pass a real
+# Embeddings model (e.g. OpenAIEmbeddings) to also match synonyms and paraphrases.
+class HashingEmbeddings(Embeddings):
+    def __init__(self, dimensions: int = 1024):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in normalize_text(text).split():
+            word = f" {word} "
+            for index in range(len(word) - 2):
+                vector[zlib.crc32(word[index:index + 3].encode()) % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class ResponseCache(BaseCache):
+    def __init__(self, path: str = CACHE_PATH, mode: str = "exact", embeddings: Optional[Embeddings] = None,
+                 threshold: float = SIMILARITY_THRESHOLD, ttl: float = CACHE_TTL,
+                 max_entries: int = CACHE_MAX_ENTRIES, semantic_max_user_turns: Optional[int] = SEMANTIC_MAX_USER_TURNS):
+        if mode not in ("exact", "semantic"):
+            raise ValueError(f"Unknown cache mode '{mode}': use 'exact' or 'semantic'")
+        self.path = path
+        self.mode = mode
+        self.embeddings = embeddings or (HashingEmbeddings() if mode == "semantic" else None)
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.semantic_max_user_turns = semantic_max_user_turns
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn = None  # Opened on first use so importing a chatbot does not create the file
+        self._lock = threading.Lock()  # The connection is shared by all threads of the process
+        self._index = {}  # scope -> (keys, matrix of unit-length embeddings), loaded on first use
+        self._vectors = {}  # key -> embedding computed by a missed lookup, reused by the update
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    generations TEXT NOT NULL,
+                    embedding BLOB,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS response_cache_lru ON response_cache (accessed_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS response_cache_scope ON response_cache (scope)")
+            self._conn.commit()
+        return self._conn
+
+    # ----- Keys -----
+
+    # Returns (exact key, semantic scope, last user message or None when semantic lookup does not apply)
+    def _keys(self, prompt: str, llm_string: str):
+        messages = normalize_messages(prompt)
+        key = digest(llm_string, messages)
+        system = [content for role, content, *_ in messages if role == "system"]
+        scope = digest(llm_string, system)
+        user_turns = [content for role, content, *_ in messages if role == "human"]
+        semantic = (
+            self.mode == "semantic"
+            and messages and messages[-1][0] == "human" and isinstance(messages[-1][1], str)
+            and (self.semantic_max_user_turns is None or len(user_turns) <= self.semantic_max_user_turns)
+        )
+        return key, scope, messages[-1][1] if semantic else None
+
+    # ----- Semantic index -----
+
+    def _scope_index(self, conn: sqlite3.Connection, scope: str):
+        if scope not in self._index:
+            rows = conn.execute(
+                "SELECT key, embedding FROM response_cache WHERE scope = ? AND embedding IS NOT NULL", (scope,)
+            ).fetchall()
+            keys = [key for key, _ in rows]
+            matrix = np.array([np.frombuffer(blob, dtype=np.float32) for _, blob in rows], dtype=np.float32)
+            self._index[scope] = (keys, matrix)
+        return self._index[scope]
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    # ----- Rows -----
+
+    # Returns the generations of a live row (refreshing its LRU time), or None if missing or expired
+    def _fetch(self, conn: sqlite3.Connection, key: str, now: float):
+        row = conn.execute("SELECT generations, created_at, scope FROM response_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] + self.ttl < now:  # Expired answers are removed straight away
+            conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            conn.commit()
+            self._index.pop(row[2], None)
+            return None
+        conn.execute("UPDATE response_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        conn.commit()
+        return row[0]
+
+    # Rebuilds the cached generations without their message ids: add_messages would otherwise
+    # merge a repeated answer into the earlier message carrying the same id
+    @staticmethod
+    def _load(generations: str):
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="The function `loads` is in beta")
+            result = [loads(generation) for generation in json.loads(generations)]
+        for generation in result:
+            if hasattr(generation, "message"):
+                generation.message.id = None
+        return result
+
+    # ----- BaseCache API -----
+
+    def lookup(self, prompt: str, llm_string: str):
+        key, scope, question = self._keys(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            generations = self._fetch(self._connection(), key, now)
+        if generations is not None:
+            self.exact_hits += 1
+            return self._load(generations)
+
+        if question is not None:
+            vector = self._embed(question)  # Outside the lock: a real embedding model makes a request
+            with self._lock:
+                conn = self._connection()
+                keys, matrix = self._scope_index(conn, scope)
+                if keys:
+                    similarities = matrix @ vector
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.threshold:
+                        generations = self._fetch(conn, keys[best], now)
+                if generations is None:
+                    self._vectors[key] = vector
+                    while len(self._vectors) > 1000:  # Misses never followed by an update
+                        self._vectors.pop(next(iter(self._vectors)))
+            if generations is not None:
+                self.semantic_hits += 1
+                return self._load(generations)
+
+        self.misses += 1
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence) -> None:
+        key, scope, question = self._keys(prompt, llm_string)
+        vector = None
+        if question is not None:
+            with self._lock:
+                vector = self._vectors.pop(key, None)
+            if vector is None:
+                vector = self._embed(question)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, scope, generations, embedding, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, scope, json.dumps([dumps(generation) for generation in return_val]),
+                 vector.tobytes() if vector is not None else None, now, now),
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM response_cache WHERE key IN "
+                    "(SELECT key FROM response_cache ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+                self._index.clear()  # Reloaded per scope on the next semantic lookup
+            conn.commit()
+            if vector is not None and scope in self._index:
+                keys, matrix = self._index[scope]
+                if key not in keys:
+                    self._index[scope] = (keys + [key], np.vstack([matrix.reshape(-1, vector.size), vector]))
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM response_cache")
+            conn.commit()
+            self._index.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._connection().execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": size,
+        }
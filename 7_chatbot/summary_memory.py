@@ -0,0 +1,186 @@
+# Rolling-summary memory for long chat threads
+# Sending the whole history to the model on every turn makes the prompt, the latency and the
+# checkpoint grow with the age of a thread. SummaryMemory keeps a running summary in the state
+# and sends only the summary plus the last `keep_last` turns:
+#
+#   prompt = [summary of the older turns] + last keep_last..keep_last+summarize_every-1 turns
+#
+# - the summary is refreshed incrementally: once `summarize_every` turns beyond the last
+#   `keep_last` have piled up, only those turns are folded into the existing summary
+# - `background=True` takes the refresh off the critical path: the graph answers right away and
+#   refresh_in_background() updates the thread's state on a worker thread, while the user reads
+#   the answer (wait() makes the next turn of that thread wait for it if it is not done yet)
+# - with an `archive`, the summarized messages are moved out of the checkpoint (RemoveMessage) and
+#   kept in the archive instead, so the checkpoint stays small too; without one they stay in the
+#   state and the summary records up to which message it covers
+#
+# A turn starts at a user message, so a tool call and its result are never separated.
+import json
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Annotated, Dict, List, Optional, TypedDict
+
+from langchain_core.load import dumps
+from langchain_core.messages import HumanMessage, RemoveMessage, SystemMessage
+from langgraph.graph import END
+
+from indexed_messages import IndexedMessages
+
+# Default policy
+KEEP_LAST_TURNS = 4  # Turns always sent verbatim
+SUMMARIZE_EVERY = 4  # Turns folded into the summary at once
+
+SUMMARY_PROMPT = (
+    "You maintain the memory of a conversation between a user and an AI assistant.\n"
+    "Current summary:\n{summary}\n\n"
+    "Extend the summary with the new part of the conversation below. Keep names, facts, "
+    "preferences, decisions and open questions; drop small talk. Reply with the summary only.\n\n"
+    "New part of the conversation:\n{conversation}"
+)
+
+
+class SummaryState(TypedDict):
+    messages: Annotated[list, IndexedMessages]
+    summary: str  # Summary of the turns before summarized_until
+    summarized_until: Optional[str]  # Id of the last message folded into the summary
+
+
+# Stores the messages moved out of the checkpoints, one row per message, in their original order
+class SqliteMessageArchive:
+    def __init__(self, path: str = "archive.sqlite"):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS archived_messages (thread_id TEXT, message_id TEXT, message TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS archived_messages_thread ON archived_messages (thread_id)")
+        self.lock = threading.Lock()
+
+    def __call__(self, thread_id, messages: list) -> None:
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO archived_messages VALUES (?, ?, ?)",
+                [(str(thread_id), message.id, dumps(message)) for message in messages],
+            )
+            self.conn.commit()
+
+    def count(self, thread_id) -> int:
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM archived_messages WHERE thread_id = ?", (str(thread_id),)
+            ).fetchone()[0]
+
+
+# Splits messages into turns, each starting at a user message
+def split_turns(messages: list) -> List[list]:
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def format_conversation(messages: list) -> str:
+    lines = []
+    for message in messages:
+        role = {"human": "User", "ai": "AI", "tool": "Tool"}.get(message.type, message.type)
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+        if content:
+            lines.append(f"{role}: {content}")
+    return "\n".join(lines)
+
+
+class SummaryMemory:
+    def __init__(self, llm, *, keep_last: int = KEEP_LAST_TURNS, summarize_every: int = SUMMARIZE_EVERY,
+                 background: bool = False, archive=None):
+        if keep_last < 1 or summarize_every < 1:
+            raise ValueError("keep_last and summarize_every must be at least 1")
+        self.llm = llm  # Model writing the summaries (a small, cheap one is enough)
+        self.keep_last = keep_last
+        self.summarize_every = summarize_every
+        self.background = background
+        self.archive = archive  # Callable (thread_id, messages) receiving the messages moved out of the state
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="summary") if background else None
+        self._pending: Dict[str, Future] = {}  # thread_id -> refresh still running
+        self._lock = threading.Lock()
+
+    # ----- Policy -----
+
+    # The messages not covered by the summary yet
+    @staticmethod
+    def recent_messages(state: dict) -> list:
+        messages = state["messages"]
+        until = state.get("summarized_until")
+        if until:
+            for position in range(len(messages) - 1, -1, -1):  # The summary covers all but the last turns
+                if messages[position].id == until:
+                    return messages[position + 1:]
+        return messages
+
+    # The messages to send to the model: the summary, then the turns it does not cover
+    def prompt(self, state: dict) -> list:
+        recent = self.recent_messages(state)
+        if not state.get("summary"):
+            return recent
+        return [SystemMessage(content=f"Summary of the earlier conversation:\n{state['summary']}"), *recent]
+
+    def due(self, state: dict) -> bool:
+        return len(split_turns(self.recent_messages(state))) >= self.keep_last + self.summarize_every
+
+    # Conditional edge after the chatbot node
+    def route(self, state: dict) -> str:
+        return "summarize" if not self.background and self.due(state) else END
+
+    # ----- Summarization -----
+
+    def _fold(self, state: dict):
+        turns = split_turns(self.recent_messages(state))
+        folded = [message for turn in turns[:-self.keep_last] for message in turn]
+        request = SUMMARY_PROMPT.format(summary=state.get("summary") or "(empty)",
+                                        conversation=format_conversation(folded))
+        return folded, [HumanMessage(content=request)]
+
+    def _update(self, folded: list, summary: str, config: Optional[dict]) -> dict:
+        update = {"summary": summary, "summarized_until": folded[-1].id}
+        if self.archive is not None:
+            thread_id = (config or {}).get("configurable", {}).get("thread_id")
+            self.archive(thread_id, folded)
+            update["messages"] = [RemoveMessage(id=message.id) for message in folded]
+        return update
+
+    # Graph node: folds the turns beyond the last keep_last into the summary
+    def summarize(self, state: dict, config: Optional[dict] = None) -> dict:
+        if not self.due(state):
+            return {}
+        folded, request = self._fold(state)
+        return self._update(folded, self.llm.invoke(request).content, config)
+
+    async def asummarize(self, state: dict, config: Optional[dict] = None) -> dict:
+        if not self.due(state):
+            return {}
+        folded, request = self._fold(state)
+        return self._update(folded, (await self.llm.ainvoke(request)).content, config)
+
+    # ----- Background refresh -----
+
+    # Refreshes the summary of a thread after its answer was returned (background=True)
+    def refresh_in_background(self, app, config: dict) -> Future:
+        thread_id = config["configurable"]["thread_id"]
+        self.wait(thread_id)
+        future = self._executor.submit(self._refresh, app, config)
+        with self._lock:
+            self._pending[thread_id] = future
+        return future
+
+    def _refresh(self, app, config: dict) -> None:
+        state = app.get_state(config).values
+        if self.due(state):
+            app.update_state(config, self.summarize(state, config), as_node="summarize")
+
+    # Waits for the running refresh of a thread, if any; call it before the thread's next turn
+    def wait(self, thread_id) -> None:
+        with self._lock:
+            future = self._pending.pop(thread_id, None)
+        if future is not None:
+            future.result()
@@ -3,6 +3,7 @@ from typing import TypedDict, Annotated  # For defining structured types and ann
 from langchain_core.messages import HumanMessage  # Represents a message from a human user
 from langgraph.graph import add_messages, StateGraph, END  # Utilities for managing state graphs
 from langchain_groq import ChatGroq  # LLM interface (currently unresolved import issue)
+from speculative_drafts import SpeculativeDrafter  # Drafts likely revisions while the user reads the post
 
 # Define the structure of the state used in the state machine
 class State(TypedDict): 
@@ -11,6 +12,13 @@ class State(TypedDict):
 # Initialize the language model (LLM) with a specific model configuration
 llm = ChatGroq(model="llama-3.1-8b-instant")
 
+# While the user reads the post, write the revisions for the most common feedback ("shorter",
+# "polish it") in the background, so those answers get their new post without waiting on the LLM.
+# Costs up to 2 extra LLM calls per round, capped at SPECULATIVE_MAX_CALLS in total
+SPECULATIVE_DRAFTS = False
+SPECULATIVE_MAX_CALLS = 20
+drafter = SpeculativeDrafter(max_calls=SPECULATIVE_MAX_CALLS) if SPECULATIVE_DRAFTS else None
+
 # Define constants representing different states in the state machine
 GENERATE_POST = "generate_post"
 GET_REVIEW_DECISION = "get_review_decision"
@@ -19,6 +27,12 @@ COLLECT_FEEDBACK = "collect_feedback"
 
 # Function to generate a LinkedIn post using the LLM
 def generate_post(state: State): 
+    messages = state["messages"]
+    if drafter is not None and len(messages) > 1:
+        # Feedback on a post: use the revision drafted while the user was reading, if it answers it
+        draft = drafter.take(messages[-2].id, messages[-1].content)
+        if draft is not None:
+            return {"messages": [draft]}
     return {
         "messages": [llm.invoke(state["messages"])]  # Invoke the LLM with the current state messages
     }
@@ -31,9 +45,18 @@ def get_review_decision(state: State):
     print(post_content)  # Display the post content to the user
     print("\n")
 
+    # Draft the likely revisions while the user decides
+    if drafter is not None:
+        drafter.speculate(
+            state["messages"][-1].id,
+            lambda instruction: llm.invoke(state["messages"] + [HumanMessage(content=instruction)]),
+        )
+
     decision = input("Post to LinkedIn? (yes/no): ")  # Prompt the user for a decision
 
     if decision.lower() == "yes":
+        if drafter is not None:
+            drafter.discard(state["messages"][-1].id)
         return POST  # Transition to the POST state
     else:
         return COLLECT_FEEDBACK  # Transition to the COLLECT_FEEDBACK state
@@ -79,6 +102,9 @@ response = app.invoke({
 
 # Print the final response
 print(response)
+if drafter is not None:
+    print(drafter.report())
+    drafter.close()  # Cancels the drafts still queued, so the script exits promptly
 
 
 
@@ -5,41 +5,73 @@ from typing import TypedDict, Annotated, List  # TypedDict defines structured ty
 from langgraph.checkpoint.memory import MemorySaver  # MemorySaver is used to save and resume state checkpoints
 from langchain_groq import ChatGroq  # ChatGroq is an LLM interface
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage  # Message types for interaction
+from langchain_core.runnables import RunnableConfig  # Gives the nodes the thread id
 import uuid  # For generating unique thread IDs
+from interrupt_index import InterruptIndexSaver, summarize_payload  # Index of the threads waiting on a human
+from speculative_drafts import SpeculativeDrafter  # Drafts likely revisions while the human reads the post
 
 # Initialize the LLM
 llm = ChatGroq(model="llama-3.1-8b-instant")
 
+# While the thread waits at human_node, write the revisions for the most common feedback ("shorter",
+# "polish it") in the background, so those answers get their new post without waiting on the LLM.
+# Costs up to 2 extra LLM calls per round, capped at SPECULATIVE_MAX_CALLS in total
+SPECULATIVE_DRAFTS = False
+SPECULATIVE_MAX_CALLS = 20
+drafter = SpeculativeDrafter(max_calls=SPECULATIVE_MAX_CALLS) if SPECULATIVE_DRAFTS else None
+
+# Keep an index of the threads paused at human_node (with the start of their post), queryable
+# without loading their checkpoints: checkpointer.pending(), count() and resume_many(). Meant for
+# review queues with many threads; benchmark_interrupt_index.py measures it
+INTERRUPT_INDEX = False
+
 # Define the structure of the state used in the state machine
 class State(TypedDict): 
     linkedin_topic: str  # The topic for the LinkedIn post
     generated_post: Annotated[List[str], add_messages]  # A list of generated posts
     human_feedback: Annotated[List[str], add_messages]  # A list of human feedback
 
-# Define the model node in the state machine
-def model(state: State): 
-    """ Here, we're using the LLM to generate a LinkedIn post with human feedback incorporated """
-
-    print("[model] Generating content")
-    linkedin_topic = state["linkedin_topic"]
-    feedback = state["human_feedback"] if "human_feedback" in state else ["No Feedback yet"]
+# Ask the LLM for a post on the topic, following the latest feedback
+def write_post(linkedin_topic, latest_feedback):
+    """ Returns the LLM's response; also used to draft revisions ahead of the feedback """
 
     # Define the prompt for the LLM
     prompt = f"""
 
         LinkedIn Topic: {linkedin_topic}
-        Human Feedback: {feedback[-1] if feedback else "No feedback yet"}
+        Human Feedback: {latest_feedback}
 
         Generate a structured and well-written LinkedIn post based on the given topic.
 
         Consider previous human feedback to refine the response. 
     """
 
-    response = llm.invoke([
+    return llm.invoke([
         SystemMessage(content="You are an expert LinkedIn content writer"), 
         HumanMessage(content=prompt)
     ])
 
+# Identifies the post under review, for the drafts written ahead of the feedback
+def draft_key(state: State, config: RunnableConfig):
+    return (config["configurable"]["thread_id"], state["generated_post"][-1].id)
+
+# Define the model node in the state machine
+def model(state: State, config: RunnableConfig): 
+    """ Here, we're using the LLM to generate a LinkedIn post with human feedback incorporated """
+
+    print("[model] Generating content")
+    linkedin_topic = state["linkedin_topic"]
+    feedback = state["human_feedback"] if "human_feedback" in state else ["No Feedback yet"]
+
+    # Use the revision drafted while the human was reading, if it answers this feedback
+    response = None
+    if drafter is not None and state["generated_post"] and feedback:
+        response = drafter.take(draft_key(state, config), feedback[-1].content)
+        if response is not None:
+            print("[model] Using the revision drafted ahead of the feedback")
+    if response is None:
+        response = write_post(linkedin_topic, feedback[-1].content if feedback else "No feedback yet")
+
     generated_linkedin_post = response.content
 
     print(f"[model_node] Generated post:\n{generated_linkedin_post}\n")
@@ -50,13 +82,20 @@ def model(state: State):
     }
 
 # Define the human intervention node in the state machine
-def human_node(state: State): 
+def human_node(state: State, config: RunnableConfig): 
     """Human Intervention node - loops back to model unless input is done"""
 
     print("\n [human_node] awaiting human feedback...")
 
     generated_post = state["generated_post"]
 
+    # Draft the likely revisions while waiting (once per post: the node re-runs when resumed)
+    if drafter is not None:
+        drafter.speculate(
+            draft_key(state, config),
+            lambda instruction: write_post(state["linkedin_topic"], instruction),
+        )
+
     # Interrupt to get user feedback
     user_feedback = interrupt(
         {
@@ -69,7 +108,14 @@ def human_node(state: State):
 
     # If user types "done", transition to END node
     if user_feedback.lower() == "done": 
-        return Command(update={"human_feedback": state["human_feedback"] + ["Finalised"]}, goto="end_node")
+        update = {"human_feedback": state["human_feedback"] + ["Finalised"]}
+        # Finish with the post in final form, if it was drafted while the human was reading
+        if drafter is not None:
+            final_post = drafter.take_candidate(draft_key(state, config), "final")
+            if final_post is not None:
+                print("[human_node] Using the final form drafted ahead of the feedback")
+                update["generated_post"] = [AIMessage(content=final_post.content)]
+        return Command(update=update, goto="end_node")
 
     # Otherwise, update feedback and return to model for re-generation
     return Command(update={"human_feedback": state["human_feedback"] + [user_feedback]}, goto="model")
@@ -98,11 +144,17 @@ graph.set_finish_point("end_node")
 
 # Enable Interrupt mechanism
 checkpointer = MemorySaver()
+if INTERRUPT_INDEX:
+    checkpointer = InterruptIndexSaver(
+        checkpointer,
+        index_path=":memory:",
+        summarize=lambda value: summarize_payload(value["generated_post"][-1].content),
+    )
 app = graph.compile(checkpointer=checkpointer)
 
 # Define the thread configuration
 thread_config = {"configurable": {
-    "thread_id": uuid.uuid4()
+    "thread_id": str(uuid.uuid4())
 }}
 
 # Get the LinkedIn topic from the user
@@ -119,6 +171,8 @@ for chunk in app.stream(initial_state, config=thread_config):
         # If we reach an interrupt, continuously ask for human feedback
         if(node_id == "__interrupt__"):
             while True: 
+                if INTERRUPT_INDEX:
+                    print(f"Threads waiting for review: {checkpointer.count()}")
                 user_feedback = input("Provide feedback (or type 'done' when finished): ")
 
                 # Resume the graph execution with the user's feedback
@@ -128,5 +182,9 @@ for chunk in app.stream(initial_state, config=thread_config):
                 if user_feedback.lower() == "done":
                     break
 
+if drafter is not None:
+    print(drafter.report())
+    drafter.close()  # Cancels the drafts still queued, so the script exits promptly
+
 
 
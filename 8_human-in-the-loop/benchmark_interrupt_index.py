@@ -0,0 +1,135 @@
+# Benchmark of the pending-interrupt index on a large review queue
+# Pauses N threads of the graph of 5_multiturn_conversation.py (with a fake model) at human_node,
+# then compares finding the threads waiting on a human:
+#   scan  - the only way without the index: load the latest checkpoint of every thread and look
+#           for an interrupt in its pending writes
+#   index - InterruptIndexSaver: count(), the first page, and paging through the whole queue
+# and resumes a share of the queue with reviewer feedback (the fake model then rewrites the post,
+# taking --model-latency seconds, and the thread pauses again), one thread at a time and with
+# resume_many().
+#
+# Usage:
+#   python benchmark_interrupt_index.py
+#   python benchmark_interrupt_index.py --threads 20000 --resume 2000 --concurrency 64
+import argparse
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, List, TypedDict
+
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.constants import INTERRUPT
+from langgraph.graph import END, START, StateGraph, add_messages
+from langgraph.types import Command, interrupt
+
+from interrupt_index import InterruptIndexSaver
+
+
+class State(TypedDict):
+    linkedin_topic: str
+    generated_post: Annotated[List[str], add_messages]
+    human_feedback: Annotated[List[str], add_messages]
+
+
+# The graph of 5_multiturn_conversation.py, with a fake model writing the post
+def build_graph(checkpointer, model_latency: float):
+    def model(state: State):
+        time.sleep(model_latency)  # The LLM call
+        feedback = state["human_feedback"][-1].content if state["human_feedback"] else "no feedback yet"
+        post = f"A LinkedIn post about {state['linkedin_topic']} (feedback: {feedback})"
+        return {"generated_post": [AIMessage(content=post)]}
+
+    def human_node(state: State):
+        feedback = interrupt({"generated_post": state["generated_post"][-1].content,
+                              "message": "Provide feedback or type 'done' to finish"})
+        if feedback.lower() == "done":
+            return Command(update={"human_feedback": ["Finalised"]}, goto="end_node")
+        return Command(update={"human_feedback": [feedback]}, goto="model")
+
+    def end_node(state: State):
+        return {}
+
+    graph = StateGraph(State)
+    graph.add_node("model", model)
+    graph.add_node("human_node", human_node)
+    graph.add_node("end_node", end_node)
+    graph.add_edge(START, "model")
+    graph.add_edge("model", "human_node")
+    graph.add_edge("end_node", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+# Finds the paused threads without the index: the latest checkpoint of every thread
+def scan_pending(saver: MemorySaver) -> int:
+    pending = 0
+    for thread_id in list(saver.storage):
+        checkpoint_tuple = saver.get_tuple({"configurable": {"thread_id": thread_id}})
+        if checkpoint_tuple and any(channel == INTERRUPT for _, channel, _ in checkpoint_tuple.pending_writes or []):
+            pending += 1
+    return pending
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find and resume paused threads with and without the interrupt index.")
+    parser.add_argument("--threads", type=int, default=10000, help="Threads paused at human_node")
+    parser.add_argument("--resume", type=int, default=1000, help="Threads resumed by each resume method")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--model-latency", type=float, default=0.05, help="Seconds per fake model call")
+    parser.add_argument("--feedback", default="Make it shorter", help="Resume value sent to every thread")
+    args = parser.parse_args()
+
+    saver = MemorySaver()
+    checkpointer = InterruptIndexSaver(saver, index_path=":memory:")
+    app = build_graph(checkpointer, args.model_latency)
+
+    def start_thread(index):
+        config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+        app.invoke({"linkedin_topic": f"topic {index}", "generated_post": [], "human_feedback": []}, config)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(start_thread, range(args.threads)))
+    print(f"paused {args.threads} threads in {time.perf_counter() - start:.1f}s")
+
+    scanned, scan_seconds = timed(scan_pending, saver)
+    counted, count_seconds = timed(checkpointer.count)
+    (page, _), page_seconds = timed(checkpointer.pending, limit=args.page_size)
+    paged, paging_seconds = timed(lambda: sum(1 for _ in checkpointer.iter_pending(page_size=args.page_size)))
+    assert scanned == counted == paged == args.threads
+    print(f"\n{'find the paused threads':<34}{'ms':>10}")
+    print(f"{'scan every checkpoint':<34}{scan_seconds * 1000:>10.1f}")
+    print(f"{'index count()':<34}{count_seconds * 1000:>10.2f}")
+    print(f"{f'index first page of {args.page_size}':<34}{page_seconds * 1000:>10.2f}")
+    print(f"{'index all pages':<34}{paging_seconds * 1000:>10.1f}")
+
+    # Resume two batches taken from the head of the queue: one thread at a time, then in bulk
+    rows = list(checkpointer.iter_pending(page_size=args.page_size))
+    sequential = rows[:args.resume]
+    bulk = rows[args.resume:2 * args.resume]
+    start = time.perf_counter()
+    for row in sequential:
+        app.invoke(Command(resume=args.feedback), {"configurable": {"thread_id": row["thread_id"]}})
+    sequential_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    results = checkpointer.resume_many(app, {row["thread_id"]: args.feedback for row in bulk},
+                                       concurrency=args.concurrency)
+    bulk_seconds = time.perf_counter() - start
+    statuses = {}
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    print(f"\n{'resume':<34}{'threads/s':>10}")
+    print(f"{'one at a time':<34}{len(sequential) / sequential_seconds:>10.0f}")
+    print(f"{f'resume_many, {args.concurrency} concurrent':<34}{len(bulk) / bulk_seconds:>10.0f}")
+    print(f"\nresume_many results: {statuses}; pending threads: {checkpointer.count()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# Benchmark of speculative drafts in the feedback loop of 5_multiturn_conversation.py
+# Runs review rounds through the graph of 5_multiturn_conversation.py with a fake model: at every
+# pause a simulated reviewer reads the post for --think seconds, then answers with a feedback
+# drawn from a mix of common answers ("shorter", "polish it") and free-form requests. Reports the
+# time from the answer to the next post (what the reviewer waits for), without and with the
+# SpeculativeDrafter, and what the speculation cost.
+#
+# Usage:
+#   python benchmark_speculative_drafts.py
+#   python benchmark_speculative_drafts.py --rounds 100 --model-latency 0.5 --think 1 --common 0.3
+import argparse
+import random
+import statistics
+import time
+import uuid
+from typing import Annotated, List, Optional, TypedDict
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Command, interrupt
+
+from speculative_drafts import SpeculativeDrafter
+
+# Feedback answered by the default candidates, and free-form requests no draft covers
+COMMON_FEEDBACK = ["shorter", "Make it shorter", "too long", "polish it", "Ready to post!"]
+OTHER_FEEDBACK = ["Add a call to action", "Mention our new product", "Use a more casual tone",
+                  "Add two hashtags", "Start with a question"]
+
+
+def append(left: list, right: list) -> list:
+    return left + right
+
+
+class ReviewState(TypedDict):
+    linkedin_topic: str
+    generated_post: Annotated[List[AIMessage], append]
+    human_feedback: Annotated[List[str], append]
+
+
+# The graph of 5_multiturn_conversation.py, with a fake model writing the post
+def build_graph(model_latency: float, drafter: Optional[SpeculativeDrafter]):
+    def write_post(topic: str, feedback: str) -> AIMessage:
+        time.sleep(model_latency)  # The LLM call
+        content = f"A LinkedIn post about {topic} (feedback: {feedback})"
+        return AIMessage(content=content, id=str(uuid.uuid4()),
+                         usage_metadata={"input_tokens": 60, "output_tokens": 250, "total_tokens": 310})
+
+    def draft_key(state: ReviewState, config: RunnableConfig):
+        return (config["configurable"]["thread_id"], state["generated_post"][-1].id)
+
+    def model(state: ReviewState, config: RunnableConfig):
+        feedback = state["human_feedback"][-1] if state["human_feedback"] else "No feedback yet"
+        response = None
+        if drafter is not None and state["generated_post"]:
+            response = drafter.take(draft_key(state, config), feedback)
+        if response is None:
+            response = write_post(state["linkedin_topic"], feedback)
+        return {"generated_post": [response]}
+
+    def human_node(state: ReviewState, config: RunnableConfig):
+        if drafter is not None:
+            drafter.speculate(draft_key(state, config),
+                              lambda instruction: write_post(state["linkedin_topic"], instruction))
+        feedback = interrupt({"generated_post": state["generated_post"][-1].content})
+        if feedback.lower() == "done":
+            if drafter is not None:
+                drafter.discard(draft_key(state, config))
+            return Command(goto=END)
+        return Command(update={"human_feedback": [feedback]}, goto="model")
+
+    graph = StateGraph(ReviewState)
+    graph.add_node("model", model)
+    graph.add_node("human_node", human_node)
+    graph.add_edge(START, "model")
+    graph.add_edge("model", "human_node")
+    return graph.compile(checkpointer=MemorySaver())
+
+
+def run(args, drafter: Optional[SpeculativeDrafter]) -> List[float]:
+    app = build_graph(args.model_latency, drafter)
+    feedback_random = random.Random(args.seed)
+    waits = []
+    config = None
+    for round_index in range(args.rounds):
+        if round_index % args.rounds_per_thread == 0:
+            if config is not None:
+                app.invoke(Command(resume="done"), config)  # The reviewer approves the post
+            config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+            app.invoke({"linkedin_topic": "AI agents", "generated_post": [], "human_feedback": []}, config)
+        time.sleep(args.think)  # The reviewer reads the post
+        if feedback_random.random() < args.common:
+            feedback = feedback_random.choice(COMMON_FEEDBACK)
+        else:
+            feedback = feedback_random.choice(OTHER_FEEDBACK)
+        start = time.perf_counter()
+        app.invoke(Command(resume=feedback), config)
+        waits.append(time.perf_counter() - start)
+    app.invoke(Command(resume="done"), config)
+    return waits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reviewer wait per feedback round with and without speculative drafts.")
+    parser.add_argument("--rounds", type=int, default=40)
+    parser.add_argument("--rounds-per-thread", type=int, default=5)
+    parser.add_argument("--model-latency", type=float, default=0.2, help="Seconds per fake model call")
+    parser.add_argument("--think", type=float, default=0.3, help="Seconds the reviewer reads each post")
+    parser.add_argument("--common", type=float, default=0.5, help="Share of feedback covered by a candidate draft")
+    parser.add_argument("--max-calls", type=int, default=None, help="Cost cap: speculative calls in total")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'mode':<14}{'mean wait ms':>14}{'p50 ms':>9}{'p95 ms':>9}")
+    for mode in ("off", "speculative"):
+        drafter = SpeculativeDrafter(max_calls=args.max_calls) if mode == "speculative" else None
+        waits = sorted(wait * 1000 for wait in run(args, drafter))
+        print(f"{mode:<14}{statistics.mean(waits):>14.0f}{waits[len(waits) // 2]:>9.0f}"
+              f"{waits[min(len(waits) - 1, int(0.95 * len(waits)))]:>9.0f}")
+    print(drafter.report())
+    extra = drafter.stats()["calls"] / args.rounds
+    print(f"extra model calls per round: {extra:.2f}")
+    drafter.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+# Index of the threads waiting on a human
+# A thread paused by interrupt(...) is only visible in its latest checkpoint's pending writes, so
+# finding the threads waiting for review means loading the latest checkpoint of every thread.
+# InterruptIndexSaver wraps any checkpointer (MemorySaver, BoundedMemorySaver, SqliteSaver, ...)
+# and keeps a secondary index of the pending interrupts in a SQLite table:
+#
+#   (thread_id, checkpoint_ns, task_id) -> node, payload summary, checkpoint_id, created_at
+#
+# - a row is added when a node calls interrupt() (the "__interrupt__" write of its task) and
+#   removed when the thread saves a newer checkpoint, i.e. once it was resumed (or its state was
+#   updated) and moved past the interrupted step; each change is one SQLite transaction
+# - pending() pages through the index in creation order (keyset pagination, optionally per node)
+#   and count() counts it, without touching any checkpoint
+# - resume_many() / aresume_many() resume many threads concurrently with Command(resume=...)
+# - rebuild() recreates the index from the checkpoints, e.g. for a database written without it
+#
+# Usage:
+#   checkpointer = InterruptIndexSaver(MemorySaver(), index_path="interrupts.sqlite")
+#   page, cursor = checkpointer.pending(limit=100)
+#   checkpointer.resume_many(app, {row["thread_id"]: "done" for row in page})
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.constants import INTERRUPT
+from langgraph.types import Command
+
+# Defaults
+INDEX_PATH = "interrupts.sqlite"  # SQLite file holding the index (":memory:" for a process-local one)
+SUMMARY_CHARS = 200  # Length of the payload summary stored in the index
+RESUME_CONCURRENCY = 32  # Threads resumed at the same time by resume_many()
+
+
+# Default payload summary: the interrupt value as compact JSON, cut to `limit` characters
+def summarize_payload(value: Any, limit: int = SUMMARY_CHARS) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, default=str, separators=(",", ":"))
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+# The node of an interrupted task: the last element of its task path ("~__pregel_pull, human_node")
+def node_of(task_path: str, interrupt) -> str:
+    if task_path:
+        return task_path.split(",")[-1].strip()
+    namespace = getattr(interrupt, "ns", None) or [""]
+    return namespace[-1].split(":")[0]
+
+
+class InterruptIndexSaver(BaseCheckpointSaver):
+    def __init__(
+        self,
+        saver: BaseCheckpointSaver,
+        index_path: str = INDEX_PATH,
+        summarize: Callable[[Any], str] = summarize_payload,
+    ) -> None:
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.summarize = summarize  # Turns an interrupt value into the short text stored in the index
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(index_path, check_same_thread=False, isolation_level=None)
+        if index_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pending_interrupts (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                node TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, task_id)
+            );
+            CREATE INDEX IF NOT EXISTS pending_interrupts_created ON pending_interrupts (created_at, thread_id, task_id);
+            CREATE INDEX IF NOT EXISTS pending_interrupts_node ON pending_interrupts (node, created_at, thread_id, task_id);
+            """
+        )
+
+    @property
+    def config_specs(self):
+        return self.saver.config_specs
+
+    # ----- Index maintenance -----
+
+    # Rows for the interrupts among the writes of a task (empty if it did not interrupt)
+    def _interrupt_rows(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                        task_path: str, created_at: Optional[float] = None) -> List[tuple]:
+        configurable = config["configurable"]
+        created_at = time.time() if created_at is None else created_at
+        rows = []
+        for channel, value in writes:
+            if channel != INTERRUPT:
+                continue
+            for interrupt in value if isinstance(value, (list, tuple)) else [value]:
+                rows.append((
+                    str(configurable["thread_id"]),
+                    configurable.get("checkpoint_ns", ""),
+                    task_id,
+                    configurable["checkpoint_id"],
+                    node_of(task_path, interrupt),
+                    self.summarize(getattr(interrupt, "value", interrupt)),
+                    created_at,
+                ))
+        return rows
+
+    def _index_interrupts(self, rows: List[tuple], replace_all: bool = False) -> None:
+        if not rows and not replace_all:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if replace_all:
+                    self._conn.execute("DELETE FROM pending_interrupts")
+                self._conn.executemany("INSERT OR REPLACE INTO pending_interrupts VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # A new checkpoint after `parent_id` means the thread moved past the interrupts of that checkpoint
+    # and of every older one (checkpoint ids sort by time). Writes may be saved after the checkpoint
+    # that follows them, so the interrupts of newer checkpoints are kept.
+    def _clear_interrupts(self, config: RunnableConfig) -> None:
+        configurable = config["configurable"]
+        parent_id = configurable.get("checkpoint_id")
+        if not parent_id:
+            return
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM pending_interrupts WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id <= ?",
+                (str(configurable["thread_id"]), configurable.get("checkpoint_ns", ""), parent_id),
+            )
+
+    # Recreates the index from the latest checkpoint of every thread
+    def rebuild(self) -> int:
+        latest: Dict[tuple, CheckpointTuple] = {}
+        for checkpoint_tuple in list(self.saver.list(None)):
+            configurable = checkpoint_tuple.config["configurable"]
+            key = (str(configurable["thread_id"]), configurable.get("checkpoint_ns", ""))
+            if key not in latest or configurable["checkpoint_id"] > latest[key].config["configurable"]["checkpoint_id"]:
+                latest[key] = checkpoint_tuple
+        rows = []
+        for checkpoint_tuple in latest.values():
+            created_at = datetime.fromisoformat(checkpoint_tuple.checkpoint["ts"]).timestamp()
+            for task_id, channel, value in checkpoint_tuple.pending_writes or []:
+                rows.extend(self._interrupt_rows(checkpoint_tuple.config, [(channel, value)], task_id, "", created_at))
+        self._index_interrupts(rows, replace_all=True)
+        return len(rows)
+
+    # ----- Queries -----
+
+    # One page of pending interrupts, oldest first, and the cursor of the next page (None at the end)
+    def pending(self, limit: int = 100, cursor: Optional[tuple] = None, node: Optional[str] = None
+                ) -> Tuple[List[dict], Optional[tuple]]:
+        query = "SELECT thread_id, checkpoint_ns, task_id, checkpoint_id, node, summary, created_at FROM pending_interrupts"
+        conditions, params = [], []
+        if node is not None:
+            conditions.append("node = ?")
+            params.append(node)
+        if cursor is not None:
+            conditions.append("(created_at, thread_id, task_id) > (?, ?, ?)")
+            params.extend(cursor)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at, thread_id, task_id LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        page = [
+            {"thread_id": row[0], "checkpoint_ns": row[1], "task_id": row[2], "checkpoint_id": row[3],
+             "node": row[4], "summary": row[5], "created_at": row[6]}
+            for row in rows
+        ]
+        next_cursor = (rows[-1][6], rows[-1][0], rows[-1][2]) if len(rows) == limit else None
+        return page, next_cursor
+
+    # Iterates over every pending interrupt, one page at a time
+    def iter_pending(self, page_size: int = 1000, node: Optional[str] = None) -> Iterator[dict]:
+        cursor = None
+        while True:
+            page, cursor = self.pending(limit=page_size, cursor=cursor, node=node)
+            yield from page
+            if cursor is None:
+                return
+
+    def count(self, node: Optional[str] = None) -> int:
+        with self._lock:
+            if node is None:
+                return self._conn.execute("SELECT COUNT(*) FROM pending_interrupts").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM pending_interrupts WHERE node = ?", (node,)).fetchone()[0]
+
+    def is_pending(self, thread_id, checkpoint_ns: str = "") -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM pending_interrupts WHERE thread_id = ? AND checkpoint_ns = ? LIMIT 1",
+                (str(thread_id), checkpoint_ns),
+            ).fetchone() is not None
+
+    # ----- Bulk resume -----
+
+    # Resumes many paused threads, `concurrency` at a time. `resumes` maps thread ids to resume
+    # values (or is a list of (thread_id, value) pairs). Threads not waiting on a human are skipped.
+    # Returns one result per thread: status "resumed" (finished or moved on), "interrupted" (paused
+    # again, e.g. by the next review round), "not_pending" or "error".
+    # resume_many runs the graph on threads (any checkpointer); aresume_many on the event loop
+    # (checkpointers with async support, e.g. MemorySaver, AsyncSqliteSaver, FastSqliteSaver).
+    def resume_many(self, app, resumes: Union[Dict[Any, Any], Iterable[Tuple[Any, Any]]],
+                    concurrency: int = RESUME_CONCURRENCY) -> List[dict]:
+        items = list(resumes.items() if isinstance(resumes, dict) else resumes)
+
+        def resume(item) -> dict:
+            thread_id, value = item
+            if not self.is_pending(thread_id):
+                return {"thread_id": thread_id, "status": "not_pending"}
+            try:
+                app.invoke(Command(resume=value), {"configurable": {"thread_id": thread_id}})
+            except Exception as error:
+                return {"thread_id": thread_id, "status": "error", "error": repr(error)}
+            return self._resumed(thread_id)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(resume, items))
+
+    async def aresume_many(self, app, resumes: Union[Dict[Any, Any], Iterable[Tuple[Any, Any]]],
+                           concurrency: int = RESUME_CONCURRENCY) -> List[dict]:
+        items = list(resumes.items() if isinstance(resumes, dict) else resumes)
+        slots = asyncio.Semaphore(concurrency)
+
+        async def resume(thread_id, value) -> dict:
+            if not self.is_pending(thread_id):
+                return {"thread_id": thread_id, "status": "not_pending"}
+            async with slots:
+                try:
+                    await app.ainvoke(Command(resume=value), {"configurable": {"thread_id": thread_id}})
+                except Exception as error:
+                    return {"thread_id": thread_id, "status": "error", "error": repr(error)}
+            return self._resumed(thread_id)
+
+        return list(await asyncio.gather(*(resume(thread_id, value) for thread_id, value in items)))
+
+    def _resumed(self, thread_id) -> dict:
+        return {"thread_id": thread_id, "status": "interrupted" if self.is_pending(thread_id) else "resumed"}
+
+    # ----- Checkpointer API -----
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.saver.get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        return self.saver.list(config, filter=filter, before=before, limit=limit)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saved_config = self.saver.put(config, checkpoint, metadata, new_versions)
+        self._clear_interrupts(config)  # After the save: the index never drops an interrupt still needed
+        return saved_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.saver.put_writes(config, writes, task_id, task_path)
+        self._index_interrupts(self._interrupt_rows(config, writes, task_id, task_path))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await self.saver.aget_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        async for checkpoint_tuple in self.saver.alist(config, filter=filter, before=before, limit=limit):
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saved_config = await self.saver.aput(config, checkpoint, metadata, new_versions)
+        self._clear_interrupts(config)
+        return saved_config
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await self.saver.aput_writes(config, writes, task_id, task_path)
+        self._index_interrupts(self._interrupt_rows(config, writes, task_id, task_path))
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
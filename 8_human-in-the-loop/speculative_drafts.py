@@ -0,0 +1,209 @@
+# Speculative drafts while a thread waits on human feedback
+# In the feedback loops of 1_using_input().py and 5_multiturn_conversation.py the model only starts
+# once the reviewer has answered, so every round costs the reviewer a full LLM call. Most answers
+# are a handful of requests ("shorter", "ready to post"), so the SpeculativeDrafter generates the
+# revisions for those while the reviewer is still reading:
+#
+#   drafter.speculate(key, generate)   # at the pause: generate(instruction) for every candidate
+#   drafter.take(key, feedback)        # after the answer: the matching draft, or None
+#   drafter.take_candidate(key, "final")  # after an approval: the post in final form, or None
+#
+# - `key` identifies the draft under review (e.g. thread id + message id of the post), so calling
+#   speculate() again for the same draft (a node re-run on resume) does nothing
+# - a feedback uses a draft only if its normalized text is one of the candidate's triggers, so a
+#   draft is never used for a request it was not written for; a draft still being written is
+#   waited for, which is still faster than starting the call then
+# - cost cap: at most `max_calls` speculative calls and `max_tokens` tokens (from the model's usage
+#   metadata) in total; once spent, speculate() does nothing
+# - drafts never taken (an abandoned thread, one resumed some other way) expire after `ttl`
+#   seconds, and at most `max_pending` keys are kept (least recent dropped first), so a review
+#   queue of any size holds a bounded number of drafts; close() stops the workers
+# - stats() reports the hit rate, the latency saved and the calls and tokens spent and wasted
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+# Revisions drafted at every pause: name -> (instruction given to the model, reviewer answers it covers)
+CANDIDATES = {
+    "shorter": (
+        "Make the post shorter and tighter: keep the key points and cut the filler.",
+        {"shorter", "make it shorter", "shorten it", "too long", "tighten it", "make it tighter",
+         "more concise", "make it more concise", "shorter please", "make it shorter and tighter"},
+    ),
+    "final": (
+        "Polish the post for publishing: fix wording and formatting, keep the content unchanged.",
+        {"polish it", "polish", "final version", "make it final", "finalize it", "ready to post",
+         "publish it", "looks good polish it", "clean it up"},
+    ),
+}
+
+# Default cost cap
+MAX_CALLS = 200  # Speculative model calls in total
+MAX_TOKENS = None  # Tokens of speculative calls in total (None: no token cap)
+
+# Default retention of drafts that are never taken
+MAX_PENDING = 1000  # Keys with drafts kept at a time
+DRAFT_TTL = 3600.0  # Seconds a draft is kept waiting for the feedback
+
+
+def normalize_feedback(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", text.casefold()).split())
+
+
+def tokens_of(result: Any) -> int:
+    usage = getattr(result, "usage_metadata", None) or {}
+    return usage.get("total_tokens", 0)
+
+
+class SpeculativeDrafter:
+    def __init__(self, candidates: Dict[str, tuple] = CANDIDATES, max_workers: int = 4,
+                 max_calls: Optional[int] = MAX_CALLS, max_tokens: Optional[int] = MAX_TOKENS,
+                 max_pending: Optional[int] = MAX_PENDING, ttl: Optional[float] = DRAFT_TTL):
+        self.candidates = candidates
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._triggers = {
+            normalize_feedback(trigger): name for name, (_, triggers) in candidates.items() for trigger in triggers
+        }
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="draft")
+        self._lock = threading.Lock()
+        # key -> (time started, candidate name -> draft being written), oldest first
+        self._drafts: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._closed = False
+        self.counters = {
+            "rounds": 0, "hits": 0, "misses": 0, "calls": 0, "calls_wasted": 0, "tokens": 0, "tokens_wasted": 0,
+            "skipped_budget": 0, "expired": 0, "saved_seconds": 0.0, "waited_seconds": 0.0,
+        }
+
+    def _within_budget(self) -> bool:
+        if self.max_calls is not None and self.counters["calls"] + len(self.candidates) > self.max_calls:
+            return False
+        return self.max_tokens is None or self.counters["tokens"] < self.max_tokens
+
+    # Starts drafting every candidate revision of the draft `key`; generate(instruction) returns the
+    # revised post (e.g. an AIMessage). Does nothing if already started for `key`, over budget or
+    # closed. Drafts past their ttl or beyond max_pending are dropped on the way.
+    def speculate(self, key: Hashable, generate: Callable[[str], Any]) -> None:
+        with self._lock:
+            if not self._closed and key not in self._drafts:
+                if self._within_budget():
+                    self.counters["calls"] += len(self.candidates)
+                    self._drafts[key] = (time.monotonic(), {
+                        name: self._executor.submit(self._draft, generate, instruction)
+                        for name, (instruction, _) in self.candidates.items()
+                    })
+                else:
+                    self.counters["skipped_budget"] += 1
+            expired = self._expire()
+        self._discard_all(expired)
+
+    # Removes the drafts past their ttl and the oldest ones beyond max_pending (called with the lock
+    # held); returns them so they can be discarded once the lock is released
+    def _expire(self) -> List[Dict[str, Future]]:
+        expired = []
+        now = time.monotonic()
+        while self._drafts:
+            key, (started, drafts) = next(iter(self._drafts.items()))
+            too_old = self.ttl is not None and now - started > self.ttl
+            too_many = self.max_pending is not None and len(self._drafts) > self.max_pending
+            if not (too_old or too_many):
+                break
+            del self._drafts[key]
+            expired.append(drafts)
+            self.counters["expired"] += 1
+        return expired
+
+    def _discard_all(self, expired: List[Dict[str, Future]]) -> None:
+        for drafts in expired:
+            for future in drafts.values():
+                self._discard(future)
+
+    def _draft(self, generate: Callable[[str], Any], instruction: str):
+        start = time.monotonic()
+        result = generate(instruction)
+        tokens = tokens_of(result)
+        with self._lock:
+            self.counters["tokens"] += tokens
+        return result, start, time.monotonic(), tokens
+
+    # The draft matching `feedback` for the draft `key`, or None. The other drafts of `key` are dropped.
+    def take(self, key: Hashable, feedback: str) -> Optional[Any]:
+        return self.take_candidate(key, self._triggers.get(normalize_feedback(feedback)))
+
+    # The draft of the candidate `name` (e.g. "final" when the reviewer approves the post) for the
+    # draft `key`, or None; name=None counts a miss. The other drafts of `key` are dropped.
+    def take_candidate(self, key: Hashable, name: Optional[str]) -> Optional[Any]:
+        with self._lock:
+            entry = self._drafts.pop(key, None)
+        if entry is None:
+            return None
+        drafts = entry[1]
+        if name not in drafts:
+            name = None
+        for other, future in drafts.items():
+            if other != name:
+                self._discard(future)
+        with self._lock:
+            self.counters["rounds"] += 1
+            self.counters["hits" if name else "misses"] += 1
+        if name is None:
+            return None
+
+        asked = time.monotonic()
+        try:
+            result, start, end, tokens = drafts[name].result()
+        except Exception:
+            return None  # The model call failed: the node generates the revision itself
+        with self._lock:
+            waited = max(0.0, end - asked)
+            self.counters["waited_seconds"] += waited
+            self.counters["saved_seconds"] += (end - start) - waited
+        return result
+
+    # Forgets the drafts of `key` without using them (e.g. the reviewer approved the post as is)
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._drafts.pop(key, None)
+        if entry is not None:
+            self._discard_all([entry[1]])
+
+    # Drops every pending draft and stops the workers: queued drafts are cancelled, so exiting only
+    # waits for the calls already running (at most max_workers); speculate() does nothing afterwards
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            pending = [drafts for _, drafts in self._drafts.values()]
+            self._drafts.clear()
+        self._discard_all(pending)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _discard(self, future: Future) -> None:
+        if future.cancel():  # Not started yet: nothing was spent
+            with self._lock:
+                self.counters["calls"] -= 1
+            return
+
+        def count_waste(done: Future) -> None:
+            with self._lock:
+                self.counters["calls_wasted"] += 1
+                if not done.exception():
+                    self.counters["tokens_wasted"] += done.result()[3]
+
+        future.add_done_callback(count_waste)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        counters["hit_rate"] = counters["hits"] / counters["rounds"] if counters["rounds"] else 0.0
+        return counters
+
+    def report(self) -> str:
+        stats = self.stats()
+        return (f"speculation: {stats['hits']}/{stats['rounds']} feedback rounds hit ({stats['hit_rate']:.0%}), "
+                f"{stats['saved_seconds']:.1f}s of model time saved; {stats['calls']} calls "
+                f"({stats['calls_wasted']} unused), {stats['tokens']} tokens ({stats['tokens_wasted']} unused)")
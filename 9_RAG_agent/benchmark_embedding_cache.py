@@ -0,0 +1,87 @@
+# Benchmark of the persistent embedding cache
+# Simulates the start of a RAG notebook (embedding the corpus for the vector store) followed by a
+# stream of questions, a share of them repeated, with a fake embedding model that takes
+# --latency seconds per call plus --per-text seconds per text. Runs a cold start (empty cache),
+# then a restart on the same cache file, and reports the embedding calls, the time spent and the
+# size of the cache, with vectors stored as float32 and float16.
+#
+# Usage:
+#   python benchmark_embedding_cache.py
+#   python benchmark_embedding_cache.py --docs 20000 --queries 2000 --repeat 0.5 --dimensions 1536
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from embedding_cache import CachedEmbeddings
+
+
+# Fake embedding model: a fixed latency per call plus a cost per text, random unit vectors
+class SlowEmbeddings(Embeddings):
+    def __init__(self, dimensions: int, latency: float, per_text: float):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.per_text = per_text
+        self.calls = 0
+
+    def _vectors(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.latency + self.per_text * len(texts))
+        vectors = np.random.default_rng(len(texts)).standard_normal((len(texts), self.dimensions), dtype=np.float32)
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._vectors(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vectors([text])[0]
+
+
+def run(embeddings: Embeddings, docs: List[str], queries: List[str]) -> dict:
+    start = time.perf_counter()
+    embeddings.embed_documents(docs)
+    ingest_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for query in queries:
+        embeddings.embed_query(query)
+    return {"ingest_s": ingest_seconds, "queries_s": time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding calls and time with and without the embedding cache.")
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--repeat", type=float, default=0.3, help="Share of questions asked before (with other casing)")
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per embedding call")
+    parser.add_argument("--per-text", type=float, default=0.0002, help="Seconds per embedded text")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    docs = [f"Chunk {index} of the gym handbook: opening hours, plans and classes." for index in range(args.docs)]
+    queries = []
+    for index in range(args.queries):
+        if queries and rng.random() < args.repeat:
+            queries.append(rng.choice(queries).upper())
+        else:
+            queries.append(f"Question {index} about the gym?")
+
+    print(f"{'run':<26}{'calls':>7}{'ingest s':>10}{'queries s':>11}{'hit rate':>10}{'cache MB':>10}")
+    for dtype in ("none", "float32", "float16"):
+        path = os.path.join(tempfile.mkdtemp(), "embedding_cache.sqlite")
+        for start in ("cold", "restart") if dtype != "none" else ("every start",):
+            model = SlowEmbeddings(args.dimensions, args.latency, args.per_text)
+            embeddings = model if dtype == "none" else CachedEmbeddings(model, path, dtype=dtype)
+            result = run(embeddings, docs, queries)
+            stats = embeddings.stats() if dtype != "none" else {"hit_rate": 0.0, "stored_bytes": 0}
+            print(f"{f'{dtype}, {start}':<26}{model.calls:>7}{result['ingest_s']:>10.2f}{result['queries_s']:>11.2f}"
+                  f"{stats['hit_rate']:>10.0%}{stats['stored_bytes'] / 2 ** 20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
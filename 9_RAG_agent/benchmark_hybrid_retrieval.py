@@ -0,0 +1,152 @@
+# Benchmark of BM25, dense and hybrid retrieval
+# Generates a local test corpus of made-up words: every document has a unique name (like a trainer)
+# and a few concepts, each concept having several synonyms. Three kinds of questions are asked,
+# each with one relevant document:
+# - keyword: the document's name ("Who is Neha Kapoor?")
+# - semantic: its concepts, worded with other synonyms than the document's ("who is the owner")
+# - mixed: the name and one concept, worded with another synonym
+# The fake embedding model maps synonyms to the same vector and gives names little weight, like
+# dense models do with rare terms, and takes --latency seconds per query. For every retriever it
+# reports recall@k per kind of question, the mean and p50 latency, the embedding calls and, for
+# the hybrid retriever, the share of questions answered on the keyword-only path.
+#
+# Usage:
+#   python benchmark_hybrid_retrieval.py
+#   python benchmark_hybrid_retrieval.py --docs 50000 --k 3 10 --latency 0.1
+import argparse
+import random
+import shutil
+import tempfile
+import time
+import zlib
+from typing import List
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from hybrid_retriever import BM25Retriever, HybridRetriever
+from numpy_vector_store import NumpyVectorStore
+
+SYLLABLES = "ba be bi bo bu da de di do du ka ke ki ko ku la le li lo lu ma me mi mo mu na ne ni no nu ra re ri ro ru sa se si so su ta te ti to tu va ve vi vo vu".split()
+FILLER = "the gym offers members a place with good service and friendly staff every day".split()
+KINDS = ["keyword", "semantic", "mixed"]
+
+
+def made_up_word(rng: random.Random, syllables: int) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables))
+
+
+class Corpus:
+    def __init__(self, docs: int, concepts: int, synonyms: int, seed: int = 0):
+        rng = random.Random(seed)
+        words = set()
+
+        def fresh(syllables):
+            while True:
+                word = made_up_word(rng, syllables)
+                if word not in words:
+                    words.add(word)
+                    return word
+
+        # Every concept has `synonyms` words; documents use the first, questions the others
+        self.synonyms = [[fresh(3) for _ in range(synonyms)] for _ in range(concepts)]
+        self.concept_of = {word: concept for concept, words in enumerate(self.synonyms) for word in words}
+        self.names = [f"{fresh(4)} {fresh(4)}" for _ in range(docs)]
+        self.concepts = [rng.sample(range(concepts), 4) for _ in range(docs)]
+        self.documents = []
+        for index in range(docs):
+            text = [*self.names[index].split(), *(self.synonyms[c][0] for c in self.concepts[index]),
+                    *rng.sample(FILLER, 6)]
+            rng.shuffle(text)
+            self.documents.append(Document(page_content=" ".join(text), metadata={"source": f"doc-{index}"}))
+        self.rng = rng
+
+    def question(self, kind: str, index: int) -> str:
+        other = lambda concept: self.rng.choice(self.synonyms[concept][1:])
+        if kind == "keyword":
+            return f"who is {self.names[index]}"
+        if kind == "semantic":
+            return " ".join(other(concept) for concept in self.concepts[index][:3])
+        return f"{self.names[index]} {other(self.concepts[index][0])}"
+
+
+# Fake embedding model: synonyms share a vector, other words (names) get a weak word vector
+class ConceptEmbeddings(Embeddings):
+    def __init__(self, corpus: Corpus, dimensions: int, name_weight: float, latency: float):
+        self.concept_of = corpus.concept_of
+        self.dimensions = dimensions
+        self.name_weight = name_weight
+        self.latency = latency
+        self.calls = 0
+
+    def _word(self, word: str) -> np.ndarray:
+        concept = self.concept_of.get(word)
+        seed = concept if concept is not None else 1_000_000 + zlib.crc32(word.encode())
+        vector = np.random.default_rng(seed).standard_normal(self.dimensions).astype(np.float32)
+        return vector if concept is not None else vector * self.name_weight
+
+    def _vector(self, text: str) -> List[float]:
+        vector = sum((self._word(word) for word in text.split()), np.zeros(self.dimensions, dtype=np.float32))
+        return (vector / (np.linalg.norm(vector) or 1)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return self._vector(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k and latency of BM25, dense and hybrid retrieval.")
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--concepts", type=int, default=500)
+    parser.add_argument("--synonyms", type=int, default=3)
+    parser.add_argument("--questions", type=int, default=100, help="Questions of each kind")
+    parser.add_argument("--k", type=int, nargs="+", default=[3, 10])
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--name-weight", type=float, default=0.3, help="Weight of non-concept words in the embeddings")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per query embedding")
+    args = parser.parse_args()
+
+    corpus = Corpus(args.docs, args.concepts, args.synonyms)
+    embeddings = ConceptEmbeddings(corpus, args.dimensions, args.name_weight, latency=0.0)
+    directory = tempfile.mkdtemp()
+    store = NumpyVectorStore.from_documents(corpus.documents, embeddings, path=directory)
+    embeddings.latency = args.latency
+    keyword = BM25Retriever.from_documents(corpus.documents)
+    rng = random.Random(1)
+    questions = [(kind, index, corpus.question(kind, index))
+                 for kind in KINDS for index in rng.sample(range(args.docs), args.questions)]
+
+    print(f"{args.docs} documents, {len(questions)} questions, {args.latency * 1000:.0f} ms per query embedding")
+    print(f"{'k':>3} {'retriever':<20}" + "".join(f"{kind:>10}" for kind in KINDS) +
+          f"{'mean ms':>9}{'p50 ms':>8}{'calls':>7}{'keyword-only':>14}")
+    for k in args.k:
+        dense = store.as_retriever(search_kwargs={"k": k})
+        retrievers = {
+            "bm25": BM25Retriever(index=keyword.index, documents=keyword.documents, k=k),
+            "dense": dense,
+            "hybrid (always fuse)": HybridRetriever(keyword=keyword, dense=dense, k=k, keyword_only=False),
+            "hybrid": HybridRetriever(keyword=keyword, dense=dense, k=k),
+        }
+        for name, retriever in retrievers.items():
+            calls = embeddings.calls
+            found = {kind: 0 for kind in KINDS}
+            latencies = []
+            for kind, index, question in questions:
+                start = time.perf_counter()
+                results = retriever.invoke(question)
+                latencies.append((time.perf_counter() - start) * 1000)
+                found[kind] += any(document.metadata["source"] == f"doc-{index}" for document in results)
+            share = f"{retriever.stats()['keyword_only_rate']:.0%}" if name == "hybrid" else "-"
+            print(f"{k:>3} {name:<20}" + "".join(f"{found[kind] / args.questions:>10.0%}" for kind in KINDS) +
+                  f"{sum(latencies) / len(latencies):>9.1f}{sorted(latencies)[len(latencies) // 2]:>8.1f}"
+                  f"{embeddings.calls - calls:>7}{share:>14}")
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
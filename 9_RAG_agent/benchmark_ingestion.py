@@ -0,0 +1,139 @@
+# Benchmark of the streaming ingestion pipeline
+# Generates a synthetic corpus of text files and ingests it into a NumpyVectorStore with a fake
+# embedding model taking --latency seconds per call. For every corpus size it reports docs/s,
+# chunks/s and the peak anonymous memory of the process (heap, sampled from /proc on Linux; the
+# pages of the memory-mapped index are page cache and not counted), each run in a fresh
+# interpreter. It then runs again on the unchanged corpus, and again after editing --changed of
+# the files, to show that only changed files are re-embedded.
+#
+# Usage:
+#   python benchmark_ingestion.py
+#   python benchmark_ingestion.py --files 2000 20000 --workers 8 --latency 0.05
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ingestion_pipeline import IngestionPipeline, iter_files
+from numpy_vector_store import NumpyVectorStore
+
+WORDS = ("gym member trainer class yoga spin pool sauna plan premium basic standard hours weekend "
+         "holiday locker session package discount student senior corporate equipment cardio").split()
+
+
+# Fake embedding model: a fixed latency per call, vectors derived from the text
+class LatencyEmbeddings(Embeddings):
+    def __init__(self, dimensions: int, latency: float):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.latency)
+        rng = np.random.default_rng(len(texts))
+        return rng.standard_normal((len(texts), self.dimensions), dtype=np.float32).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def write_corpus(root: str, files: int, chars: int) -> None:
+    rng = random.Random(0)
+    for index in range(files):
+        directory = os.path.join(root, f"part-{index // 1000:04d}")
+        os.makedirs(directory, exist_ok=True)
+        words = []
+        while sum(len(word) + 1 for word in words) < chars:
+            words.append(rng.choice(WORDS))
+        with open(os.path.join(directory, f"doc-{index}.txt"), "w") as file:
+            file.write(" ".join(words))
+
+
+# Anonymous resident memory (heap, not file-backed) from /proc, or NaN where unavailable
+def anonymous_memory() -> float:
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def ingest(corpus: str, index: str, state: str, workers: int, latency: float, dimensions: int) -> dict:
+    peak = [anonymous_memory()]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.05):
+            peak[0] = max(peak[0], anonymous_memory())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    embeddings = LatencyEmbeddings(dimensions, latency)
+    pipeline = IngestionPipeline(NumpyVectorStore(index, embeddings), embeddings, state_path=state, workers=workers)
+    stats = pipeline.run(iter_files(corpus), root=corpus, prune=True)
+    done.set()
+    sampler.join()
+    stats["embedding_calls"] = embeddings.calls
+    stats["peak_anonymous_mb"] = max(peak[0], anonymous_memory()) / 2 ** 20
+    stats["index_rows"] = len(NumpyVectorStore(index))
+    return stats
+
+
+def in_subprocess(*args) -> dict:
+    output = subprocess.run([sys.executable, __file__, "--step", *map(str, args)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and peak memory of the streaming ingestion pipeline.")
+    parser.add_argument("--files", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--chars", type=int, default=3000, help="Characters per file (~4 chunks of 1000)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per embedding call")
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--changed", type=float, default=0.01, help="Share of files edited before the last run")
+    parser.add_argument("--step", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.step:  # In the subprocess
+        corpus, index, state = args.step
+        print(json.dumps(ingest(corpus, index, state, args.workers, args.latency, args.dimensions)))
+        return
+
+    print(f"{'files':>7} {'run':<10}{'ingested':>9}{'chunks':>8}{'calls':>7}{'seconds':>9}{'docs/s':>8}"
+          f"{'chunks/s':>10}{'peak anon MB':>13}{'rows':>8}")
+    for files in args.files:
+        directory = tempfile.mkdtemp()
+        corpus, index, state = (os.path.join(directory, name) for name in ("corpus", "index", "state.sqlite"))
+        write_corpus(corpus, files, args.chars)
+        for run in ("first", "unchanged", "edited"):
+            if run == "edited":
+                rng = random.Random(1)
+                for path in rng.sample(list(iter_files(corpus)), max(1, int(files * args.changed))):
+                    with open(path, "a") as file:
+                        file.write(" edited")
+            stats = in_subprocess(corpus, index, state, "--workers", args.workers, "--latency", args.latency,
+                                  "--dimensions", args.dimensions)
+            print(f"{files:>7} {run:<10}{stats['ingested']:>9}{stats['chunks']:>8}{stats['embedding_calls']:>7}"
+                  f"{stats['seconds']:>9.1f}{stats['docs_per_s']:>8.0f}{stats['chunks_per_s']:>10.0f}"
+                  f"{stats['peak_anonymous_mb']:>13.0f}{stats['index_rows']:>8}")
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# Benchmark of NumpyVectorStore against Chroma
+# For every corpus size and backend, builds an index of random unit vectors on disk, then opens it
+# in a fresh process and measures the time to open it, the latency of similarity and MMR searches
+# (k=3, like the notebooks), the throughput of a batch of queries, and the memory of the process:
+# RSS, and its anonymous part (heap; on Linux). The pages of a memory-mapped index count in RSS
+# but are page cache, which the OS can drop and share between processes.
+# Embeddings are precomputed, so the build time is the time spent in the store.
+#
+# Chroma is only measured if chromadb is installed (pip install chromadb).
+#
+# Usage:
+#   python benchmark_vector_store.py
+#   python benchmark_vector_store.py --sizes 10000 100000 1000000 --dimensions 384
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+import psutil
+from langchain_core.embeddings import Embeddings
+
+from numpy_vector_store import NumpyVectorStore
+
+BACKENDS = ["numpy", "numpy-int8", "chroma"]
+SOURCES = [f"{name}.txt" for name in ("about", "hours", "membership", "classes", "trainers", "facilities")]
+
+
+# Embeddings read from a precomputed matrix: text "chunk 123" is row 123; queries are random
+class MatrixEmbeddings(Embeddings):
+    def __init__(self, path: str):
+        self.matrix = np.load(path, mmap_mode="r")
+        self.rng = np.random.default_rng(1)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        rows = [int(text.split()[1]) for text in texts]
+        return np.asarray(self.matrix[rows]).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.rng.standard_normal(self.matrix.shape[1]).tolist()
+
+
+def open_store(backend: str, path: str, embeddings: Embeddings):
+    if backend == "chroma":
+        from langchain_community.vectorstores import Chroma
+        return Chroma(persist_directory=path, embedding_function=embeddings)
+    return NumpyVectorStore(path, embeddings)
+
+
+def build(backend: str, path: str, matrix_path: str, size: int) -> dict:
+    embeddings = MatrixEmbeddings(matrix_path)
+    texts = [f"chunk {index} of the corpus" for index in range(size)]
+    metadatas = [{"source": SOURCES[index % len(SOURCES)]} for index in range(size)]
+    start = time.perf_counter()
+    if backend == "chroma":
+        from langchain_community.vectorstores import Chroma
+        store = Chroma(persist_directory=path, embedding_function=embeddings)
+        for offset in range(0, size, 5000):  # Chroma's maximum batch size
+            store.add_texts(texts[offset:offset + 5000], metadatas[offset:offset + 5000])
+    else:
+        NumpyVectorStore.from_texts(texts, embeddings, metadatas, path=path,
+                                    quantization="int8" if backend == "numpy-int8" else None)
+    return {"build_s": time.perf_counter() - start}
+
+
+def query(backend: str, path: str, matrix_path: str, queries: int, batch: int) -> dict:
+    embeddings = MatrixEmbeddings(matrix_path)
+    start = time.perf_counter()
+    store = open_store(backend, path, embeddings)
+    open_seconds = time.perf_counter() - start
+    vectors = [embeddings.embed_query("") for _ in range(queries)]
+
+    def latencies(search) -> List[float]:
+        result = []
+        for vector in vectors:
+            start = time.perf_counter()
+            search(vector)
+            result.append((time.perf_counter() - start) * 1000)
+        return sorted(result)
+
+    similarity = latencies(lambda vector: store.similarity_search_by_vector(vector, k=3))
+    mmr = latencies(lambda vector: store.max_marginal_relevance_search_by_vector(vector, k=3, fetch_k=20))
+    filtered = latencies(lambda vector: store.similarity_search_by_vector(vector, k=3, filter={"source": "hours.txt"}))
+    start = time.perf_counter()
+    if backend == "chroma":
+        store._collection.query(query_embeddings=vectors[:batch], n_results=3)
+    else:
+        store.similarity_search_by_vectors(vectors[:batch], k=3)
+    batch_seconds = time.perf_counter() - start
+    return {
+        "open_ms": open_seconds * 1000,
+        "similarity_p50_ms": similarity[len(similarity) // 2],
+        "mmr_p50_ms": mmr[len(mmr) // 2],
+        "filtered_p50_ms": filtered[len(filtered) // 2],
+        "batch_qps": batch / batch_seconds,
+        "rss_mb": psutil.Process().memory_info().rss / 2 ** 20,
+        "anonymous_mb": anonymous_memory() / 2 ** 20,
+    }
+
+
+# Anonymous resident memory (heap, not file-backed) from /proc, or NaN where unavailable
+def anonymous_memory() -> float:
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+# Runs one step in a fresh interpreter, so the memory and open time of each backend are its own
+def in_subprocess(*args) -> dict:
+    output = subprocess.run([sys.executable, __file__, "--step", *map(str, args)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build time, query latency and memory of NumpyVectorStore and Chroma.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=64, help="Queries scored together for the batch throughput")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--step", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.step:  # In the subprocess
+        step, backend, path, matrix_path, *rest = args.step
+        if step == "build":
+            print(json.dumps(build(backend, path, matrix_path, int(rest[0]))))
+        else:
+            print(json.dumps(query(backend, path, matrix_path, int(rest[0]), int(rest[1]))))
+        return
+
+    backends = list(args.backends)
+    if "chroma" in backends:
+        try:
+            import chromadb  # noqa: F401
+        except ImportError:
+            print("chromadb is not installed: skipping Chroma")
+            backends.remove("chroma")
+
+    directory = tempfile.mkdtemp()
+    print(f"{'size':>9} {'backend':<12}{'build s':>9}{'open ms':>9}{'sim ms':>8}{'mmr ms':>8}{'filter ms':>10}"
+          f"{'batch q/s':>11}{'RSS MB':>8}{'anon MB':>9}{'disk MB':>9}")
+    for size in args.sizes:
+        matrix_path = os.path.join(directory, f"vectors-{size}.npy")
+        rng = np.random.default_rng(0)
+        matrix = np.lib.format.open_memmap(matrix_path, mode="w+", dtype=np.float32, shape=(size, args.dimensions))
+        for start in range(0, size, 100_000):
+            rows = rng.standard_normal((min(100_000, size - start), args.dimensions), dtype=np.float32)
+            matrix[start:start + len(rows)] = rows / np.linalg.norm(rows, axis=1, keepdims=True)
+        matrix.flush()
+        del matrix
+        for backend in backends:
+            path = os.path.join(directory, f"{backend}-{size}")
+            result = in_subprocess("build", backend, path, matrix_path, size)
+            result.update(in_subprocess("query", backend, path, matrix_path, args.queries, args.batch))
+            disk = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+            print(f"{size:>9} {backend:<12}{result['build_s']:>9.1f}{result['open_ms']:>9.1f}"
+                  f"{result['similarity_p50_ms']:>8.1f}{result['mmr_p50_ms']:>8.1f}{result['filtered_p50_ms']:>10.1f}"
+                  f"{result['batch_qps']:>11.0f}{result['rss_mb']:>8.0f}{result['anonymous_mb']:>9.0f}{disk / 2 ** 20:>9.0f}")
+        os.remove(matrix_path)
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# Persistent embedding cache for the RAG agents
+# Wraps any LangChain Embeddings, so a notebook only changes how its embedding function is created:
+#
+#   embedding_function = CachedEmbeddings(OpenAIEmbeddings())
+#   db = Chroma.from_documents(docs, embedding_function)
+#
+# Every vector is stored in a SQLite file under (model, content hash):
+# - documents are keyed by the hash of their exact text, queries by the hash of their normalized
+#   text (case and whitespace folded), so a restart re-embeds nothing and a repeated question
+#   makes no embedding call
+# - a batch is looked up in one query per 500 texts; only the misses are sent to the model, each
+#   distinct text once, in batches of `batch_size`, and stored in one transaction
+# - vectors are stored as float16 by default (half the size of float32, and well within the
+#   precision retrieval needs); a miss returns the stored value, so the vectors are the same
+#   whether they came from the model or the cache
+#
+# The model key includes the class, the model name and the dimensions of the wrapped embeddings,
+# so switching models never mixes vectors. stats() reports the hit rate.
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Default cache settings
+CACHE_PATH = "embedding_cache.sqlite"  # SQLite file holding the vectors
+STORE_DTYPE = "float16"  # On-disk precision: "float16" or "float32"
+BATCH_SIZE = 1000  # Texts per embedding call for the misses (OpenAIEmbeddings sends 1000 per request)
+LOOKUP_CHUNK = 500  # Keys per SQLite lookup (below SQLite's variable limit)
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def content_hash(kind: str, text: str) -> str:
+    return hashlib.sha256(f"{kind}\x00{text}".encode()).hexdigest()
+
+
+# Identifies the wrapped model: class, model name and dimensions, e.g. "OpenAIEmbeddings:text-embedding-ada-002:"
+def model_key(embeddings: Embeddings) -> str:
+    name = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None) or ""
+    dimensions = getattr(embeddings, "dimensions", None) or ""
+    return f"{type(embeddings).__name__}:{name}:{dimensions}"
+
+
+class CachedEmbeddings(Embeddings):
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        path: str = CACHE_PATH,
+        *,
+        dtype: str = STORE_DTYPE,
+        batch_size: int = BATCH_SIZE,
+        model: Optional[str] = None,
+    ):
+        if dtype not in ("float16", "float32"):
+            raise ValueError("dtype must be 'float16' or 'float32'")
+        self.embeddings = embeddings
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.batch_size = batch_size
+        self.model = model or model_key(embeddings)
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self.counters = {"document_hits": 0, "document_misses": 0, "query_hits": 0, "query_misses": 0,
+                         "embedded": 0, "embedding_calls": 0}
+
+    # ----- Storage -----
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                """CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    dtype TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model, hash)
+                ) WITHOUT ROWID"""
+            )
+            self._connection = connection
+        return self._connection
+
+    def _lookup(self, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique), LOOKUP_CHUNK):
+                chunk = unique[start:start + LOOKUP_CHUNK]
+                rows = self.connection.execute(
+                    f"SELECT hash, dtype, vector FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(chunk))})",
+                    [self.model, *chunk],
+                ).fetchall()
+                for digest, dtype, vector in rows:
+                    found[digest] = np.frombuffer(vector, dtype=dtype)
+        return found
+
+    def _store(self, vectors: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            connection = self.connection
+            connection.execute("BEGIN")
+            try:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, hash, dtype, vector) VALUES (?, ?, ?, ?)",
+                    [(self.model, digest, self.dtype.name, vector.tobytes()) for digest, vector in vectors.items()],
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    # ----- Embeddings -----
+
+    # Vectors of `texts` (keyed by `hashes`): one lookup, then the distinct misses embedded in batches
+    def _embed(self, kind: str, texts: List[str], hashes: List[str], embed) -> List[List[float]]:
+        found = self._lookup(hashes)
+        missing = {digest: text for digest, text in zip(hashes, texts) if digest not in found}
+        hits = sum(1 for digest in hashes if digest in found)
+        with self._lock:
+            self.counters[f"{kind}_hits"] += hits
+            self.counters[f"{kind}_misses"] += len(hashes) - hits
+        if missing:
+            digests = list(missing)
+            for start in range(0, len(digests), self.batch_size):
+                batch = digests[start:start + self.batch_size]
+                vectors = np.asarray(embed([missing[digest] for digest in batch]), dtype=self.dtype)
+                computed = dict(zip(batch, vectors))
+                self._store(computed)
+                found.update(computed)
+                with self._lock:
+                    self.counters["embedded"] += len(batch)
+                    self.counters["embedding_calls"] += 1
+        return [found[digest].astype(np.float32).tolist() for digest in hashes]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [content_hash("document", text) for text in texts]
+        return self._embed("document", texts, hashes, self.embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed("query", [text], [content_hash("query", normalize_query(text))],
+                           lambda texts: [self.embeddings.embed_query(texts[0])])[0]
+
+    # ----- Stats -----
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            size, stored_bytes = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings WHERE model = ?", (self.model,)
+            ).fetchone()
+        lookups = sum(counters[f"{kind}_{outcome}"] for kind in ("document", "query") for outcome in ("hits", "misses"))
+        hits = counters["document_hits"] + counters["query_hits"]
+        counters.update(hit_rate=hits / lookups if lookups else 0.0, size=size, stored_bytes=stored_bytes)
+        return counters
+
+    def clear(self) -> None:
+        with self._lock:
+            self.connection.execute("DELETE FROM embeddings WHERE model = ?", (self.model,))
@@ -0,0 +1,196 @@
+# Hybrid keyword + vector retrieval for the RAG agents
+# Dense search alone misses exact terms (trainer names, "cancelation policy") and pays an
+# embedding round trip for every question. This adds a local BM25 retriever on an inverted index
+# and fuses it with the existing vector retriever:
+#
+#   retriever = HybridRetriever.from_documents(docs, db.as_retriever(search_type="mmr", search_kwargs={"k": 3}), k=3)
+#   retriever.invoke("Who is Neha Kapoor?")  # keyword-only: no embedding call
+#
+# - BM25Index keeps a posting list per term (the rows containing it and a precomputed BM25 weight
+#   per row), so a query only touches the postings of its own terms: one vectorized add per term
+#   and argpartition for the top k
+# - HybridRetriever runs BM25 first; when the lexical match is confident (the best document
+#   contains the query's terms, weighted by IDF, and clearly beats the runner-up) it returns the
+#   keyword results without calling the dense retriever, otherwise it fuses both rankings with
+#   reciprocal rank fusion (RRF), which needs no score calibration between the two
+#
+# Both are LangChain retrievers, so they work with .invoke() in a graph node and with
+# create_retriever_tool. stats() reports how many queries took the keyword-only path.
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict, PrivateAttr
+
+# Defaults
+K1 = 1.5  # BM25 term frequency saturation
+B = 0.75  # BM25 document length normalization
+RRF_K = 60  # Reciprocal rank fusion: score = sum of 1 / (RRF_K + rank)
+MIN_COVERAGE = 0.8  # Keyword-only path: IDF-weighted share of the query terms found in the best document
+MIN_MARGIN = 0.5  # Keyword-only path: how far the best BM25 score must lead the second (1 - second / best)
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i in is it its me my of on or our "
+    "the their there this to was we what when where which who why will with you your".split()
+)
+TOKEN = re.compile(r"[a-z0-9]+")
+
+
+# Lowercased words without stopwords; a trailing plural "s" is dropped ("hours" -> "hour")
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for word in TOKEN.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+# Documents fused from several rankings (best first), each document keyed by its text
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[Document]], k: int = RRF_K) -> List[Document]:
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = document.page_content
+            scores[key] = scores.get(key, 0.0) + 1 / (k + rank)
+            documents.setdefault(key, document)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class BM25Index:
+    def __init__(self, texts: Iterable[str], k1: float = K1, b: float = B):
+        rows: Dict[str, List[int]] = {}
+        frequencies: Dict[str, List[int]] = {}
+        lengths = []
+        for row, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                rows.setdefault(term, []).append(row)
+                frequencies.setdefault(term, []).append(count)
+        self.size = len(lengths)
+        lengths = np.asarray(lengths, dtype=np.float32)
+        norms = k1 * (1 - b + b * lengths / max(float(lengths.mean()) if self.size else 0.0, 1.0))
+        self.idf: Dict[str, float] = {}
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, term_rows in rows.items():
+            term_rows = np.asarray(term_rows, dtype=np.int32)  # Ascending: rows are added in order
+            tf = np.asarray(frequencies[term], dtype=np.float32)
+            self.idf[term] = self._idf(len(term_rows))
+            self.postings[term] = (term_rows, (self.idf[term] * tf * (k1 + 1) / (tf + norms[term_rows])).astype(np.float32))
+
+    def _idf(self, df: int) -> float:
+        return math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+
+    # Top `k` rows and their BM25 scores (best first), and the confidence of the best match:
+    # (IDF-weighted share of the query terms it contains, 1 - second score / best score)
+    def search(self, query: str, k: int) -> Tuple[List[int], List[float], Tuple[float, float]]:
+        terms = set(tokenize(query))
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in terms:
+            if term in self.postings:
+                term_rows, weights = self.postings[term]
+                scores[term_rows] += weights
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        if len(candidates) == 0:
+            return [], [], (0.0, 0.0)
+
+        best = int(candidates[0])
+        unseen = self._idf(0)  # Terms missing from the corpus count as the rarest
+        total = sum(self.idf.get(term, unseen) for term in terms)
+        found = sum(self.idf[term] for term in terms if term in self.postings and self._contains(term, best))
+        margin = 1 - float(scores[candidates[1]] / scores[best]) if len(candidates) > 1 else 1.0
+        return candidates.tolist(), scores[candidates].tolist(), (found / total, margin)
+
+    def _contains(self, term: str, row: int) -> bool:
+        term_rows = self.postings[term][0]
+        position = int(np.searchsorted(term_rows, row))
+        return position < len(term_rows) and term_rows[position] == row
+
+
+class BM25Retriever(BaseRetriever):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: BM25Index
+    documents: List[Document]
+    k: int = 4
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Document], *, k: int = 4, k1: float = K1, b: float = B,
+                       **kwargs) -> "BM25Retriever":
+        documents = list(documents)
+        return cls(index=BM25Index((document.page_content for document in documents), k1, b),
+                   documents=documents, k=k, **kwargs)
+
+    # Top `k` documents with their BM25 scores, and the confidence of the best match (see BM25Index.search)
+    def search_with_scores(self, query: str, k: Optional[int] = None) -> Tuple[List[Tuple[Document, float]], Tuple[float, float]]:
+        rows, scores, confidence = self.index.search(query, k or self.k)
+        return [(self.documents[row], score) for row, score in zip(rows, scores)], confidence
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return [document for document, _ in self.search_with_scores(query)[0]]
+
+
+class HybridRetriever(BaseRetriever):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    keyword: BM25Retriever
+    dense: BaseRetriever  # e.g. db.as_retriever(search_type="mmr", search_kwargs={"k": 3})
+    k: int = 4
+    rrf_k: int = RRF_K
+    keyword_only: bool = True  # Skip the dense retriever when the keyword match is confident
+    min_coverage: float = MIN_COVERAGE
+    min_margin: float = MIN_MARGIN
+    _counts: Counter = PrivateAttr(default_factory=Counter)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Document], dense: BaseRetriever, *, k: int = 4,
+                       **kwargs) -> "HybridRetriever":
+        return cls(keyword=BM25Retriever.from_documents(documents, k=k), dense=dense, k=k, **kwargs)
+
+    # Keyword results, and whether they are confident enough to skip the dense retriever
+    def _keyword(self, query: str) -> Tuple[List[Document], bool]:
+        hits, (coverage, margin) = self.keyword.search_with_scores(query, self.k)
+        confident = self.keyword_only and coverage >= self.min_coverage and margin >= self.min_margin
+        with self._lock:
+            self._counts["queries"] += 1
+            self._counts["keyword_only" if confident else "fused"] += 1
+        return [document for document, _ in hits], confident
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        keyword, confident = self._keyword(query)
+        if confident:
+            return keyword
+        dense = self.dense.invoke(query, config={"callbacks": run_manager.get_child()})
+        return reciprocal_rank_fusion([keyword, dense], self.rrf_k)[:self.k]
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        keyword, confident = self._keyword(query)
+        if confident:
+            return keyword
+        dense = await self.dense.ainvoke(query, config={"callbacks": run_manager.get_child()})
+        return reciprocal_rank_fusion([keyword, dense], self.rrf_k)[:self.k]
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        queries = counts.get("queries", 0)
+        return {
+            "queries": queries,
+            "keyword_only": counts.get("keyword_only", 0),
+            "fused": counts.get("fused", 0),
+            "keyword_only_rate": counts.get("keyword_only", 0) / queries if queries else 0.0,
+        }
@@ -0,0 +1,299 @@
+# Streaming ingestion of a file corpus into a vector store
+# The notebooks embed a handful of hard-coded Documents; this loads a corpus of any size with
+# constant memory, and on later runs only re-embeds the files that changed:
+#
+#   python ingestion_pipeline.py corpus/ --index gym_index --workers 4
+#
+#   pipeline = IngestionPipeline(NumpyVectorStore("gym_index", embeddings), embeddings)
+#   stats = pipeline.run(iter_files("corpus/"), root="corpus/")
+#
+# Stages, all streaming:
+# - iter_files() walks the corpus lazily; every file becomes a Document with its path as "source"
+# - the text splitter (RecursiveCharacterTextSplitter by default) cuts it into chunks, with the
+#   ids "<source>#<index>" so a new version of a file replaces the chunks of the previous one
+# - chunks are embedded in batches of `embed_batch` (across files) on a pool of `workers` threads,
+#   with at most `max_in_flight` batches queued
+# - every `flush_every` chunks the embedded chunks are upserted into the store (add_embeddings()
+#   for NumpyVectorStore; other stores add the documents on the workers) and the files are
+#   recorded as done, so memory is bounded by flush_every whatever the size of the corpus
+#
+# Progress lives in a SQLite file: size, mtime and content hash of every ingested file. A file
+# whose size and mtime are unchanged is skipped without being read, and one whose hash is
+# unchanged is not re-embedded. A run that stops halfway resumes where it stopped: files are
+# marked pending before their chunks are written, and the chunks of pending files are removed
+# at the next start. run(..., prune=True) removes the files that left the corpus.
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_text_splitters import RecursiveCharacterTextSplitter, TextSplitter
+
+# Defaults
+STATE_PATH = "ingest_state.sqlite"  # SQLite file tracking the ingested files
+EXTENSIONS = (".txt", ".md")  # Files picked up by iter_files()
+CHUNK_SIZE = 1000  # Characters per chunk
+CHUNK_OVERLAP = 200  # Characters shared by consecutive chunks
+EMBED_BATCH = 128  # Chunks per embedding call
+WORKERS = 4  # Embedding calls running at the same time
+FLUSH_EVERY = 10_000  # Chunks buffered before they are written to the store (one segment each)
+TOUCH_BATCH = 1000  # Unchanged files recorded per transaction
+
+
+def iter_files(root: str, extensions: Sequence[str] = EXTENSIONS) -> Iterator[str]:
+    for directory, directories, files in os.walk(root):
+        directories.sort()
+        for name in sorted(files):
+            if name.endswith(tuple(extensions)):
+                yield os.path.join(directory, name)
+
+
+def chunk_ids(source: str, start: int, stop: int) -> List[str]:
+    return [f"{source}#{index}" for index in range(start, stop)]
+
+
+class IngestState:
+    def __init__(self, path: str = STATE_PATH):
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS files (
+                source TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                chunks INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                run TEXT NOT NULL
+            )"""
+        )
+
+    def get(self, source: str) -> Optional[tuple]:
+        return self.connection.execute(
+            "SELECT size, mtime_ns, hash, chunks, status FROM files WHERE source = ?", (source,)
+        ).fetchone()
+
+    def _write(self, statement: str, rows: List[tuple]) -> None:
+        if not rows:
+            return
+        self.connection.execute("BEGIN")
+        try:
+            self.connection.executemany(statement, rows)
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+
+    # rows: (source, size, mtime_ns, hash, chunks, status, run); chunks of a pending file is the
+    # number of ids that may be in the store: max(previous, new)
+    def put(self, rows: List[tuple]) -> None:
+        self._write("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    # rows: (size, mtime_ns, run, source) of unchanged files
+    def touch(self, rows: List[tuple]) -> None:
+        self._write("UPDATE files SET size = ?, mtime_ns = ?, run = ? WHERE source = ?", rows)
+
+    def remove(self, sources: List[str]) -> None:
+        self._write("DELETE FROM files WHERE source = ?", [(source,) for source in sources])
+
+    def pending(self) -> List[tuple]:
+        return self.connection.execute("SELECT source, chunks FROM files WHERE status = 'pending'").fetchall()
+
+    def not_seen(self, run: str) -> Iterator[tuple]:
+        return iter(self.connection.execute("SELECT source, chunks FROM files WHERE run != ?", (run,)).fetchall())
+
+    def count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM files WHERE status = 'done'").fetchone()[0]
+
+
+class IngestionPipeline:
+    def __init__(
+        self,
+        store: VectorStore,
+        embeddings: Optional[Embeddings] = None,
+        *,
+        state_path: str = STATE_PATH,
+        splitter: Optional[TextSplitter] = None,
+        embed_batch: int = EMBED_BATCH,
+        workers: int = WORKERS,
+        flush_every: int = FLUSH_EVERY,
+        max_in_flight: Optional[int] = None,
+    ):
+        self.store = store
+        self.embeddings = embeddings or store.embeddings
+        self.state = IngestState(state_path)
+        self.splitter = splitter or RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        self.embed_batch = embed_batch
+        self.workers = workers
+        self.flush_every = flush_every
+        self.max_in_flight = max_in_flight or 2 * workers
+        # Stores taking precomputed vectors are written from this thread; others add on the workers
+        self.precomputed = hasattr(store, "add_embeddings")
+
+    # Removes the chunks of files a previous run left pending, so they are ingested again
+    def recover(self) -> int:
+        pending = self.state.pending()
+        for source, chunks in pending:
+            self.store.delete(chunk_ids(source, 0, chunks))
+        self.state.remove([source for source, _ in pending])
+        return len(pending)
+
+    def _embed(self, chunks: List[Document], ids: List[str]):
+        texts = [chunk.page_content for chunk in chunks]
+        if self.precomputed:
+            vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)  # A fraction of the memory of lists of floats
+            return texts, vectors, [chunk.metadata for chunk in chunks], ids
+        self.store.add_documents(chunks, ids=ids)
+        return None
+
+    def run(self, paths: Iterable[str], root: Optional[str] = None, *, prune: bool = False,
+            progress: Optional[Callable[[dict], None]] = None, progress_every: float = 10.0) -> dict:
+        run = f"{time.time_ns()}"
+        stats = {"files": 0, "skipped": 0, "ingested": 0, "chunks": 0, "bytes": 0, "recovered": self.recover(),
+                 "removed": 0}
+        start = last_report = time.monotonic()
+        in_flight: deque = deque()  # Embedding batches not finished yet, in order
+        batch: List[Document] = []  # Chunks of the next embedding batch, across files
+        batch_ids: List[str] = []
+        done: List[Any] = []  # Finished batches waiting for the next flush
+        files: List[tuple] = []  # Files whose chunks are buffered: (source, size, mtime_ns, hash, chunks, previous)
+        touched: List[tuple] = []
+        buffered = 0
+
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embed")
+
+        # Sends full batches (or, at a flush, what is left) to the workers, at most max_in_flight at a time
+        def submit(everything: bool = False):
+            while len(batch) >= self.embed_batch or (everything and batch):
+                while len(in_flight) >= self.max_in_flight:
+                    done.append(in_flight.popleft().result())
+                in_flight.append(executor.submit(self._embed, batch[:self.embed_batch], batch_ids[:self.embed_batch]))
+                del batch[:self.embed_batch], batch_ids[:self.embed_batch]
+
+        def flush():
+            nonlocal buffered
+            submit(everything=True)
+            while in_flight:
+                done.append(in_flight.popleft().result())
+            if not files:
+                return
+            # Pending first: if the run stops before the files are recorded, the next one cleans up
+            self.state.put([(source, size, mtime, digest, max(chunks, previous), "pending", run)
+                            for source, size, mtime, digest, chunks, previous in files])
+            if self.precomputed:
+                stale = [id for source, _, _, _, _, previous in files for id in chunk_ids(source, 0, previous)]
+                if stale:
+                    self.store.delete(stale)
+                texts, vectors, metadatas, ids = [], [], [], []
+                for batch_texts, batch_vectors, batch_metadatas, batch_ids in done:
+                    texts += batch_texts
+                    vectors.append(batch_vectors)
+                    metadatas += batch_metadatas
+                    ids += batch_ids
+                if texts:
+                    self.store.add_embeddings(texts, np.concatenate(vectors), metadatas, ids=ids, upsert=False)
+            else:  # The workers upserted the chunks: only chunks past the new end remain
+                stale = [id for source, _, _, _, chunks, previous in files for id in chunk_ids(source, chunks, previous)]
+                if stale:
+                    self.store.delete(stale)
+            self.state.put([(source, size, mtime, digest, chunks, "done", run)
+                            for source, size, mtime, digest, chunks, _ in files])
+            done.clear()
+            files.clear()
+            buffered = 0
+
+        with executor:
+            for path in paths:
+                source = os.path.relpath(path, root) if root else path
+                stats["files"] += 1
+                status = os.stat(path)
+                row = self.state.get(source)
+                if row and row[4] == "done" and (row[0], row[1]) == (status.st_size, status.st_mtime_ns):
+                    touched.append((status.st_size, status.st_mtime_ns, run, source))
+                    stats["skipped"] += 1
+                else:
+                    with open(path, "rb") as file:
+                        data = file.read()
+                    digest = hashlib.sha256(data).hexdigest()
+                    if row and row[4] == "done" and row[2] == digest:  # Touched, not changed
+                        touched.append((status.st_size, status.st_mtime_ns, run, source))
+                        stats["skipped"] += 1
+                    else:
+                        document = Document(page_content=data.decode("utf-8", errors="replace"), metadata={"source": source})
+                        chunks = self.splitter.split_documents([document])
+                        batch.extend(chunks)
+                        batch_ids.extend(chunk_ids(source, 0, len(chunks)))
+                        submit()
+                        files.append((source, status.st_size, status.st_mtime_ns, digest, len(chunks),
+                                      row[3] if row else 0))
+                        buffered += len(chunks)
+                        stats["ingested"] += 1
+                        stats["chunks"] += len(chunks)
+                        stats["bytes"] += len(data)
+                        if buffered >= self.flush_every:
+                            flush()
+                if len(touched) >= TOUCH_BATCH:
+                    self.state.touch(touched)
+                    touched.clear()
+                if progress and time.monotonic() - last_report >= progress_every:
+                    last_report = time.monotonic()
+                    progress(self._rates(stats, last_report - start))
+            flush()
+        self.state.touch(touched)
+
+        if prune:
+            removed = list(self.state.not_seen(run))
+            for source, chunks in removed:
+                self.store.delete(chunk_ids(source, 0, chunks))
+            self.state.remove([source for source, _ in removed])
+            stats["removed"] = len(removed)
+        return self._rates(stats, time.monotonic() - start)
+
+    @staticmethod
+    def _rates(stats: dict, seconds: float) -> dict:
+        return {**stats, "seconds": seconds, "docs_per_s": stats["ingested"] / seconds if seconds else 0.0,
+                "chunks_per_s": stats["chunks"] / seconds if seconds else 0.0}
+
+
+def main():
+    from langchain_openai import OpenAIEmbeddings
+
+    from embedding_cache import CachedEmbeddings
+    from numpy_vector_store import INDEX_PATH, NumpyVectorStore
+
+    parser = argparse.ArgumentParser(description="Ingest a directory of text files into a NumpyVectorStore.")
+    parser.add_argument("corpus", help="Directory of .txt/.md files")
+    parser.add_argument("--index", default=INDEX_PATH)
+    parser.add_argument("--state", default=STATE_PATH)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--prune", action="store_true", help="Remove files no longer in the corpus")
+    args = parser.parse_args()
+
+    embeddings = CachedEmbeddings(OpenAIEmbeddings())
+    pipeline = IngestionPipeline(
+        NumpyVectorStore(args.index, embeddings), embeddings, state_path=args.state, workers=args.workers,
+        splitter=RecursiveCharacterTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap),
+    )
+
+    def report(stats):
+        print(f"{stats['files']} files ({stats['skipped']} unchanged), {stats['chunks']} chunks, "
+              f"{stats['docs_per_s']:.0f} docs/s, {stats['chunks_per_s']:.0f} chunks/s")
+
+    stats = pipeline.run(iter_files(args.corpus), root=args.corpus, prune=args.prune, progress=report)
+    report(stats)
+    print(f"done in {stats['seconds']:.1f}s; {stats['removed']} files removed, {stats['recovered']} recovered")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+# In-process vector store on NumPy, persisted as memory-mapped .npy files
+# A lightweight alternative to Chroma for the RAG agents, with the same LangChain interface:
+#
+#   db = NumpyVectorStore.from_documents(docs, embedding_function, path="gym_index")
+#   retriever = db.as_retriever(search_type="mmr", search_kwargs={"k": 3})
+#
+# - the vectors are a contiguous matrix of unit-length float32 rows (or int8 rows with a float32
+#   scale per row, a quarter of the size) saved as .npy and opened read-only with mmap, so opening
+#   an index is instant and only the pages a search touches are read into memory
+# - a search is one matrix multiply per block of BLOCK_ROWS rows and argpartition for the top k;
+#   similarity_search_by_vectors() scores a whole batch of queries in the same pass
+# - MMR re-ranks the fetch_k best candidates with their pairwise similarities computed in one
+#   matrix multiply, then picks greedily with a vectorized running maximum
+# - metadata filters ({"source": "hours.txt"}, {"source": {"$in": [...]}}, "$ne", "$nin", "$and",
+#   "$or") run on integer-coded columns built per metadata key, so filtering is a vectorized mask
+# - add_texts() writes a new segment (an immutable set of files); delete() and upserts (adding an
+#   existing id) mark rows as deleted, and segments whose rows are all deleted are dropped;
+#   add_embeddings() adds texts whose vectors were computed elsewhere (see ingestion_pipeline.py)
+#
+# Documents are stored as JSON lines next to the vectors and read on demand, so memory does not
+# grow with the corpus.
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import threading
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# Defaults
+INDEX_PATH = "vector_index"  # Directory holding the index
+BLOCK_ROWS = 65_536  # Rows scored per matrix multiply (bounds the memory of a search)
+DEQUANTIZE_ROWS = 4096  # int8 rows converted to float32 at a time
+EMBED_BATCH = 1000  # Texts per embedding call when adding
+FETCH_K = 20  # Candidates re-ranked by MMR
+LAMBDA_MULT = 0.5  # MMR: 1 = relevance only, 0 = diversity only
+SCALAR_TYPES = (str, int, float, bool)  # Metadata values that can be filtered on
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+# int8 rows and the float32 scale restoring them: row ~= codes * scale
+def quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+# Vectorized MMR: indexes of `k` rows of `candidates`, balancing relevance to `query` and diversity
+def mmr_select(query: np.ndarray, candidates: np.ndarray, k: int, lambda_mult: float = LAMBDA_MULT) -> List[int]:
+    if len(candidates) == 0:
+        return []
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+    selected = [int(np.argmax(relevance))]
+    closest = similarity[selected[0]].copy()  # Highest similarity of each candidate to the selection
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * closest
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(closest, similarity[best], out=closest)
+    return selected
+
+
+# Identifies a corpus for load_or_build: the SHA-256 of every document's id, text and metadata, in order
+def documents_hash(documents: Sequence[Document]) -> str:
+    digest = hashlib.sha256()
+    for document in documents:
+        line = json.dumps([document.id, document.page_content, document.metadata], sort_keys=True,
+                          ensure_ascii=False, default=str)
+        digest.update(line.encode() + b"\n")
+    return digest.hexdigest()
+
+
+# np.save to an exact file name (np.save appends .npy to names without it)
+def save_array(path: str, array: np.ndarray) -> None:
+    with open(path, "wb") as file:
+        np.save(file, array)
+
+
+def write_atomic(path: str, write: Callable[[str], None]) -> None:
+    temporary = f"{path}.tmp"
+    write(temporary)
+    os.replace(temporary, path)
+
+
+class _Segment:
+    def __init__(self, path: str):
+        self.path = path
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        scales = os.path.join(path, "scales.npy")
+        self.scales = np.load(scales, mmap_mode="r") if os.path.exists(scales) else None
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        deleted = os.path.join(path, "deleted.npy")
+        self.deleted = np.load(deleted) if os.path.exists(deleted) else None
+        with open(os.path.join(path, "fields.json")) as file:
+            fields = json.load(file)
+        self.fields = {key: index for index, key in enumerate(fields["keys"])}
+        self.vocabularies = [{(type(value).__name__, value): code for code, value in enumerate(values)}
+                             for values in fields["values"]]
+        self._columns: Dict[int, np.ndarray] = {}
+        with open(os.path.join(path, "documents.jsonl"), "rb") as file:
+            self._documents = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def live(self) -> int:
+        return len(self) - (int(self.deleted.sum()) if self.deleted is not None else 0)
+
+    def rows(self, rows: Sequence[int]) -> np.ndarray:
+        vectors = np.asarray(self.vectors[rows], dtype=np.float32)
+        return vectors * self.scales[rows][:, None] if self.scales is not None else vectors
+
+    def scores(self, start: int, stop: int, queries: np.ndarray) -> np.ndarray:
+        if self.scales is None:
+            return queries @ self.vectors[start:stop].T
+        # int8: converted to float32 in small chunks that stay in the CPU cache
+        scores = np.empty((len(queries), stop - start), dtype=np.float32)
+        for offset in range(start, stop, DEQUANTIZE_ROWS):
+            end = min(offset + DEQUANTIZE_ROWS, stop)
+            scores[:, offset - start:end - start] = queries @ self.vectors[offset:end].astype(np.float32).T
+        return scores * self.scales[start:stop]
+
+    def document(self, row: int) -> Document:
+        record = json.loads(self._documents[int(self.offsets[row]):int(self.offsets[row + 1])])
+        return Document(id=record["id"], page_content=record["page_content"], metadata=record["metadata"])
+
+    def column(self, key: str) -> Optional[np.ndarray]:
+        index = self.fields.get(key)
+        if index is None:
+            return None
+        if index not in self._columns:
+            self._columns[index] = np.load(os.path.join(self.path, f"field-{index}.npy"), mmap_mode="r")
+        return self._columns[index]
+
+    # Rows of the segment matching `filter` (Chroma's where syntax), deleted rows excluded; None: all rows
+    def mask(self, filter: Optional[dict]) -> Optional[np.ndarray]:
+        allowed = None if self.deleted is None else ~self.deleted
+        if filter:
+            matching = self._match(filter)
+            allowed = matching if allowed is None else allowed & matching
+        return allowed
+
+    def _match(self, filter: dict) -> np.ndarray:
+        result = np.ones(len(self), dtype=bool)
+        for key, condition in filter.items():
+            if key in ("$and", "$or"):
+                masks = [self._match(clause) for clause in condition]
+                matching = np.logical_and.reduce(masks) if key == "$and" else np.logical_or.reduce(masks)
+            else:
+                matching = self._match_field(key, condition)
+            result &= matching
+        return result
+
+    def _match_field(self, key: str, condition: Any) -> np.ndarray:
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        (operator, value), = condition.items()
+        if operator not in ("$eq", "$ne", "$in", "$nin"):
+            raise ValueError(f"Unsupported filter operator: {operator}")
+        column = self.column(key)
+        if column is None:
+            return np.zeros(len(self), dtype=bool)
+        values = value if operator in ("$in", "$nin") else [value]
+        vocabulary = self.vocabularies[self.fields[key]]
+        codes = [vocabulary[(type(item).__name__, item)] for item in values if (type(item).__name__, item) in vocabulary]
+        matching = np.isin(column, codes)
+        return matching if operator in ("$eq", "$in") else (column >= 0) & ~matching
+
+
+class NumpyVectorStore(VectorStore):
+    def __init__(self, path: str = INDEX_PATH, embedding: Optional[Embeddings] = None, *,
+                 quantization: Optional[str] = None, block_rows: int = BLOCK_ROWS):
+        if quantization not in (None, "int8"):
+            raise ValueError("quantization must be None or 'int8'")
+        self.path = path
+        self.embedding = embedding
+        self.block_rows = block_rows
+        self._lock = threading.Lock()
+        manifest = os.path.join(path, "manifest.json")
+        if os.path.exists(manifest):
+            with open(manifest) as file:
+                self.manifest = json.load(file)
+        else:
+            self.manifest = {"version": 1, "dimensions": None, "quantization": quantization, "segments": []}
+        self._segments = [_Segment(os.path.join(path, name)) for name in self.manifest["segments"]]
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self.embedding
+
+    def __len__(self) -> int:
+        return sum(segment.live for segment in self._segments)
+
+    def _save_manifest(self) -> None:
+        def write(temporary):
+            with open(temporary, "w") as file:
+                json.dump(self.manifest, file)
+
+        write_atomic(os.path.join(self.path, "manifest.json"), write)
+
+    # ----- Writing -----
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, *,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        batches = (self.embedding.embed_documents(texts[start:start + EMBED_BATCH])
+                   for start in range(0, len(texts), EMBED_BATCH))
+        return self._add(texts, batches, metadatas, ids, upsert=True)
+
+    # Adds texts whose vectors are already computed (e.g. on worker threads). With upsert=False the
+    # caller guarantees the ids are new, which skips looking them up in every segment.
+    def add_embeddings(self, texts: Sequence[str], embeddings: Sequence[Sequence[float]],
+                       metadatas: Optional[List[dict]] = None, *, ids: Optional[List[str]] = None,
+                       upsert: bool = True) -> List[str]:
+        if len(texts) != len(embeddings):
+            raise ValueError("texts and embeddings must have the same length")
+        return self._add(list(texts), [embeddings] if len(texts) else [], metadatas, ids, upsert=upsert)
+
+    def _add(self, texts: List[str], batches: Iterable, metadatas: Optional[List[dict]], ids: Optional[List[str]],
+             upsert: bool) -> List[str]:
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [str(id) if id is not None else str(uuid.uuid4()) for id in ids] if ids else [str(uuid.uuid4()) for _ in texts]
+        if not (len(texts) == len(metadatas) == len(ids)):
+            raise ValueError("texts, metadatas and ids must have the same length")
+        if not texts:
+            return []
+        with self._lock:
+            if upsert:
+                self._delete(ids)  # An id added again replaces its previous row
+            name = f"segment-{uuid.uuid4().hex[:12]}"
+            segment_path = os.path.join(self.path, name)
+            os.makedirs(segment_path)
+            try:
+                self._write_segment(segment_path, texts, metadatas, ids, batches)
+            except BaseException:
+                shutil.rmtree(segment_path, ignore_errors=True)
+                raise
+            self.manifest["segments"].append(name)
+            self._save_manifest()
+            self._segments.append(_Segment(segment_path))
+        return ids
+
+    # Writes a segment; `batches` yields the vectors of the texts, in order, a batch at a time
+    def _write_segment(self, path: str, texts: List[str], metadatas: List[dict], ids: List[str],
+                       batches: Iterable) -> None:
+        count = len(texts)
+        vectors = scales = None
+        start = 0
+        for batch in batches:
+            batch = normalize_rows(batch)
+            if vectors is None:
+                dimensions = self.manifest["dimensions"] = self.manifest["dimensions"] or batch.shape[1]
+                if batch.shape[1] != dimensions:
+                    raise ValueError(f"Expected {dimensions}-dimensional embeddings, got {batch.shape[1]}")
+                dtype = np.int8 if self.manifest["quantization"] == "int8" else np.float32
+                vectors = np.lib.format.open_memmap(os.path.join(path, "vectors.npy"), mode="w+",
+                                                    dtype=dtype, shape=(count, dimensions))
+                if dtype == np.int8:
+                    scales = np.zeros(count, dtype=np.float32)
+            if scales is not None:
+                vectors[start:start + len(batch)], scales[start:start + len(batch)] = quantize(batch)
+            else:
+                vectors[start:start + len(batch)] = batch
+            start += len(batch)
+        if start != count:
+            raise ValueError(f"Got {start} embeddings for {count} texts")
+        vectors.flush()
+        del vectors
+        if scales is not None:
+            np.save(os.path.join(path, "scales.npy"), scales)
+
+        # Documents as JSON lines with their byte offsets; metadata keys as integer-coded columns
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        vocabularies: Dict[str, Dict[tuple, int]] = {}
+        columns: Dict[str, np.ndarray] = {}
+        with open(os.path.join(path, "documents.jsonl"), "wb") as file:
+            for row, (text, metadata, id) in enumerate(zip(texts, metadatas, ids)):
+                line = json.dumps({"id": id, "page_content": text, "metadata": metadata}, ensure_ascii=False)
+                offsets[row + 1] = offsets[row] + file.write(line.encode() + b"\n")
+                for key, value in metadata.items():
+                    if not isinstance(value, SCALAR_TYPES):
+                        continue
+                    vocabulary = vocabularies.setdefault(key, {})
+                    if key not in columns:
+                        columns[key] = np.full(count, -1, dtype=np.int32)
+                    columns[key][row] = vocabulary.setdefault((type(value).__name__, value), len(vocabulary))
+        np.save(os.path.join(path, "offsets.npy"), offsets)
+        np.save(os.path.join(path, "ids.npy"), np.array(ids))
+        for index, key in enumerate(columns):
+            np.save(os.path.join(path, f"field-{index}.npy"), columns[key])
+        with open(os.path.join(path, "fields.json"), "w") as file:
+            json.dump({"keys": list(columns), "values": [[value for _, value in vocabularies[key]] for key in columns]},
+                      file, ensure_ascii=False)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        with self._lock:
+            return self._delete([str(id) for id in ids])
+
+    def _delete(self, ids: List[str]) -> bool:
+        deleted_any = False
+        for segment in list(self._segments):
+            hits = np.isin(segment.ids, ids)
+            if segment.deleted is not None:
+                hits &= ~segment.deleted
+            if not hits.any():
+                continue
+            deleted_any = True
+            segment.deleted = hits if segment.deleted is None else segment.deleted | hits
+            if segment.live == 0:  # Nothing left to search: drop the segment
+                self._segments.remove(segment)
+                self.manifest["segments"].remove(os.path.basename(segment.path))
+                self._save_manifest()
+                shutil.rmtree(segment.path, ignore_errors=True)
+            else:
+                write_atomic(os.path.join(segment.path, "deleted.npy"), lambda temporary: save_array(temporary, segment.deleted))
+        return deleted_any
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        documents = []
+        for segment in self._segments:
+            hits = np.isin(segment.ids, list(ids))
+            if segment.deleted is not None:
+                hits &= ~segment.deleted
+            documents.extend(segment.document(row) for row in np.flatnonzero(hits))
+        return documents
+
+    # ----- Search -----
+
+    # Top `k` (score, segment, row) per query, scoring a block of rows for all queries at once
+    def _search(self, queries: np.ndarray, k: int, filter: Optional[dict] = None) -> List[List[tuple]]:
+        segments = list(self._segments)
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_refs = np.zeros((len(queries), 0, 2), dtype=np.int64)
+        for segment_index, segment in enumerate(segments):
+            allowed = segment.mask(filter)
+            for start in range(0, len(segment), self.block_rows):
+                stop = min(start + self.block_rows, len(segment))
+                scores = segment.scores(start, stop, queries)
+                if allowed is not None:
+                    scores[:, ~allowed[start:stop]] = -np.inf
+                top = min(k, stop - start)
+                rows = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+                refs = np.stack([np.full_like(rows, segment_index), rows + start], axis=-1)
+                best_scores = np.concatenate([best_scores, np.take_along_axis(scores, rows, axis=1)], axis=1)
+                best_refs = np.concatenate([best_refs, refs], axis=1)
+                if best_scores.shape[1] > k:
+                    keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                    best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                    best_refs = np.take_along_axis(best_refs, keep[..., None], axis=1)
+        results = []
+        for scores, refs in zip(best_scores, best_refs):
+            order = np.argsort(-scores)
+            results.append([(float(scores[i]), segments[refs[i][0]], int(refs[i][1]))
+                            for i in order if np.isfinite(scores[i])])
+        return results
+
+    def similarity_search_by_vectors(self, embeddings: Sequence[Sequence[float]], k: int = 4,
+                                     filter: Optional[dict] = None) -> List[List[Tuple[Document, float]]]:
+        if not self._segments or k <= 0:
+            return [[] for _ in embeddings]
+        queries = normalize_rows(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+        return [[(segment.document(row), score) for score, segment, row in hits]
+                for hits in self._search(queries, k, filter)]
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[dict] = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vectors([embedding], k, filter)[0]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[dict] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, filter)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[dict] = None,
+                                    **kwargs: Any) -> List[Document]:
+        return [document for document, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k, filter)
+
+    # Scores are cosine similarities, already "higher is more relevant"
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return lambda score: score
+
+    def max_marginal_relevance_search_by_vector(self, embedding: List[float], k: int = 4, fetch_k: int = FETCH_K,
+                                                lambda_mult: float = LAMBDA_MULT, filter: Optional[dict] = None,
+                                                **kwargs: Any) -> List[Document]:
+        if not self._segments or k <= 0:
+            return []
+        query = normalize_rows(np.asarray(embedding, dtype=np.float32))
+        hits = self._search(query[None, :], max(k, fetch_k), filter)[0]
+        if not hits:
+            return []
+        candidates = normalize_rows(np.stack([segment.rows([row])[0] for _, segment, row in hits]))
+        return [hits[index][1].document(hits[index][2]) for index in mmr_select(query, candidates, k, lambda_mult)]
+
+    def max_marginal_relevance_search(self, query: str, k: int = 4, fetch_k: int = FETCH_K,
+                                      lambda_mult: float = LAMBDA_MULT, filter: Optional[dict] = None,
+                                      **kwargs: Any) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(self.embedding.embed_query(query), k, fetch_k,
+                                                            lambda_mult, filter)
+
+    # ----- Construction -----
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, *,
+                   ids: Optional[List[str]] = None, path: str = INDEX_PATH, quantization: Optional[str] = None,
+                   **kwargs: Any) -> "NumpyVectorStore":
+        store = cls(path, embedding, quantization=quantization, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+    # Opens the index at `path` if it was built from these `documents` (the manifest records a hash
+    # of their ids, texts and metadata), so restarts reuse it; otherwise, e.g. after the documents
+    # were edited, the index is rebuilt from them
+    @classmethod
+    def load_or_build(cls, path: str, embedding: Embeddings, documents: Sequence[Document],
+                      **kwargs: Any) -> "NumpyVectorStore":
+        documents = list(documents)
+        source_hash = documents_hash(documents)
+        store = cls(path, embedding, **kwargs)
+        if store._segments and store.manifest.get("source_hash") == source_hash:
+            return store
+        with store._lock:
+            for segment in store._segments:
+                shutil.rmtree(segment.path, ignore_errors=True)
+            store._segments = []
+            store.manifest = {"version": 1, "dimensions": None, "quantization": kwargs.get("quantization"),
+                              "segments": []}
+        store.add_documents(documents)
+        os.makedirs(path, exist_ok=True)
+        store.manifest["source_hash"] = source_hash
+        store._save_manifest()
+        return store
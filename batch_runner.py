@@ -0,0 +1,168 @@
+# Batch runner for the reflection (2_basic_reflection_system) and reflexion (4_reflexion_agent_system) graphs
+#
+# Usage:
+#   python batch_runner.py reflexion inputs.jsonl outputs.jsonl --concurrency 16 --rate-limit gpt-4o=5
+#
+# Each input line is a JSON object with a "topic" and an optional "id" (the line number is used otherwise).
+# Each output line holds the id, the final output, the latency in seconds and an error (null on success).
+# Re-running with the same output file skips inputs that already completed, so a crashed batch can be resumed.
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from dotenv import load_dotenv
+from langchain_core.messages import HumanMessage
+from langchain_core.rate_limiters import InMemoryRateLimiter
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Define how each graph is loaded, fed and read
+GRAPHS = {
+    "reflection": {
+        "folder": "2_basic_reflection_system",
+        "module": "basic",
+        "make_input": lambda topic: HumanMessage(content=topic),
+        "read_output": lambda result: result[-1].content,
+    },
+    "reflexion": {
+        "folder": "4_reflexion_agent_system",
+        "module": "reflexion_graph",
+        "make_input": lambda topic: {"messages": [topic]},
+        "read_output": lambda result: result["messages"][-1].tool_calls[0]["args"]["answer"],
+    },
+}
+
+# Function to import a lesson's compiled graph and attach client-side rate limiters to its models
+def load_graph(name: str, rate_limits: Dict[str, float]):
+    """
+    Imports the compiled graph of a lesson.
+
+    Args:
+        name: "reflection" or "reflexion".
+        rate_limits: Requests per second allowed per model name.
+
+    Returns:
+        The graph definition from GRAPHS and the compiled app.
+    """
+    spec = GRAPHS[name]
+    sys.path.insert(0, os.path.join(ROOT, spec["folder"]))  # Lessons import their sibling modules by name
+    module = importlib.import_module(spec["module"])
+    chains = importlib.import_module("chains")
+
+    # Per-round logs meant for inspecting one run would grow with every input of the batch
+    if hasattr(module, "LOG_PROMPT_SIZES"):
+        module.LOG_PROMPT_SIZES = False
+        module.prompt_token_log.clear()
+
+    # Every chain of a lesson shares the `llm` object defined in its chains.py
+    model = chains.llm.model_name
+    if model in rate_limits:
+        # Token bucket: refills at the given rate and allows no bursts above one request
+        chains.llm.rate_limiter = InMemoryRateLimiter(requests_per_second=rate_limits[model])
+    return spec, module.app
+
+# Function to read the inputs, numbering lines without an explicit id
+def read_inputs(path: str) -> List[dict]:
+    inputs = []
+    with open(path) as file:
+        for line_number, line in enumerate(file, start=1):
+            if line.strip():
+                item = json.loads(line)
+                item.setdefault("id", line_number)
+                inputs.append(item)
+    return inputs
+
+# Function to collect the ids that already completed successfully in a previous run
+def completed_ids(path: str) -> set:
+    done = set()
+    if os.path.exists(path):
+        with open(path) as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # A line cut short by a crash
+                if record.get("error") is None:
+                    done.add(record["id"])
+    return done
+
+# Function to compute a percentile of a list of latencies
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+# Coroutine that runs every pending input through the graph with bounded concurrency
+async def run_batch(spec, app, inputs: List[dict], output_path: str, concurrency: int) -> List[float]:
+    """
+    Runs the inputs through the graph and appends each result to the output file as soon as it finishes.
+
+    Args:
+        spec: Graph definition from GRAPHS.
+        app: The compiled graph.
+        inputs: Inputs still to run.
+        output_path: JSONL file the results are appended to.
+        concurrency: Maximum number of graph runs in flight.
+
+    Returns:
+        The latencies of the successful runs.
+    """
+    # The graph nodes are synchronous, so LangGraph runs them on the loop's default executor
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    with open(output_path, "a") as output:
+        async def run_one(item: dict):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    result = await app.ainvoke(spec["make_input"](item["topic"]))
+                    record = {"id": item["id"], "output": spec["read_output"](result), "error": None}
+                except Exception as error:
+                    record = {"id": item["id"], "output": None, "error": repr(error)}
+                record["latency"] = time.perf_counter() - start
+                if record["error"] is None:
+                    latencies.append(record["latency"])
+                # Write and flush straight away so a crash loses at most the runs in flight
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+
+        await asyncio.gather(*(run_one(item) for item in inputs))
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many topics through the reflection or reflexion graph.")
+    parser.add_argument("graph", choices=sorted(GRAPHS))
+    parser.add_argument("inputs", help="JSONL file with one {\"id\", \"topic\"} object per line")
+    parser.add_argument("outputs", help="JSONL file the results are appended to")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum number of graph runs in flight")
+    parser.add_argument("--rate-limit", action="append", default=[], metavar="MODEL=RPS",
+                        help="Client-side request rate limit for a model, e.g. gpt-4o=5 (repeatable)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    rate_limits = {model: float(rps) for model, rps in (limit.split("=", 1) for limit in args.rate_limit)}
+    spec, app = load_graph(args.graph, rate_limits)
+
+    # Skip the inputs that completed in a previous run
+    done = completed_ids(args.outputs)
+    pending = [item for item in read_inputs(args.inputs) if item["id"] not in done]
+    print(f"{len(pending)} inputs to run ({len(done)} already completed)")
+
+    start = time.perf_counter()
+    latencies = asyncio.run(run_batch(spec, app, pending, args.outputs, args.concurrency))
+    elapsed = time.perf_counter() - start
+
+    # Report throughput and latency percentiles
+    print(f"Completed {len(latencies)}/{len(pending)} runs in {elapsed:.1f}s "
+          f"({len(latencies) / elapsed * 60 if elapsed else 0.0:.1f} runs/min)")
+    if latencies:
+        print(f"Latency p50: {percentile(latencies, 0.50):.2f}s, p95: {percentile(latencies, 0.95):.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# Import necessary libraries for the persistent search-result cache
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+from langchain_core.tools import BaseTool
+
+# Default cache settings
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_cache.sqlite")  # Shared by all lessons, whatever the working directory
+CACHE_TTL = 24 * 60 * 60  # Seconds a cached result stays valid (one day)
+CACHE_MAX_ENTRIES = 10_000  # Least recently used results are evicted above this size
+
+# Function to normalize a search query so trivially different queries share one cache entry
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a search query for use as a cache key.
+
+    Args:
+        query: The raw search query.
+
+    Returns:
+        The query lower-cased with surrounding punctuation and repeated whitespace removed.
+    """
+    return " ".join(query.lower().split()).strip(" .?!")
+
+# Define the on-disk cache of search results
+class SearchCache:
+    """
+    SQLite-backed cache of search results with TTL expiry, an LRU size cap and hit/miss counters.
+
+    The database uses WAL journaling so several processes can share one cache file.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn = None  # Opened on first use so importing a lesson does not create the file
+        self._lock = threading.Lock()  # The connection is shared by all threads of the process
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS search_cache (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS search_cache_lru ON search_cache (accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, namespace: str, query: str) -> Optional[Any]:
+        """
+        Looks up a cached search result.
+
+        Args:
+            namespace: Identifies the search tool and its settings.
+            query: The search query.
+
+        Returns:
+            The cached result, or None if it is missing or expired.
+        """
+        key = f"{namespace}|{normalize_query(query)}"
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT result, created_at FROM search_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] + self.ttl < now:
+                if row is not None:  # Expired results are removed straight away
+                    conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                    conn.commit()
+                self.misses += 1
+                return None
+            conn.execute("UPDATE search_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, namespace: str, query: str, result: Any) -> None:
+        """
+        Stores a search result and evicts the least recently used results above the size cap.
+
+        Args:
+            namespace: Identifies the search tool and its settings.
+            query: The search query.
+            result: The JSON-serializable search result.
+        """
+        key = f"{namespace}|{normalize_query(query)}"
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, result, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result), now, now),
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM search_cache WHERE key IN "
+                    "(SELECT key FROM search_cache ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+            conn.commit()
+
+    def clear(self) -> None:
+        """Removes every cached result."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM search_cache")
+            conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Reports the cache counters.
+
+        Returns:
+            A dictionary with hits, misses, hit rate, evictions and the number of stored results.
+        """
+        with self._lock:
+            size = self._connection().execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": size,
+        }
+
+# Define the caching wrapper around a search tool
+class CachedSearchTool(BaseTool):
+    """
+    Drop-in replacement for a search tool (e.g. TavilySearchResults) that answers repeated queries from a SearchCache.
+
+    It keeps the wrapped tool's name, description and argument schema, so it can be used in
+    `tools=[...]` lists, `bind_tools` and `ToolNode` exactly like the original tool.
+    """
+
+    tool: BaseTool
+    cache: SearchCache
+    namespace: str
+
+    def __init__(self, tool: BaseTool, cache: Optional[SearchCache] = None, **kwargs):
+        # Tools with different settings must not share cache entries
+        namespace = f"{tool.name}:{getattr(tool, 'max_results', '')}:{getattr(tool, 'search_depth', '')}"
+        kwargs.setdefault("name", tool.name)
+        kwargs.setdefault("description", tool.description)
+        kwargs.setdefault("args_schema", tool.args_schema)
+        kwargs.setdefault("namespace", namespace)
+        super().__init__(tool=tool, cache=cache or SearchCache(), **kwargs)
+
+    def _run(self, query: str, **kwargs) -> Any:
+        result = self.cache.get(self.namespace, query)
+        if result is None:
+            result = self.tool.invoke(query)
+            self._store(query, result)
+        return result
+
+    async def _arun(self, query: str, **kwargs) -> Any:
+        result = self.cache.get(self.namespace, query)
+        if result is None:
+            result = await self.tool.ainvoke(query)
+            self._store(query, result)
+        return result
+
+    def _store(self, query: str, result: Any) -> None:
+        # Tavily reports failures as plain strings, so only structured results are cached
+        if not isinstance(result, str):
+            self.cache.set(self.namespace, query, result)